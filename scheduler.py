@@ -4,9 +4,118 @@ Initial skeleton code written by Robert Merkel for FIT2107 Assignment 3
 """
 
 
-from skyfield.api import Loader, Topos, load
 from datetime import datetime, timedelta
+import functools
+import hashlib
+import heapq
+import importlib
+import math
+import os
 import pytz
+import threading
+import time
+
+
+class LazyModule:
+    """
+    Stands in for a module of this one until it is first used. The module is then imported and takes its place, so it
+    costs nothing to import this module without it, and nothing more to use it afterwards.
+    """
+
+    def __init__(self, name, alias):
+        """
+        Create a LazyModule.
+
+        Arguments:
+            name -- the full name of the module
+            alias -- the name the module has in this module
+        """
+
+        self.name = name
+        self.alias = alias
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+
+        return getattr(module, attribute)
+
+
+# skyfield, sgp4 and NumPy are most of the time taken to import this module, so they are only imported once used,
+# like multiprocessing, which only the workers option of find_time needs
+numpy = LazyModule("numpy", "numpy")
+multiprocessing = LazyModule("multiprocessing", "multiprocessing")
+skyfield_api = LazyModule("skyfield.api", "skyfield_api")
+sgp4lib = LazyModule("skyfield.sgp4lib", "sgp4lib")
+sgp4_api = LazyModule("sgp4.api", "sgp4_api")
+sgp4_exporter = LazyModule("sgp4.exporter", "sgp4_exporter")
+
+# only needed to download satellite lists
+http_client = LazyModule("http.client", "http_client")
+futures = LazyModule("concurrent.futures", "futures")
+urllib_parse = LazyModule("urllib.parse", "urllib_parse")
+
+# seconds in a day, as skyfield.constants.DAY_S
+DAY_S = 86400.0
+
+
+# the ways find_time can evaluate the observation windows
+#   loop -- evaluate every satellite at every sample time one by one
+#   vectorized -- propagate every satellite once over a single array of all the sample times
+#   batched -- propagate the whole catalog together with sgp4's array propagator, reusing the last call's samples
+#   ephemeris -- read the catalog's positions from an EphemerisStore shared by every observer
+#   events -- find every satellite's rise and set times once and work from those visibility intervals
+#   index -- read which satellites are visible from a VisibilityIndex kept for the observer
+ENGINES = ("loop", "vectorized", "batched", "ephemeris", "events", "index")
+
+# the engines that work from a SatelliteCatalog rather than a list of Satellite objects
+CATALOG_ENGINES = ("batched", "ephemeris", "index")
+
+# what find_time counts as a visible satellite
+#   geometric -- a satellite above the horizon
+#   optical -- a satellite above the horizon and lit by the Sun, seen by an observer in darkness
+VISIBILITY_MODELS = ("geometric", "optical")
+
+# the altitude (in degrees) the Sun must be below for the observer to be in darkness, the end of civil twilight
+DARKNESS_SUN_ALTITUDE = -6
+
+# the longest step (in minutes) between the coarse samples used to bound the satellites a window can see
+PRUNE_STEP = 5
+
+# how close (in degrees) the adaptive sampler lets a satellite's elevation get to the horizon before it stops
+# skipping samples, which is also how far off an elevation can be before adaptive and fixed-step sampling differ
+ADAPTIVE_MARGIN = 0.5
+
+# upper bounds of the bytes find_time_chunked holds at once for every satellite and sample time of a chunk, the
+# positions and velocities sgp4 hands back, their Earth-fixed copy and the temporary arrays of the elevations, and for
+# every sample time of a chunk, its skyfield Time and Julian dates
+CHUNK_CELL_BYTES = 160
+CHUNK_SAMPLE_BYTES = 256
+
+# the most bytes the files of an EphemerisStore and of a VisibilityIndex take up, past which the least recently used
+# files are deleted
+EPHEMERIS_STORE_BYTES = 2 * 2 ** 30
+VISIBILITY_INDEX_BYTES = 256 * 2 ** 20
+
+# the width (in degrees) of the latitude bands and horizon ranges a SubSatelliteIndex buckets satellites by
+COVERAGE_BAND = 5
+
+# the most satellite lists downloaded at the same time, and how long (in seconds) a download can stall
+MAX_DOWNLOADS = 8
+DOWNLOAD_TIMEOUT = 30
+
+# Earth's gravitational parameter (km^3/s^2), polar and equatorial radius (km) and rotation rate (radians/minute)
+EARTH_MU = 398600.4418
+EARTH_POLAR_RADIUS = 6356.752
+EARTH_EQUATORIAL_RADIUS = 6378.137
+EARTH_ROTATION_RATE = 7.2921159e-5 * 60
+
+# the equatorial radius (km) and flattening of the IERS2010 ellipsoid, the one skyfield's Topos is on
+IERS2010_RADIUS = 6378.1366
+IERS2010_FLATTENING = 1 / 298.25642
+
+# the astronomical unit (km)
+AU_KM = 149597870.7
 
 
 class IllegalArgumentException(Exception):
@@ -14,20 +123,234 @@ class IllegalArgumentException(Exception):
     pass
 
 
+class SchedulerStats:
+    """
+    The timings and counters of one call of an instrumented Scheduler.
+
+    Timings are in seconds, by stage:
+        total -- the whole call
+        download -- downloading satellite lists
+        parse -- parsing satellite lists
+        timescale -- building skyfield Time objects
+        propagation -- propagating satellites, including the altitude conversion of the skyfield engines
+        altaz -- working out elevations from the positions of the sgp4 engines
+        aggregation -- counting the visible satellites of the windows and picking the best one
+
+    Counters are:
+        propagations -- calls to a propagator, each for any number of satellites and times
+        utc_calls -- skyfield Time objects built from UTC dates
+        satellites -- satellites in the satellite list
+        samples -- sample times of the windows
+    """
+
+    __slots__ = ("call", "timings", "counters")
+
+    def __init__(self, call):
+        """
+        Create empty SchedulerStats.
+
+        Arguments:
+            call -- the name of the Scheduler method the stats are for
+        """
+
+        self.call = call
+        self.timings = {}
+        self.counters = {}
+
+    def stage(self, name):
+        """
+        Time a stage, adding to the time already spent in it.
+
+        Arguments:
+            name -- name of the stage
+
+        Returns:
+            a context manager timing the code it runs
+        """
+
+        return StageTimer(self.timings, name)
+
+    def count(self, name, amount = 1):
+        """
+        Add to a counter.
+
+        Arguments:
+            name -- name of the counter
+            amount -- how much to add (defaults to 1)
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self):
+        """
+        Get the stats as plain dictionaries.
+
+        Returns:
+            a dictionary {"call": call, "timings": timings, "counters": counters}
+        """
+
+        return {"call": self.call, "timings": dict(self.timings), "counters": dict(self.counters)}
+
+
+class StageTimer:
+    """ Times a stage of SchedulerStats. """
+
+    __slots__ = ("timings", "name", "started_at")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exception):
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.started_at
+
+
+class NullSchedulerStats:
+    """ Stands in for SchedulerStats when a Scheduler isn't instrumented, doing nothing. """
+
+    __slots__ = ()
+
+    def stage(self, name):
+        return self
+
+    def count(self, name, amount = 1):
+        pass
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exception):
+        pass
+
+
+# what Scheduler.stats is outside of instrumented calls
+NULL_STATS = NullSchedulerStats()
+
+
+def instrumented(method):
+    """
+    Make a Scheduler method collect SchedulerStats when its Scheduler is instrumented. The stats are kept as the
+    Scheduler's last_stats and handed to its stats_callback once the call returns.
+
+    Arguments:
+        method -- the method
+
+    Returns:
+        the instrumented method
+    """
+
+    @functools.wraps(method)
+    def instrumented_method(self, *arguments, **keyword_arguments):
+        if not self.instrument:
+            return method(self, *arguments, **keyword_arguments)
+
+        stats = SchedulerStats(method.__name__)
+        self.stats = stats
+
+        try:
+            with stats.stage("total"):
+                result = method(self, *arguments, **keyword_arguments)
+        finally:
+            self.stats = NULL_STATS
+
+        self.last_stats = stats
+
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+
+        return result
+
+    return instrumented_method
+
+
 class Scheduler:
     """
     The class for calculating optimal satellite spotting times. You can and should add methods
     to this, but please don't change the parameter list for the existing methods.
     """
 
-    def __init__(self):
-        """ Constructor sets things to put downloaded data in a sensible location. You can add to this if you want. """
-        self._skyload = Loader('~/.skyfield-data')
-        self.ts = self._skyload.timescale()
+    def __init__(self, tle_max_age = 1.0, offline = False, instrument = False, stats_callback = None,
+                 builtin_timescale = True):
+        """
+        Constructor sets things to put downloaded data in a sensible location. You can add to this if you want.
+
+        Arguments:
+            tle_max_age -- how old (in days) a cached satellite list can be before it is downloaded again
+            offline -- if True, satellite lists are only ever read from the cache, whatever their age
+            instrument -- if True, find_time, find_top_windows, find_time_many and find_coverage_map collect
+                          SchedulerStats, kept as last_stats
+            stats_callback -- a function called with the SchedulerStats of every instrumented call, which turns
+                              instrument on
+            builtin_timescale -- if True, times are worked out from the leap seconds and Earth orientation data
+                                 bundled with skyfield, never downloading anything, and if False from the data kept
+                                 next to the downloaded satellite lists, downloaded when it is missing or out of date
+
+        Nothing is loaded here. The skyfield Loader and timescale are only made when they are first used.
+        """
+        self._loader = None
+        self._ts = None
+
+        self.builtin_timescale = builtin_timescale
+
+        self.tle_max_age = tle_max_age
+        self.offline = offline
+
+        # satellite lists already parsed by this Scheduler, by URL, as (time loaded, list of Satellite objects)
+        self._satellites_cache = {}
+
+        # the same lists as SatelliteCatalog objects, by URL, as (time loaded, catalog)
+        self._catalogs_cache = {}
+
+        # the last visibility grid of the batched engine, as (catalog, observer and step, start time, grid)
+        self._sliding_grid = None
+
+        # the last catalog culled for a latitude, as (catalog, latitude, culled catalog)
+        self._culled_catalog = None
+
+        # keep-alive connections to the servers satellite lists are downloaded from
+        self._connections = ConnectionPool()
+
+        self.instrument = instrument or stats_callback is not None
+        self.stats_callback = stats_callback
+
+        # the stats of the instrumented call going on, and of the last one
+        self.stats = NULL_STATS
+        self.last_stats = None
+
+    @property
+    def _skyload(self):
+        """ The skyfield Loader of the downloaded data, made the first time it is used. """
+
+        if self._loader is None:
+            self._loader = skyfield_api.Loader('~/.skyfield-data')
+
+        return self._loader
+
+    @_skyload.setter
+    def _skyload(self, loader):
+        self._loader = loader
+
+    @property
+    def ts(self):
+        """ The skyfield Timescale, made the first time it is used, see the builtin_timescale argument. """
+
+        if self._ts is None:
+            self._ts = self._skyload.timescale(builtin=self.builtin_timescale)
 
+        return self._ts
+
+    @ts.setter
+    def ts(self, ts):
+        self._ts = ts
+
+    @instrumented
     def find_time(self, satlist_url = "http://celestrak.com/NORAD/elements/visual.txt", start_time = datetime.now(),
                   n_windows = 24, duration = 60, sample_interval = 1, cumulative = False,
-                  location = (-37.910496, 145.134021)):
+                  location = (-37.910496, 145.134021), engine = "loop", workers = None, prune = False,
+                  adaptive = False, visibility = "geometric", cull = False, memory_budget = None):
         """
         NOTE: this is the key function that you'll need to implement for the assignment.  Please don't change the arguments.
 
@@ -46,6 +369,21 @@ class Scheduler:
                 observer. Negative latitudes specify the southern hemisphere, negative longitudes
                 the western hemisphere.  lat must be in the range [-90,90], lon must be in the
                 range [-180, 180]
+            engine -- how the windows are evaluated, one of ENGINES (defaults to "loop")
+            workers -- the number of processes to share the propagation between, only for the "batched" engine
+                (defaults to None, which propagates in this process)
+            prune -- if True, only the windows that could beat the best window found so far are evaluated, and only
+                with the satellites that could be visible in them, for the "loop" engine (defaults to False)
+            adaptive -- if True, satellites far from the horizon skip the samples they can't cross it in, for the
+                "loop" engine (defaults to False), see Scheduler.get_adaptive_visibility
+            visibility -- what counts as a visible satellite, one of VISIBILITY_MODELS (defaults to "geometric"),
+                "optical" only for the "vectorized" and "batched" engines, see Scheduler.get_optical_visibility_matrix
+            cull -- if True, satellites whose orbits can never bring them above the horizon at the location are left
+                out before anything is propagated, counted as "culled" by the stats (defaults to False), see
+                Scheduler.cull_unreachable_satellites
+            memory_budget -- the most bytes to hold for the elevations at once, for the "vectorized" and "batched"
+                engines, evaluating the catalog in chunks of satellites and sample times that fit in it (defaults to
+                None, which evaluates every satellite at every sample time at once), see Scheduler.find_time_chunked
 
         Returns:
             a tuple (interval_start_time, satellite_list), where start_interval is
@@ -58,406 +396,3391 @@ class Scheduler:
             IllegalArgumentException -- if an illegal argument is provided
         """
 
-        """ START Precondition Handling """
-        # dealing with naive start_time which is a datetime object with no timezone
-        try:
-            timezone = pytz.timezone("UTC")
-            start_time = timezone.localize(start_time)
-        except ValueError as e:
-            if str(e) != "Not naive datetime (tzinfo is already set)":
-                raise IllegalArgumentException
-        except Exception:
-            raise IllegalArgumentException
-
-        if (start_time.tzinfo is None) or (str (start_time.tzinfo) != "UTC"):
-            raise IllegalArgumentException
-
-        if type(duration) is not int:
-            raise IllegalArgumentException
-
-        if type(n_windows) is not int:
-            raise IllegalArgumentException
-
-        if type(sample_interval) is not int:
-            raise IllegalArgumentException
-
-        if type(location) is not tuple and type(location) is not list:
-            raise IllegalArgumentException
-
-        if len(location) != 2:
-            raise IllegalArgumentException
-
-        if type(location[0]) is not int and type(location[0]) is not float:
-            raise IllegalArgumentException
+        start_time = self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                                    location, engine, workers, prune, adaptive, visibility, cull,
+                                                    memory_budget)
 
-        if type(location[1]) is not int and type(location[1]) is not float:
-            raise IllegalArgumentException
+        observer_location = skyfield_api.Topos(location[0], location[1])
 
-        if type(cumulative) is not bool:
-            raise IllegalArgumentException
+        # a list of unique Satellite objects, or a SatelliteCatalog of them for the engines propagating with sgp4
+        # they are unique by name, some satellites with the same name but different ids are not considered
+        if engine in CATALOG_ENGINES or memory_budget is not None:
+            satellites_list = self.get_satellite_catalog(satlist_url)
+        else:
+            satellites_list = self.get_all_satellites(satlist_url)
 
-        if duration <= 0:
-            raise IllegalArgumentException
+        self.stats.count("satellites", len(satellites_list))
+        self.stats.count("samples", n_windows * (duration // sample_interval))
 
-        if n_windows <= 0:
-            raise IllegalArgumentException
+        if cull:
+            satellites_list = self.cull_unreachable_satellites(satellites_list, location)
 
-        if (sample_interval <= 0) or (sample_interval > duration):
-            raise IllegalArgumentException
+        if memory_budget is not None:
+            return self.find_time_chunked(satellites_list, observer_location, start_time, n_windows, duration,
+                                          sample_interval, cumulative, memory_budget)
 
-        if (location[0] < -90) or (location[0] > 90):
-            raise IllegalArgumentException
+        if engine == "events":
+            return self.find_time_events(satellites_list, observer_location, start_time, n_windows, duration,
+                                         sample_interval, cumulative)
 
-        if (location[1] < -180) or (location[1] > 180):
-            raise IllegalArgumentException
-        """ END Precondition Handling """
+        if workers is not None:
+            return self.find_time_parallel(satellites_list, location, start_time, n_windows, duration,
+                                           sample_interval, cumulative, workers)
 
-        observer_location = Topos(location[0], location[1])
+        if engine != "loop":
+            return self.find_time_vectorized(satellites_list, observer_location, start_time, n_windows, duration,
+                                             sample_interval, cumulative, engine, visibility)
 
-        # a list of unique Satellite objects
-        # they are unique by name, some satellites with the same name but different ids are not considered
-        satellites_list = self.get_all_satellites(satlist_url)
+        if prune:
+            return self.find_time_pruned(satellites_list, observer_location, start_time, n_windows, duration,
+                                         sample_interval, cumulative, adaptive)
 
         max_interval_start = None
         max_satellites_list = []
 
-        for interval in range(n_windows):
-
-            time = start_time + timedelta(minutes = interval * duration)
-
-            if cumulative:
-                _, visible_satellites = self.find_max_visible_satellites_interval_cumulative(
-                    satellites_list, observer_location, time, duration, sample_interval)
-            else:
-                _, visible_satellites = self.find_max_visible_satellites_interval_non_cumulative(
-                    satellites_list, observer_location, time, duration, sample_interval)
+        for window_start, visible_satellites in self.iter_window_satellites(satellites_list, observer_location,
+                                                                            start_time, n_windows, duration,
+                                                                            sample_interval, cumulative, engine,
+                                                                            adaptive):
 
             if len(visible_satellites) > len(max_satellites_list):
-                max_interval_start = time
+                max_interval_start = window_start
                 max_satellites_list = visible_satellites
 
         return max_interval_start, self.satellites_list_to_satellites_name_list(max_satellites_list)
 
-    def satellites_list_to_satellites_name_list(self, satellites_list):
+    def iter_windows(self, satlist_url = "http://celestrak.com/NORAD/elements/visual.txt", start_time = datetime.now(),
+                     n_windows = 24, duration = 60, sample_interval = 1, cumulative = False,
+                     location = (-37.910496, 145.134021), engine = "loop", adaptive = False):
         """
-        Convert a satellite list to a list of satellite names.
+        Evaluate the observation windows of find_time one at a time, handing each one over as soon as it is ready.
+        Only one window is held in memory at a time, whatever the number of windows.
 
         Arguments:
-            satellites_list -- list of satellites
+            the same as find_time, except workers, prune, visibility, cull and memory_budget
 
         Returns:
-            a list of just the satellite names
+            a generator of (window_start_time, count, satellite_name_list) for every window in order, where count is
+            the number of satellites find_time compares the window by and satellite_name_list are those satellites
 
         Raises:
-            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+            IllegalArgumentException -- if an illegal argument is provided, straight away rather than when the
+                                        generator is first used
         """
 
-        satellites_name_list = []
+        start_time = self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                                    location, engine, adaptive=adaptive)
 
-        """ START Precondition Handling """
-        for satellite in satellites_list:
-            if type(satellite) is not Satellite:
-                raise IllegalArgumentException
-        """ END Precondition Handling """
+        observer_location = skyfield_api.Topos(location[0], location[1])
 
-        for satellite in satellites_list:
-            satellites_name_list.append(satellite.name)
+        # a SatelliteCatalog for the engines propagating with sgp4, as find_time
+        if engine in CATALOG_ENGINES:
+            satellites_list = self.get_satellite_catalog(satlist_url)
+        else:
+            satellites_list = self.get_all_satellites(satlist_url)
 
-        return satellites_name_list
+        windows = self.iter_window_satellites(satellites_list, observer_location, start_time, n_windows, duration,
+                                              sample_interval, cumulative, engine, adaptive)
 
-    def get_all_satellites(self, satellite_list_url = "http://celestrak.com/NORAD/elements/visual.txt"):
+        return ((window_start, len(visible_satellites),
+                 self.satellites_list_to_satellites_name_list(visible_satellites))
+                for window_start, visible_satellites in windows)
+
+    @instrumented
+    def find_top_windows(self, satlist_url = "http://celestrak.com/NORAD/elements/visual.txt",
+                         start_time = datetime.now(), n_windows = 24, duration = 60, sample_interval = 1,
+                         cumulative = False, location = (-37.910496, 145.134021), engine = "loop", adaptive = False,
+                         top_k = 5):
         """
-        Get a dictionary of all satellite information from a specified URL.
+        Find the top_k best observation windows of find_time in a single pass over the windows.
 
-        Arguments:
-            satellite_list_url -- URL to retrieve information from (defaults to Celestrak NORAD)
+        Only the top_k best windows seen so far are kept, in a heap, while the windows are evaluated one at a time,
+        so memory doesn't grow with n_windows and the names of the satellites are only looked up for the windows
+        handed back.
 
-        Raises:
-            IllegalArgumentException -- if the provided URL is invalid
+        Arguments:
+            top_k -- the most windows to return, a positive integer (defaults to 5)
+            the others are the same as iter_windows
 
         Returns:
-            a dictionary of all available satellites, using a satellites name as the key
+            a list of up to top_k (window_start_time, count, satellite_name_list) as handed over by iter_windows,
+            ranked by count from the highest, windows with the same count ranked from the earliest, leaving out the
+            windows with no visible satellite. The first one is the window find_time returns.
+
+        Raises:
+            IllegalArgumentException -- if an illegal argument is provided
         """
 
         """ START Precondition Handling """
-        try:
-            satellites = load.tle(satellite_list_url)
-        except Exception:
+        if type(top_k) is not int or top_k <= 0:
             raise IllegalArgumentException
         """ END Precondition Handling """
 
-        satellites_dict = {}
+        start_time = self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                                    location, engine, adaptive=adaptive)
 
-        for satellite in satellites:
+        observer_location = skyfield_api.Topos(location[0], location[1])
 
-            satellite_name = satellites[satellite].name
-            satellite_info = satellites[satellite_name]
+        # a SatelliteCatalog for the engines propagating with sgp4, as find_time
+        if engine in CATALOG_ENGINES:
+            satellites_list = self.get_satellite_catalog(satlist_url)
+        else:
+            satellites_list = self.get_all_satellites(satlist_url)
 
-            current_satellite = Satellite(satellite_name, satellite_info)
+        self.stats.count("satellites", len(satellites_list))
+        self.stats.count("samples", n_windows * (duration // sample_interval))
 
-            satellites_dict[satellite_name] = current_satellite
+        windows = self.iter_window_satellites(satellites_list, observer_location, start_time, n_windows, duration,
+                                              sample_interval, cumulative, engine, adaptive)
 
-        satellites_list = []
+        # a heap of (count, -interval, window start, visible satellites) with the worst of the kept windows on top, a
+        # later window being worse than an earlier one with the same count, so no two entries compare past the
+        # interval
+        top_windows = []
 
-        for satellite in satellites_dict:
-            satellites_list.append(satellites_dict[satellite])
+        for interval, (window_start, visible_satellites) in enumerate(windows):
 
-        return satellites_list
+            if not len(visible_satellites):
+                continue
 
-    def find_visible_satellites_instance(self, satellites_list, observer_location, time_of_measurement):
+            entry = (len(visible_satellites), -interval, window_start, visible_satellites)
+
+            if len(top_windows) < top_k:
+                heapq.heappush(top_windows, entry)
+            elif entry[:2] > top_windows[0][:2]:
+                heapq.heapreplace(top_windows, entry)
+
+        with self.stats.stage("aggregation"):
+            return [(window_start, count, self.satellites_list_to_satellites_name_list(visible_satellites))
+                    for count, _, window_start, visible_satellites in sorted(top_windows, key=lambda entry: entry[:2],
+                                                                             reverse=True)]
+
+    def iter_window_satellites(self, satellites_list, observer_location, start_time, n_windows, duration,
+                               sample_interval, cumulative, engine = "loop", adaptive = False):
         """
-        Get all visible satellites from a specified location and time.
+        Evaluate the observation windows one at a time.
 
         Arguments:
-            satellites_list -- dictionary of possible satellites
+            satellites_list -- list of possible satellites, or a SatelliteCatalog of them for the engines of
+                               CATALOG_ENGINES
             observer_location -- location of observer
-            time_of_measurement -- time of observation
-
-        Raises:
-            IllegalArgumentException -- if observer_location is not of class skyfield.toposlib.Topos
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows to check
+            duration -- the size (in minutes) of an observation window
+            sample_interval -- the interval (in minutes) at which the visible satellites are checked
+            cumulative -- whether the windows are compared by their cumulative number of visible satellites
+            engine -- how the windows are evaluated, one of ENGINES
+            adaptive -- whether the "loop" engine samples adaptively
 
         Returns:
-            a list of all visible satellites from observer_location at time_of_measurement from satellites_list
+            a generator of (window_start_time, visible_satellites) for every window in order, where
+            visible_satellites are the Satellite objects the window is compared by, or a SatelliteCatalog of them
+            if satellites_list is one
         """
 
-        """ START Precondition Handling """
-        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
-        #     raise IllegalArgumentException
-        #
-        # if str(type(time_of_measurement)) != "<class 'skyfield.timelib.Time'>":
-        #     raise IllegalArgumentException
+        if engine == "events" and satellites_list:
+            intervals = self.get_visibility_intervals(satellites_list, observer_location, start_time,
+                                                      n_windows * duration)
 
-        for satellite in satellites_list:
-            if type(satellite) is not Satellite:
-                raise IllegalArgumentException
-        """ END Precondition Handling """
+        if engine == "ephemeris" and satellites_list:
+            step = math.gcd(duration, sample_interval)
 
-        # if the satellites list is empty then we return an empty array
-        visible_satellites = []
+            # the positions are mapped from disk, so this doesn't load the whole grid in memory
+            positions = self.get_ephemeris_store().get_positions(satellites_list, self, start_time, step,
+                                                                 n_windows * duration // step)
 
-        for satellite in satellites_list:
+        if engine == "index" and satellites_list:
+            step = math.gcd(duration, sample_interval)
 
-            satellite_altitude = satellite.get_altitude(observer_location, time_of_measurement)
-            satellite_elevation = satellite_altitude.degrees
+            visibility = self.get_visibility_index().get_visibility(satellites_list, observer_location, self,
+                                                                    start_time, step, n_windows * duration // step)
 
-            if satellite.is_visible(satellite_elevation):
-                visible_satellites.append(satellite)
+        for interval in range(n_windows):
 
-        return visible_satellites
+            window_start = start_time + timedelta(minutes = interval * duration)
 
-    def find_max_visible_satellites_interval_non_cumulative(self, satellites_list, observer_location, start_time,
-                                                            interval_duration, sub_interval_duration):
-        """
-        Finds the maximum visible satellites in a sub interval.
+            if engine == "loop":
+                if cumulative:
+                    _, visible_satellites = self.find_max_visible_satellites_interval_cumulative(
+                        satellites_list, observer_location, window_start, duration, sample_interval, adaptive)
+                else:
+                    _, visible_satellites = self.find_max_visible_satellites_interval_non_cumulative(
+                        satellites_list, observer_location, window_start, duration, sample_interval, adaptive)
 
-        Arguments:
-            satellites_list -- dictionary of possible satellites
-            observer_location -- location of observer
-            start_time -- start time of observation
-            interval_duration -- duration of total interval
-            sub_interval_duration -- duration of sub-intervals
+                yield window_start, visible_satellites
+                continue
 
-        Raises:
-            IllegalArgumentException -- if any satellite in satellites_list is not a Satellite object
+            if not satellites_list:
+                yield window_start, []
+                continue
 
-        Returns:
-            (start_time_of_max_sub_interval, visible_satellites_max_sub_interval) where
-                start_time_of_max_sub_interval -- the time of the sub interval within the interval where there is the
-                                                  highest amount of visible satellites
-                visible_satellites_max_sub_interval -- the satellites that are visible in the sub interval where there
-                                                       is the highest amount of visible satellites
-        """
-        if not satellites_list:
-            return None, []
+            if engine == "events":
+                window_offset = interval * duration
 
-        """ START Precondition Handling """
-        # for satellite in satellites_list:
-        #     if type(satellite) is not Satellite:
-        #         raise IllegalArgumentException
-        #
-        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
-        #     raise IllegalArgumentException
-        #
-        # if str(type(start_time)) != "<class 'datetime.datetime'>":
-        #     raise IllegalArgumentException
+                # the intervals overlapping this window, in minutes since the window started
+                window_intervals = []
 
-        if type(interval_duration) is not int and type(interval_duration) is not float:
-            raise IllegalArgumentException
+                for satellite_intervals in intervals:
+                    satellite_intervals = numpy.clip(satellite_intervals - window_offset, 0, duration)
+                    window_intervals.append(satellite_intervals[satellite_intervals[:, 1] > satellite_intervals[:, 0]])
 
-        if type(sub_interval_duration) is not int and type(sub_interval_duration) is not float:
+                if cumulative:
+                    visible_satellites = numpy.array([[len(satellite_intervals) > 0
+                                                       for satellite_intervals in window_intervals]])
+                else:
+                    _, visible_satellites = self.find_max_concurrent_satellites_windows(window_intervals, 1, duration)
+            else:
+                if engine in ("ephemeris", "index"):
+                    samples = (interval * duration + get_sample_offsets(1, duration, sample_interval)) // step
+
+                if engine == "ephemeris":
+                    elevations = get_topocentric_elevations(positions[:, samples], observer_location)
+                elif engine == "index":
+                    elevations = unpack_visibility(visibility, samples)
+                else:
+                    sample_times = self.get_sample_times(window_start, 1, duration, sample_interval)
+
+                    elevations = self.get_elevation_matrix(satellites_list, observer_location, sample_times, engine)
+
+                _, visible_satellites = self.find_max_visible_satellites_windows(elevations, 1, cumulative)
+
+            indices = numpy.flatnonzero(visible_satellites[0])
+
+            if type(satellites_list) is SatelliteCatalog:
+                yield window_start, satellites_list.select(indices)
+            else:
+                yield window_start, [satellites_list[index] for index in indices]
+
+    @instrumented
+    def find_time_many(self, satlist_url = "http://celestrak.com/NORAD/elements/visual.txt", start_time = datetime.now(),
+                       n_windows = 24, duration = 60, sample_interval = 1, cumulative = False,
+                       locations = ((-37.910496, 145.134021),)):
+        """
+        Run find_time for many observers at once. The satellite list is loaded and propagated once for every sample
+        time, then every observer in turn tests the shared positions against its horizon, so only one observer's
+        visibility is held at a time however many observers there are.
+
+        Arguments:
+            locations -- a list of (lat, lon) locations of observers, each as the location argument of find_time
+            the others are the same as find_time
+
+        Returns:
+            a list with a tuple (interval_start_time, satellite_list) for each location, as returned by find_time
+
+        Raises:
+            IllegalArgumentException -- if an illegal argument is provided
+        """
+
+        """ START Precondition Handling """
+        if type(locations) is not tuple and type(locations) is not list:
             raise IllegalArgumentException
 
-        if interval_duration <= 0:
+        start_time = self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                                    None)
+
+        for location in locations:
+            self.check_location(location)
+        """ END Precondition Handling """
+
+        if not locations:
+            return []
+
+        observer_locations = [skyfield_api.Topos(location[0], location[1]) for location in locations]
+
+        satellites_list = self.get_satellite_catalog(satlist_url)
+
+        self.stats.count("satellites", len(satellites_list))
+        self.stats.count("samples", n_windows * (duration // sample_interval))
+
+        if not satellites_list:
+            return [(None, []) for _ in locations]
+
+        sample_times = self.get_sample_times(start_time, n_windows, duration, sample_interval)
+
+        positions = BatchPropagator(satellites_list, self.stats).get_positions(sample_times)
+
+        results = []
+
+        for observer_location in observer_locations:
+            with self.stats.stage("altaz"):
+                visible = is_above_horizon(positions, observer_location)
+
+            with self.stats.stage("aggregation"):
+                counts, visible_satellites = self.find_max_visible_satellites_windows(visible, n_windows, cumulative)
+
+                results.append(self.get_max_window(satellites_list, start_time, duration, counts,
+                                                   visible_satellites))
+
+        return results
+
+    @instrumented
+    def find_coverage_map(self, satlist_url = "http://celestrak.com/NORAD/elements/visual.txt",
+                          start_time = datetime.now(), n_windows = 24, duration = 60, sample_interval = 1,
+                          cumulative = False, latitudes = tuple(range(-80, 90, 10)),
+                          longitudes = tuple(range(-180, 180, 10))):
+        """
+        Find the best observation window of find_time for every observer of a latitude and longitude grid.
+
+        The catalog is propagated once for every sample time. The sub-satellite points of each window are bucketed
+        in a SubSatelliteIndex, so every row of the grid only tests the satellites that can be above its horizon,
+        and every one of those only at the longitudes in its range, instead of the whole catalog at every cell.
+
+        Arguments:
+            latitudes -- list of the latitudes of the rows of the grid, each as the lat of find_time's location
+            longitudes -- list of the distinct longitudes of the columns of the grid, each as the lon of find_time's
+                          location
+            the others are the same as find_time
+
+        Returns:
+            a tuple (window_starts, counts) where
+                window_starts -- a list of rows with the start time of the best window of every cell, as returned by
+                                 find_time, None where no satellite is ever visible
+                counts -- an integer array of shape (number of latitudes, number of longitudes) of the number of
+                          satellites of the best window of every cell
+
+        Raises:
+            IllegalArgumentException -- if an illegal argument is provided
+        """
+
+        """ START Precondition Handling """
+        if type(latitudes) not in (list, tuple) or type(longitudes) not in (list, tuple):
             raise IllegalArgumentException
 
-        if sub_interval_duration <= 0 or sub_interval_duration > interval_duration:
+        if not latitudes or not longitudes or len(set(longitudes)) != len(longitudes):
             raise IllegalArgumentException
+
+        for latitude in latitudes:
+            start_time = self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                                        (latitude, longitudes[0]))
+
+        for longitude in longitudes:
+            self.check_find_time_arguments(start_time, n_windows, duration, sample_interval, cumulative,
+                                           (latitudes[0], longitude))
         """ END Precondition Handling """
 
-        max_number_of_visible_satellites_sub_interval = 0
+        satellites_list = self.get_satellite_catalog(satlist_url)
 
-        start_time_of_max_sub_interval = self.ts.utc(start_time)
+        number_of_sub_intervals = duration // sample_interval
 
-        number_of_sub_intervals = interval_duration // sub_interval_duration
+        self.stats.count("satellites", len(satellites_list))
+        self.stats.count("samples", n_windows * number_of_sub_intervals)
 
-        visible_satellites_max_sub_interval = []
+        counts = numpy.zeros((len(latitudes), len(longitudes)), dtype=int)
+        best_windows = numpy.full((len(latitudes), len(longitudes)), -1)
 
-        for sub_interval in range(number_of_sub_intervals):
+        if satellites_list:
+            # the columns sorted by longitude, as the index hands back ranges of them
+            order = numpy.argsort(longitudes)
+            sorted_longitudes = numpy.array(longitudes, dtype=float)[order]
 
-            time_of_measurement = self.ts.utc(start_time + timedelta(minutes=sub_interval * sub_interval_duration))
+            observers, zeniths = get_observer_positions(numpy.array(latitudes, dtype=float), sorted_longitudes)
 
-            visible_satellites_sub_interval = self.find_visible_satellites_instance(satellites_list, observer_location,
-                                                                                    time_of_measurement)
+            jd, fraction, ut1_fraction = (numpy.atleast_1d(dates) for dates in get_julian_dates(
+                self.get_sample_times(start_time, n_windows, duration, sample_interval)))
 
-            number_of_visible_satellites_sub_interval = len(visible_satellites_sub_interval)
+            propagator = BatchPropagator(satellites_list, self.stats)
 
-            if max_number_of_visible_satellites_sub_interval < number_of_visible_satellites_sub_interval:
+            for window in range(n_windows):
+                samples = slice(window * number_of_sub_intervals, (window + 1) * number_of_sub_intervals)
 
-                max_number_of_visible_satellites_sub_interval = number_of_visible_satellites_sub_interval
+                positions = propagator.get_positions_from_julian_dates(jd[samples], fraction[samples],
+                                                                       ut1_fraction[samples])
 
-                start_time_of_max_sub_interval = time_of_measurement
+                with self.stats.stage("altaz"):
+                    index = SubSatelliteIndex(positions)
 
-                visible_satellites_max_sub_interval = visible_satellites_sub_interval
+                    for row, latitude in enumerate(latitudes):
+                        window_counts = index.count_visible(latitude, sorted_longitudes, observers[row],
+                                                            zeniths[row], cumulative)
 
-        return start_time_of_max_sub_interval, visible_satellites_max_sub_interval
+                        # only a strictly better window wins, so ties go to the earliest like find_time
+                        better = window_counts > counts[row, order]
+                        counts[row, order[better]] = window_counts[better]
+                        best_windows[row, order[better]] = window
 
-    def find_max_visible_satellites_interval_cumulative(self, satellites_list, observer_location, start_time,
-                                                        interval_duration, sub_interval_duration):
+        window_starts = [[None if window < 0 else start_time + timedelta(minutes = int(window) * duration)
+                          for window in row] for row in best_windows]
+
+        return window_starts, counts
+
+    def check_find_time_arguments(self, start_time, n_windows, duration, sample_interval, cumulative, location,
+                                  engine = "loop", workers = None, prune = False, adaptive = False,
+                                  visibility = "geometric", cull = False, memory_budget = None):
         """
-        Find the cumulative visible satellites from the start_time in a period of interval_duration minutes.
+        Check the arguments of find_time.
 
         Arguments:
-            satellites_list -- dictionary of possible satellites
-            observer_location -- location of observer
-            start_time -- start time of observation
-            interval_duration -- duration of total interval
-            sub_interval_duration -- duration of sub-intervals
+            location -- the location argument of find_time, None to leave it to the caller to check
+            the others are the same as find_time
 
         Raises:
-            IllegalArgumentException -- if any satellite in satellites_list is not a Satellite object
+            IllegalArgumentException -- if an illegal argument is provided
 
         Returns:
-            (start_time_interval, visible_satellites_interval) where
-                start_time_interval -- the start time of the interval and is the start_time argument itself
-                visible_satellites_interval -- all the visible satellites in that interval
+            start_time as a UTC datetime, a naive start_time being taken as UTC
         """
 
-        if not satellites_list:
-            return None, []
+        # dealing with naive start_time which is a datetime object with no timezone
+        try:
+            timezone = pytz.timezone("UTC")
+            start_time = timezone.localize(start_time)
+        except ValueError as e:
+            if str(e) != "Not naive datetime (tzinfo is already set)":
+                raise IllegalArgumentException
+        except Exception:
+            raise IllegalArgumentException
 
-        """ START Precondition Handling """
-        # for satellite in satellites_list:
-        #     if type(satellite) is not Satellite:
-        #         raise IllegalArgumentException
-        #
-        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
-        #     raise IllegalArgumentException
-        #
-        # if str(type(start_time)) != "<class 'datetime.datetime'>":
-        #     raise IllegalArgumentException
+        if (start_time.tzinfo is None) or (str (start_time.tzinfo) != "UTC"):
+            raise IllegalArgumentException
 
-        if type(interval_duration) is not int and type(interval_duration) is not float:
+        if type(duration) is not int:
             raise IllegalArgumentException
 
-        if type(sub_interval_duration) is not int and type(sub_interval_duration) is not float:
+        if type(n_windows) is not int:
             raise IllegalArgumentException
 
-        if interval_duration <= 0:
+        if type(sample_interval) is not int:
             raise IllegalArgumentException
 
-        if sub_interval_duration <= 0 or sub_interval_duration > interval_duration:
+        if location is not None:
+            self.check_location(location)
+
+        if type(cumulative) is not bool:
             raise IllegalArgumentException
-        """ END Precondition Handling """
 
-        start_time_interval = self.ts.utc(start_time)
+        if duration <= 0:
+            raise IllegalArgumentException
 
-        number_of_sub_intervals = interval_duration // sub_interval_duration
+        if n_windows <= 0:
+            raise IllegalArgumentException
 
-        visible_satellites_interval = []
+        if (sample_interval <= 0) or (sample_interval > duration):
+            raise IllegalArgumentException
 
-        for sub_interval in range(number_of_sub_intervals):
+        if engine not in ENGINES:
+            raise IllegalArgumentException
 
-            time_of_measurement = self.ts.utc(start_time + timedelta(minutes=sub_interval * sub_interval_duration))
+        if workers is not None:
+            if type(workers) is not int or workers <= 0 or engine != "batched":
+                raise IllegalArgumentException
 
-            visible_satellites_sub_interval = self.find_visible_satellites_instance(satellites_list, observer_location,
-                                                                                    time_of_measurement)
+        if type(prune) is not bool or (prune and engine != "loop"):
+            raise IllegalArgumentException
 
-            # union 2 lists of Satellite objects - this seems too work but not sure 100%
-            visible_satellites_interval = list(set().union(visible_satellites_interval, visible_satellites_sub_interval))
+        if type(adaptive) is not bool or (adaptive and engine != "loop"):
+            raise IllegalArgumentException
 
-        return start_time_interval, visible_satellites_interval
+        if visibility not in VISIBILITY_MODELS:
+            raise IllegalArgumentException
 
+        if visibility == "optical" and (engine not in ("vectorized", "batched") or workers is not None):
+            raise IllegalArgumentException
 
-class Satellite:
+        if type(cull) is not bool:
+            raise IllegalArgumentException
 
-    def __init__(self, name, info):
+        if memory_budget is not None:
+            if type(memory_budget) is not int or memory_budget <= 0:
+                raise IllegalArgumentException
+
+            if engine not in ("vectorized", "batched") or workers is not None or visibility != "geometric":
+                raise IllegalArgumentException
+
+        return start_time
+
+    def check_location(self, location):
         """
-        Create an instance of a Satellite.
+        Check the location argument of find_time.
 
         Arguments:
-            name -- name of satellite
-            info -- telemetry information of satellite
+            location -- a tuple (lat, lon) of the observer
+
+        Raises:
+            IllegalArgumentException -- if location isn't a (lat, lon) pair of numbers in range
         """
 
-        """ START Precondition Handling """
-        # if str(type(info)) != "<class 'skyfield.sgp4lib.EarthSatellite'>":
-        #     raise IllegalArgumentException
-        """ END Precondition Handling """
+        if type(location) is not tuple and type(location) is not list:
+            raise IllegalArgumentException
 
-        self.name = name
-        self.info = info
+        if len(location) != 2:
+            raise IllegalArgumentException
 
-    def get_altitude(self, observer_location, time_of_measurement):
+        if type(location[0]) is not int and type(location[0]) is not float:
+            raise IllegalArgumentException
+
+        if type(location[1]) is not int and type(location[1]) is not float:
+            raise IllegalArgumentException
+
+        if (location[0] < -90) or (location[0] > 90):
+            raise IllegalArgumentException
+
+        if (location[1] < -180) or (location[1] > 180):
+            raise IllegalArgumentException
+
+    def cull_unreachable_satellites(self, satellites_list, location):
         """
-        Get the altitude of a Satellite.
+        Leave out the satellites that can never be above the horizon at a location, from their orbital elements
+        alone, without propagating them. See get_reachable_satellites.
+
+        The culled catalog of the last latitude is kept, so repeated queries from the same latitude get the same
+        catalog back and the engines keying their caches by catalog still find them.
 
         Arguments:
-            observer_location -- location of observation
-            time_of_measurement -- time of observation
+            satellites_list -- list of Satellite objects, or a SatelliteCatalog
+            location -- the (lat, lon) of the observer
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
 
         Returns:
-             The altitude of the satellite relative to the observer's location at the time of measurement
+            the reachable satellites, as the same type as satellites_list and in the same order
         """
 
+        if type(satellites_list) is SatelliteCatalog:
+            if self._culled_catalog is not None:
+                catalog, latitude, culled_catalog = self._culled_catalog
+
+                if catalog is satellites_list and latitude == location[0]:
+                    self.stats.count("culled", len(catalog) - len(culled_catalog))
+                    return culled_catalog
+
+            reachable = get_reachable_satellites(satellites_list.inclinations, satellites_list.eccentricities,
+                                                 satellites_list.mean_motions, location[0])
+
+            culled_catalog = satellites_list if reachable.all() else \
+                satellites_list.select(numpy.flatnonzero(reachable))
+
+            self._culled_catalog = (satellites_list, location[0], culled_catalog)
+            self.stats.count("culled", len(satellites_list) - len(culled_catalog))
+
+            return culled_catalog
+
         """ START Precondition Handling """
-        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
-        #     raise IllegalArgumentException
-        #
-        # if str(type(time_of_measurement)) != "<class 'skyfield.timelib.Time'>":
-        #     raise IllegalArgumentException
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
         """ END Precondition Handling """
 
-        location_difference = self.info - observer_location
-        location_difference = location_difference.at(time_of_measurement)
+        models = [satellite.info.model for satellite in satellites_list]
 
-        altitude, azimuth, distance = location_difference.altaz()
+        reachable = get_reachable_satellites(numpy.array([model.inclo for model in models], dtype=float),
+                                             numpy.array([model.ecco for model in models], dtype=float),
+                                             numpy.array([model.no_kozai for model in models], dtype=float),
+                                             location[0])
 
-        return altitude
+        self.stats.count("culled", int((~reachable).sum()))
 
-    def is_visible(self, position_elevation):
+        return [satellite for satellite, is_reachable in zip(satellites_list, reachable) if is_reachable]
+
+    def find_time_pruned(self, satellites_list, observer_location, start_time, n_windows, duration, sample_interval,
+                         cumulative, adaptive = False):
         """
-        Check if a satellite is visible.
+        Find the best observation window like the "loop" engine, skipping the windows that can't beat the best one.
+
+        Every window first gets an upper bound on its number of visible satellites from get_possibly_visible_windows.
+        Windows are then evaluated from the highest bound down, each only with the satellites that could be visible
+        in it, until no remaining bound can beat the best window. The result is the same as evaluating every window.
 
         Arguments:
-            position_elevation -- ?
+            adaptive -- whether the windows are sampled adaptively
+            the others are the same as find_time_vectorized, without engine
 
         Returns:
-             True if satellite is visible, False otherwise
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
         """
 
-        """ START Precondition Handling """
-        try:
-            float(position_elevation)
-        except Exception:
-            raise IllegalArgumentException
-        """ END Precondition Handling """
+        if not satellites_list:
+            return None, []
 
-        result = False
+        possibly_visible = self.get_possibly_visible_windows(satellites_list, observer_location, start_time,
+                                                             n_windows, duration)
 
-        if position_elevation > 0:
-            result = True
+        bounds = possibly_visible.sum(axis=1)
 
-        return result
+        max_interval = None
+        max_satellites_list = []
+
+        # highest bound first, and the earliest window first among equal bounds
+        for interval in sorted(range(n_windows), key=lambda window: (-bounds[window], window)):
+
+            # the windows left can't have more satellites, and an equal number only wins in an earlier window
+            if bounds[interval] < len(max_satellites_list) or bounds[interval] == 0:
+                break
+
+            if bounds[interval] == len(max_satellites_list) and interval > max_interval:
+                continue
+
+            candidates = [satellites_list[index] for index in numpy.flatnonzero(possibly_visible[interval])]
+
+            time = start_time + timedelta(minutes = interval * duration)
+
+            if cumulative:
+                _, visible_satellites = self.find_max_visible_satellites_interval_cumulative(
+                    candidates, observer_location, time, duration, sample_interval, adaptive)
+            else:
+                _, visible_satellites = self.find_max_visible_satellites_interval_non_cumulative(
+                    candidates, observer_location, time, duration, sample_interval, adaptive)
+
+            if len(visible_satellites) > len(max_satellites_list) or \
+                    (visible_satellites and len(visible_satellites) == len(max_satellites_list) and
+                     interval < max_interval):
+                max_interval = interval
+                max_satellites_list = visible_satellites
+
+        if max_interval is None:
+            return None, []
+
+        max_interval_start = start_time + timedelta(minutes = max_interval * duration)
+
+        return max_interval_start, self.satellites_list_to_satellites_name_list(max_satellites_list)
+
+    def get_possibly_visible_windows(self, satellites_list, observer_location, start_time, n_windows, duration):
+        """
+        Find the satellites that could be visible at some point of each observation window, from coarse samples.
+
+        A satellite above the horizon is less than about acos(R / r) away from the observer, as seen from the centre
+        of the Earth, where R is the observer's and r the satellite's distance from it. Between two coarse samples
+        that angle can't shrink faster than the satellite's fastest angular motion plus the Earth's rotation, so a
+        satellite is only possibly visible between two samples if that motion could bring it close enough.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows
+            duration -- the size (in minutes) of an observation window
+
+        Returns:
+            a boolean array of shape (n_windows, number of satellites), False only where the satellite is sure not to
+            be visible at any time of the window
+        """
+
+        steps_per_window = int(math.ceil(duration / PRUNE_STEP))
+        step = duration / steps_per_window
+
+        sample_times = self.get_sample_times(start_time, 1, n_windows * duration + step, step)
+
+        positions = BatchPropagator(satellites_list, self.stats).get_positions(sample_times)
+
+        observer = observer_location.itrs_xyz.km
+        distances = numpy.sqrt(numpy.einsum("...i,...i", positions, positions))
+
+        # angle between the satellite and the observer, seen from the centre of the Earth
+        angles = numpy.arccos(numpy.clip(positions.dot(observer) / (distances * numpy.linalg.norm(observer)), -1, 1))
+
+        mean_motions = numpy.array([satellite.info.model.no_kozai for satellite in satellites_list])
+        eccentricities = numpy.array([satellite.info.model.ecco for satellite in satellites_list])
+
+        # the orbit's angular speed at perigee and its apogee distance, both with some room for perturbations
+        angular_speeds = 1.1 * mean_motions * (1 + eccentricities) ** 2 / (1 - eccentricities ** 2) ** 1.5
+        apogees = numpy.maximum(get_apogee_distances(eccentricities, mean_motions), numpy.nanmax(distances, axis=1))
+
+        horizon_angles = get_horizon_angles(apogees)
+
+        # the smallest the angle could get between each pair of consecutive samples
+        closest_angles = (angles[:, :-1] + angles[:, 1:] - (angular_speeds + EARTH_ROTATION_RATE)[:, numpy.newaxis] *
+                          step) / 2
+
+        # satellites sgp4 can't propagate are kept, the fine evaluation will leave them out if they aren't visible
+        possibly_visible = ~(closest_angles >= horizon_angles[:, numpy.newaxis])
+
+        possibly_visible = possibly_visible[:, :n_windows * steps_per_window]
+
+        return possibly_visible.reshape(len(satellites_list), n_windows, steps_per_window).any(axis=2).T
+
+    def find_time_vectorized(self, satellites_list, observer_location, start_time, n_windows, duration,
+                             sample_interval, cumulative, engine = "vectorized", visibility = "geometric"):
+        """
+        Find the best observation window by propagating every satellite once over all the sample times.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows to check
+            duration -- the size (in minutes) of an observation window
+            sample_interval -- the interval (in minutes) at which the visible satellites are checked
+            cumulative -- whether the windows are compared by their cumulative number of visible satellites
+            engine -- "vectorized" or "batched", see get_elevation_matrix, "ephemeris" to use an EphemerisStore or
+                      "index" to use a VisibilityIndex
+            visibility -- one of VISIBILITY_MODELS, "optical" being worked out the same way for both of the
+                          "vectorized" and "batched" engines
+
+        Returns:
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
+        """
+
+        if not satellites_list:
+            return None, []
+
+        if visibility == "optical":
+            sample_times = self.get_sample_times(start_time, n_windows, duration, sample_interval)
+
+            elevations = self.get_optical_visibility_matrix(satellites_list, observer_location, sample_times)
+        elif engine == "ephemeris":
+            elevations = self.get_elevation_matrix_from_ephemeris(satellites_list, observer_location, start_time,
+                                                                  n_windows, duration, sample_interval)
+        elif engine == "index":
+            elevations = self.get_visibility_matrix_from_index(satellites_list, observer_location, start_time,
+                                                               n_windows, duration, sample_interval)
+        elif engine == "batched":
+            elevations = self.get_visibility_matrix_sliding(satellites_list, observer_location, start_time,
+                                                            n_windows, duration, sample_interval)
+        else:
+            sample_times = self.get_sample_times(start_time, n_windows, duration, sample_interval)
+
+            elevations = self.get_elevation_matrix(satellites_list, observer_location, sample_times, engine)
+
+        with self.stats.stage("aggregation"):
+            counts, visible_satellites = self.find_max_visible_satellites_windows(elevations, n_windows, cumulative)
+
+            return self.get_max_window(satellites_list, start_time, duration, counts, visible_satellites)
+
+    def find_time_chunked(self, satellites_list, observer_location, start_time, n_windows, duration, sample_interval,
+                          cumulative, memory_budget):
+        """
+        Find the best observation window like the "batched" engine, holding no more than memory_budget bytes at once.
+
+        The satellites and sample times are split into chunks that fit in the budget, next to the results kept for
+        every window and sample time. The sample times of each chunk are only made for it, and each chunk is
+        propagated, turned into booleans straight away and added to
+        the number of satellites visible at every sample time and, if cumulative, to the satellites seen in every
+        window. Without cumulative, the satellites of the best sample time of every window are then found by
+        propagating those sample times again. The result is the same as evaluating everything at once.
+
+        Arguments:
+            satellites_list -- a SatelliteCatalog
+            memory_budget -- the most bytes to hold at once
+            the others are the same as find_time_vectorized, without engine
+
+        Raises:
+            IllegalArgumentException -- if memory_budget can't hold the results and one satellite at one sample time
+
+        Returns:
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
+        """
+
+        if not satellites_list:
+            return None, []
+
+        number_of_satellites = len(satellites_list)
+        number_of_sub_intervals = duration // sample_interval
+        number_of_samples = n_windows * number_of_sub_intervals
+
+        # the satellites of every window and the count of every sample time
+        available_bytes = memory_budget - n_windows * number_of_satellites - 8 * number_of_samples
+
+        satellites_chunk = min(number_of_satellites, available_bytes // (CHUNK_CELL_BYTES + CHUNK_SAMPLE_BYTES))
+
+        """ START Precondition Handling """
+        if satellites_chunk < 1:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        samples_chunk = available_bytes // (satellites_chunk * CHUNK_CELL_BYTES + CHUNK_SAMPLE_BYTES)
+
+        propagators = []
+
+        for first_satellite in range(0, number_of_satellites, satellites_chunk):
+            chunk = satellites_list if satellites_chunk == number_of_satellites else \
+                satellites_list.select(numpy.arange(first_satellite,
+                                                    min(first_satellite + satellites_chunk, number_of_satellites)))
+
+            propagators.append((first_satellite, BatchPropagator(chunk, self.stats)))
+
+        visible_satellites = numpy.zeros((n_windows, number_of_satellites), dtype=bool)
+        sample_counts = numpy.zeros(number_of_samples, dtype=int)
+
+        def get_julian_dates_of(samples):
+            # minutes from start_time of the samples, the same times as get_sample_times
+            offsets = samples // number_of_sub_intervals * duration + samples % number_of_sub_intervals * \
+                sample_interval
+
+            sample_times = self.get_utc_time(start_time.year, start_time.month, start_time.day, start_time.hour,
+                                             start_time.minute + offsets,
+                                             start_time.second + start_time.microsecond / 1e6)
+
+            return [numpy.atleast_1d(dates) for dates in get_julian_dates(sample_times)]
+
+        def get_visibility(propagator, julian_dates):
+            positions = propagator.get_positions_from_julian_dates(*julian_dates)
+
+            self.stats.count("chunks")
+
+            with self.stats.stage("altaz"):
+                return get_topocentric_elevations(positions, observer_location) > 0
+
+        for first_sample in range(0, number_of_samples, samples_chunk):
+            samples = numpy.arange(first_sample, min(first_sample + samples_chunk, number_of_samples))
+            windows = samples // number_of_sub_intervals
+
+            julian_dates = get_julian_dates_of(samples)
+
+            for first_satellite, propagator in propagators:
+                visibility = get_visibility(propagator, julian_dates)
+
+                with self.stats.stage("aggregation"):
+                    sample_counts[samples] += visibility.sum(axis=0)
+
+                    if cumulative:
+                        satellites = slice(first_satellite, first_satellite + visibility.shape[0])
+
+                        for window in range(windows[0], windows[-1] + 1):
+                            visible_satellites[window, satellites] |= visibility[:, windows == window].any(axis=1)
+
+        if not cumulative:
+            # the earliest sample with the most visible satellites of every window, like find_time_vectorized
+            best_samples = numpy.arange(n_windows) * number_of_sub_intervals + \
+                sample_counts.reshape(n_windows, number_of_sub_intervals).argmax(axis=1)
+
+            for first_window in range(0, n_windows, samples_chunk):
+                windows = numpy.arange(first_window, min(first_window + samples_chunk, n_windows))
+
+                julian_dates = get_julian_dates_of(best_samples[windows])
+
+                for first_satellite, propagator in propagators:
+                    visibility = get_visibility(propagator, julian_dates)
+
+                    visible_satellites[windows, first_satellite:first_satellite + visibility.shape[0]] = visibility.T
+
+        with self.stats.stage("aggregation"):
+            return self.get_max_window(satellites_list, start_time, duration, visible_satellites.sum(axis=1),
+                                       visible_satellites)
+
+    def find_time_events(self, satellites_list, observer_location, start_time, n_windows, duration, sample_interval,
+                         cumulative):
+        """
+        Find the best observation window from the rise and set times of every satellite.
+
+        Windows are compared by the satellites visible at any time of the window (if cumulative) or at the same time
+        at any point of the window (if not), not only at the sample times, so short passes between samples aren't
+        missed and sample_interval isn't used.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows to check
+            duration -- the size (in minutes) of an observation window
+            sample_interval -- unused, kept for the same arguments as the other engines
+            cumulative -- whether the windows are compared by their cumulative number of visible satellites
+
+        Returns:
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
+        """
+
+        if not satellites_list:
+            return None, []
+
+        intervals = self.get_visibility_intervals(satellites_list, observer_location, start_time,
+                                                  n_windows * duration)
+
+        with self.stats.stage("aggregation"):
+            if cumulative:
+                window_starts = numpy.arange(n_windows) * duration
+
+                visible = numpy.zeros((len(satellites_list), n_windows), dtype=bool)
+
+                for index, satellite_intervals in enumerate(intervals):
+                    for rise_time, set_time in satellite_intervals:
+                        visible[index] |= (rise_time < window_starts + duration) & (set_time > window_starts)
+
+                counts, visible_satellites = self.find_max_visible_satellites_windows(visible, n_windows, cumulative)
+            else:
+                counts, visible_satellites = self.find_max_concurrent_satellites_windows(intervals, n_windows,
+                                                                                         duration)
+
+            return self.get_max_window(satellites_list, start_time, duration, counts, visible_satellites)
+
+    def find_max_concurrent_satellites_windows(self, intervals, n_windows, duration):
+        """
+        Find the most satellites visible at the same time in every observation window, in one sweep over the rise and
+        set times of all the visibility intervals.
+
+        Arguments:
+            intervals -- list of arrays of (rise, set) times in minutes, one array for each satellite, as returned by
+                         get_visibility_intervals
+            n_windows -- the number of observation windows
+            duration -- the size (in minutes) of an observation window
+
+        Returns:
+            (counts, visible_satellites) where
+                counts -- array of the most satellites visible at the same time in each window
+                visible_satellites -- boolean array of shape (n_windows, number of satellites) marking the
+                                      satellites visible together at the earliest such time of each window
+        """
+
+        # sets sort before rises at the same time as a satellite isn't visible any more at its set time
+        events = []
+
+        for index, satellite_intervals in enumerate(intervals):
+            for rise_time, set_time in satellite_intervals:
+                # an empty interval would sort its set before its rise and leave the satellite visible
+                if set_time <= rise_time:
+                    continue
+
+                events.append((rise_time, 1, index))
+                events.append((set_time, 0, index))
+
+        events.sort()
+
+        counts = numpy.zeros(n_windows, dtype=int)
+        visible_satellites = numpy.zeros((n_windows, len(intervals)), dtype=bool)
+
+        visible_now = set()
+        window = 0
+
+        for event_time, is_rise, index in events:
+            # a set exactly at the end of a window still belongs to that window
+            if is_rise:
+                event_window = int(event_time // duration)
+            else:
+                event_window = int(math.ceil(event_time / duration)) - 1
+
+            event_window = min(max(event_window, 0), n_windows - 1)
+
+            # satellites still visible when a window starts are visible together in that window too
+            while window < event_window:
+                window += 1
+
+                if len(visible_now) > counts[window]:
+                    counts[window] = len(visible_now)
+                    visible_satellites[window, list(visible_now)] = True
+
+            if is_rise:
+                visible_now.add(index)
+
+                if len(visible_now) > counts[window]:
+                    counts[window] = len(visible_now)
+                    visible_satellites[window] = False
+                    visible_satellites[window, list(visible_now)] = True
+            else:
+                visible_now.discard(index)
+
+        return counts, visible_satellites
+
+    def find_time_parallel(self, satellites_list, location, start_time, n_windows, duration, sample_interval,
+                           cumulative, workers):
+        """
+        Find the best observation window like the "batched" engine, with the propagation shared between processes.
+
+        Arguments:
+            satellites_list -- list of possible satellites, or a SatelliteCatalog
+            location -- a tuple (lat, lon) of the observer, as the location argument of find_time
+            workers -- the number of processes to propagate in
+            the others are the same as find_time_vectorized
+
+        Returns:
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
+        """
+
+        if not satellites_list:
+            return None, []
+
+        sample_times = self.get_sample_times(start_time, n_windows, duration, sample_interval)
+
+        # the processes work out the elevations too, which is timed as propagation
+        with self.stats.stage("propagation"):
+            elevations = self.get_elevation_matrix_parallel(satellites_list, location, sample_times, workers)
+
+        self.stats.count("propagations")
+
+        # windows are only compared here, so ties go to the earliest window exactly as in the serial engines
+        with self.stats.stage("aggregation"):
+            counts, visible_satellites = self.find_max_visible_satellites_windows(elevations, n_windows, cumulative)
+
+            return self.get_max_window(satellites_list, start_time, duration, counts, visible_satellites)
+
+    def get_elevation_matrix_parallel(self, satellites_list, location, sample_times, workers):
+        """
+        Get the elevation of every satellite at every sample time, like the "batched" engine of get_elevation_matrix,
+        with chunks of satellites propagated by a pool of processes.
+
+        The processes get the satellites' elements and the sample times once when they start, and write their
+        elevations straight into a shared array, so nothing large is pickled for each chunk.
+
+        Arguments:
+            satellites_list -- list of possible satellites, or a SatelliteCatalog
+            location -- a tuple (lat, lon) of the observer, as the location argument of find_time
+            sample_times -- a skyfield Time array
+            workers -- the number of processes
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+
+        Returns:
+            an array of shape (number of satellites, number of sample times) of elevations in degrees
+        """
+
+        """ START Precondition Handling """
+        catalog = to_satellite_catalog(satellites_list)
+        """ END Precondition Handling """
+
+        shape = (len(catalog), len(sample_times))
+
+        elevations_buffer = multiprocessing.RawArray("d", shape[0] * shape[1])
+
+        tle_lines = catalog.get_tle_lines()
+
+        julian_dates = get_julian_dates(sample_times)
+
+        # a few chunks for each process so that a slow chunk doesn't hold the others up
+        chunk_size = max(1, int(math.ceil(shape[0] / (workers * 4))))
+        chunks = [(start, min(start + chunk_size, shape[0])) for start in range(0, shape[0], chunk_size)]
+
+        pool = multiprocessing.Pool(workers, initializer=start_elevation_worker,
+                                    initargs=(tle_lines, julian_dates, location, elevations_buffer, shape))
+
+        try:
+            pool.map(compute_elevation_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+
+        return numpy.frombuffer(elevations_buffer).reshape(shape)
+
+    def get_max_window(self, satellites_list, start_time, duration, counts, visible_satellites):
+        """
+        Pick the observation window with the most visible satellites.
+
+        Arguments:
+            satellites_list -- list of possible satellites, or a SatelliteCatalog
+            start_time -- start time of the first observation window
+            duration -- the size (in minutes) of an observation window
+            counts -- array of the number of visible satellites of each window
+            visible_satellites -- boolean array of shape (number of windows, number of satellites) marking the
+                                  satellites counted in each window
+
+        Returns:
+            a tuple (interval_start_time, satellite_name_list), the same as find_time
+        """
+
+        # argmax picks the earliest window on ties, like the strict comparison in the loop engine
+        max_interval = int(numpy.argmax(counts))
+
+        if counts[max_interval] == 0:
+            return None, []
+
+        max_interval_start = start_time + timedelta(minutes = max_interval * duration)
+
+        max_satellites = numpy.flatnonzero(visible_satellites[max_interval])
+
+        # a catalog looks the names up straight from the indices
+        if type(satellites_list) is SatelliteCatalog:
+            return max_interval_start, satellites_list.get_names(max_satellites)
+
+        max_satellites_list = [satellites_list[index] for index in max_satellites]
+
+        return max_interval_start, self.satellites_list_to_satellites_name_list(max_satellites_list)
+
+    def get_visibility_intervals(self, satellites_list, observer_location, start_time, horizon):
+        """
+        Get the intervals in which every satellite is visible.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of the search
+            horizon -- the length (in minutes) of the search
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+
+        Returns:
+            a list with an array of shape (number of intervals, 2) for each satellite, holding the (rise, set) of
+            each interval in minutes since start_time, sorted and clipped to [0, horizon], without empty intervals
+        """
+
+        """ START Precondition Handling """
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        search_start = self.get_utc_time(start_time)
+        search_end = self.get_utc_time(start_time + timedelta(minutes = horizon))
+
+        intervals = []
+
+        with self.stats.stage("propagation"):
+            for satellite in satellites_list:
+                satellite_intervals = satellite.get_visibility_intervals(observer_location, search_start, search_end)
+                satellite_intervals = (satellite_intervals - search_start.tt) * 24 * 60
+
+                intervals.append(satellite_intervals[satellite_intervals[:, 1] > satellite_intervals[:, 0]])
+
+        self.stats.count("propagations", len(satellites_list))
+
+        return intervals
+
+    def get_utc_time(self, *date):
+        """
+        Build a skyfield Time from a UTC date with the Scheduler's timescale, counted by the stats.
+
+        Arguments:
+            date -- the arguments of the timescale's utc method
+
+        Returns:
+            a skyfield Time
+        """
+
+        self.stats.count("utc_calls")
+
+        with self.stats.stage("timescale"):
+            return self.ts.utc(*date)
+
+    def get_sample_times(self, start_time, n_windows, duration, sample_interval):
+        """
+        Get every sample time of every observation window as a single Time array.
+
+        Arguments:
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows
+            duration -- the size (in minutes) of an observation window
+            sample_interval -- the interval (in minutes) between samples within a window
+
+        Raises:
+            IllegalArgumentException -- if any of the arguments is not positive
+
+        Returns:
+            a skyfield Time array of n_windows * (duration // sample_interval) times, window by window
+        """
+
+        """ START Precondition Handling """
+        if n_windows <= 0 or duration <= 0:
+            raise IllegalArgumentException
+
+        if sample_interval <= 0 or sample_interval > duration:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        offsets = get_sample_offsets(n_windows, duration, sample_interval)
+
+        return self.get_utc_time(start_time.year, start_time.month, start_time.day, start_time.hour,
+                                 start_time.minute + offsets, start_time.second + start_time.microsecond / 1e6)
+
+    def get_elevation_matrix(self, satellites_list, observer_location, sample_times, engine = "vectorized"):
+        """
+        Get the elevation of every satellite at every sample time.
+
+        Arguments:
+            satellites_list -- list of possible satellites, or a SatelliteCatalog
+            observer_location -- location of observer
+            sample_times -- a skyfield Time array
+            engine -- "vectorized" to propagate each satellite with skyfield, or "batched" to propagate the whole
+                      catalog in one call with a BatchPropagator
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite, or a
+                                        SatelliteCatalog is given to the "vectorized" engine
+
+        Returns:
+            an array of shape (number of satellites, number of sample times) of elevations in degrees
+        """
+
+        """ START Precondition Handling """
+        if type(satellites_list) is SatelliteCatalog:
+            if engine != "batched":
+                raise IllegalArgumentException
+        else:
+            for satellite in satellites_list:
+                if type(satellite) is not Satellite:
+                    raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        if engine == "batched":
+            return BatchPropagator(satellites_list, self.stats).get_elevations(observer_location, sample_times)
+
+        elevations = numpy.empty((len(satellites_list), len(sample_times)))
+
+        # one propagation per satellite over every sample time at once
+        with self.stats.stage("propagation"):
+            for index, satellite in enumerate(satellites_list):
+                elevations[index] = satellite.get_altitude(observer_location, sample_times).degrees
+
+        self.stats.count("propagations", len(satellites_list))
+
+        return elevations
+
+    def get_optical_visibility_matrix(self, satellites_list, observer_location, sample_times):
+        """
+        Get which satellites can be seen with the eye at every sample time: above the horizon, lit by the Sun, and
+        seen by an observer in darkness.
+
+        The Sun's position is worked out once for every sample time and shared by every satellite. Samples where the
+        observer is in daylight or twilight can't see any satellite, so they are left out before anything is
+        propagated, and the catalog is only propagated over the dark samples.
+
+        Arguments:
+            satellites_list -- list of possible satellites, or a SatelliteCatalog
+            observer_location -- location of observer
+            sample_times -- a skyfield Time array
+
+        Returns:
+            a boolean array of shape (number of satellites, number of sample times) marking the visible satellites
+        """
+
+        jd, fraction, ut1_fraction = get_julian_dates(sample_times)
+
+        jd = numpy.atleast_1d(jd)
+        fraction = numpy.atleast_1d(fraction)
+        ut1_fraction = numpy.atleast_1d(ut1_fraction)
+
+        visibility = numpy.zeros((len(satellites_list), len(jd)), dtype=bool)
+
+        with self.stats.stage("altaz"):
+            sun_positions = get_sun_positions(jd, fraction, ut1_fraction)
+
+            dark = get_topocentric_elevations(sun_positions, observer_location) < DARKNESS_SUN_ALTITUDE
+
+        self.stats.count("dark_samples", int(dark.sum()))
+
+        if not dark.any() or not len(satellites_list):
+            return visibility
+
+        propagator = BatchPropagator(satellites_list, self.stats)
+
+        positions = propagator.get_positions_from_julian_dates(jd[dark], fraction[dark], ut1_fraction[dark])
+
+        with self.stats.stage("altaz"):
+            visibility[:, dark] = (get_topocentric_elevations(positions, observer_location) > 0) & \
+                is_sunlit(positions, sun_positions[dark])
+
+        return visibility
+
+    def get_elevation_matrix_from_ephemeris(self, satellites_list, observer_location, start_time, n_windows, duration,
+                                            sample_interval):
+        """
+        Get the elevation of every satellite at every sample time from the positions kept in the EphemerisStore.
+
+        The positions are stored for a regular grid with a step of the greatest common divisor of duration and
+        sample_interval, so the same stored grid serves any observer location.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of the first observation window
+            n_windows -- the number of observation windows
+            duration -- the size (in minutes) of an observation window
+            sample_interval -- the interval (in minutes) between samples within a window
+
+        Returns:
+            an array of shape (number of satellites, number of sample times) of elevations in degrees, the same as
+            get_elevation_matrix for the times of get_sample_times
+        """
+
+        step = math.gcd(duration, sample_interval)
+
+        positions = self.get_ephemeris_store().get_positions(satellites_list, self, start_time, step,
+                                                             n_windows * duration // step)
+
+        number_of_sub_intervals = duration // sample_interval
+
+        if step != sample_interval or number_of_sub_intervals * sample_interval != duration:
+            positions = positions[:, get_sample_offsets(n_windows, duration, sample_interval) // step]
+
+        return get_topocentric_elevations(positions, observer_location)
+
+    def get_visibility_matrix_from_index(self, satellites_list, observer_location, start_time, n_windows, duration,
+                                         sample_interval):
+        """
+        Get which satellites are visible at every sample time from the VisibilityIndex of the observer.
+
+        The index is kept for a regular grid with a step of the greatest common divisor of duration and
+        sample_interval, so queries with other numbers of windows or durations on the same grid share it.
+
+        Arguments:
+            the same as get_elevation_matrix_from_ephemeris
+
+        Returns:
+            a boolean array of shape (number of satellites, number of sample times) marking the visible satellites,
+            for the times of get_sample_times
+        """
+
+        step = math.gcd(duration, sample_interval)
+
+        visibility = self.get_visibility_index().get_visibility(satellites_list, observer_location, self, start_time,
+                                                                step, n_windows * duration // step)
+
+        return unpack_visibility(visibility, get_sample_offsets(n_windows, duration, sample_interval) // step)
+
+    def get_visibility_matrix_sliding(self, satellites_list, observer_location, start_time, n_windows, duration,
+                                      sample_interval):
+        """
+        Get which satellites are visible at every sample time like the "batched" engine of get_elevation_matrix,
+        reusing the grid of the last call.
+
+        The grid has a step of the greatest common divisor of duration and sample_interval. When the last grid is
+        for the same satellites, observer and step, and start_time is a whole number of steps into it, the samples
+        before start_time are dropped, the rest are kept and only the samples past its end are propagated. Rolling
+        queries with start_time moved forward a little only propagate their new tail.
+
+        Arguments:
+            the same as get_elevation_matrix_from_ephemeris
+
+        Returns:
+            a boolean array of shape (number of satellites, number of sample times) marking the visible satellites,
+            for the times of get_sample_times
+        """
+
+        step = math.gcd(duration, sample_interval)
+        count = n_windows * duration // step
+
+        key = (to_satellite_catalog(satellites_list).get_digest(), observer_location.latitude.degrees,
+               observer_location.longitude.degrees, observer_location.elevation.m, step)
+
+        visibility = numpy.zeros((len(satellites_list), 0), dtype=bool)
+
+        if self._sliding_grid is not None:
+            grid_key, grid_start, grid_visibility = self._sliding_grid
+
+            shift, remainder = divmod(start_time - grid_start, timedelta(minutes = step))
+
+            if grid_key == key and not remainder and 0 <= shift < grid_visibility.shape[1]:
+                # copied so that the samples before start_time are freed with the old grid
+                visibility = grid_visibility[:, shift:].copy()
+
+        if visibility.shape[1] < count:
+            tail_start = start_time + timedelta(minutes = visibility.shape[1] * step)
+            tail_count = count - visibility.shape[1]
+
+            sample_times = self.get_sample_times(tail_start, 1, tail_count * step, step)
+
+            tail = BatchPropagator(satellites_list, self.stats).get_elevations(observer_location, sample_times) > 0
+
+            visibility = numpy.concatenate((visibility, tail), axis=1)
+
+        self._sliding_grid = (key, start_time, visibility)
+
+        return visibility[:, get_sample_offsets(n_windows, duration, sample_interval) // step]
+
+    def get_visibility_index(self):
+        """
+        Get the VisibilityIndex kept next to the downloaded satellite lists.
+
+        Returns:
+            a VisibilityIndex
+        """
+
+        return VisibilityIndex(os.path.join(self._skyload.directory, "visibility"))
+
+    def get_ephemeris_store(self):
+        """
+        Get the EphemerisStore kept next to the downloaded satellite lists.
+
+        Returns:
+            an EphemerisStore
+        """
+
+        return EphemerisStore(os.path.join(self._skyload.directory, "ephemeris"))
+
+    def find_max_visible_satellites_windows(self, elevations, n_windows, cumulative):
+        """
+        Find the visible satellites of every observation window from an elevation matrix.
+
+        Arguments:
+            elevations -- array of shape (number of satellites, number of sample times) as returned by
+                          get_elevation_matrix, with the sample times grouped window by window, or a boolean array
+                          of the same shape already marking the visible satellites
+            n_windows -- the number of observation windows the sample times are split into
+            cumulative -- whether to count every satellite visible at some point of a window (if True), or only
+                          the satellites visible at the sample with the most visible satellites (if False)
+
+        Raises:
+            IllegalArgumentException -- if the sample times can't be split evenly into n_windows
+
+        Returns:
+            (counts, visible_satellites) where
+                counts -- array of the number of visible satellites of each window
+                visible_satellites -- boolean array of shape (n_windows, number of satellites) marking the
+                                      satellites counted in each window
+        """
+
+        """ START Precondition Handling """
+        if n_windows <= 0 or elevations.shape[1] % n_windows != 0:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        number_of_satellites = elevations.shape[0]
+
+        if elevations.dtype != bool:
+            elevations = elevations > 0
+
+        visible = elevations.reshape(number_of_satellites, n_windows, -1)
+
+        if cumulative:
+            visible_satellites = visible.any(axis=2).T
+        else:
+            # the earliest sample with the most visible satellites, like the strict comparison in the loop engine
+            max_sub_intervals = visible.sum(axis=0).argmax(axis=1)
+            visible_satellites = visible[:, numpy.arange(n_windows), max_sub_intervals].T
+
+        return visible_satellites.sum(axis=1), visible_satellites
+
+    def satellites_list_to_satellites_name_list(self, satellites_list):
+        """
+        Convert a satellite list to a list of satellite names.
+
+        Arguments:
+            satellites_list -- list of satellites, or a SatelliteCatalog
+
+        Returns:
+            a list of just the satellite names
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+        """
+
+        # a catalog's satellites were checked when it was created
+        if type(satellites_list) is SatelliteCatalog:
+            return satellites_list.names.tolist()
+
+        satellites_name_list = []
+
+        """ START Precondition Handling """
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        for satellite in satellites_list:
+            satellites_name_list.append(satellite.name)
+
+        return satellites_name_list
+
+    def get_all_satellites(self, satellite_list_url = "http://celestrak.com/NORAD/elements/visual.txt"):
+        """
+        Get a dictionary of all satellite information from a specified URL.
+
+        Satellite lists are kept in memory by this Scheduler and downloads are cached on disk, both for up to
+        tle_max_age days, so repeating a query doesn't download or parse the list again.
+
+        Arguments:
+            satellite_list_url -- URL to retrieve information from (defaults to Celestrak NORAD), or a list of URLs
+                                  downloaded at the same time and merged into one list by NORAD catalog number
+
+        Raises:
+            IllegalArgumentException -- if the provided URL is invalid, or isn't cached while offline
+
+        Returns:
+            a dictionary of all available satellites, using a satellites name as the key
+        """
+
+        """ START Precondition Handling """
+        # the lists are kept in a dictionary, so a URL that can't be a key of one can't be a satellite list either
+        try:
+            cache_key = get_satellite_list_key(satellite_list_url)
+            hash(cache_key)
+        except TypeError:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        if cache_key in self._satellites_cache:
+            loaded_at, satellites_list = self._satellites_cache[cache_key]
+
+            if self.offline or time.time() - loaded_at < self.tle_max_age * 86400:
+                return satellites_list
+
+        """ START Precondition Handling """
+        try:
+            tle_paths = self.get_tle_paths(get_satellite_list_urls(satellite_list_url))
+
+            with self.stats.stage("parse"):
+                sources = [skyfield_api.load.tle(tle_path) for tle_path in tle_paths]
+        except Exception:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        satellites_lists = []
+
+        for satellites in sources:
+
+            satellites_dict = {}
+
+            for satellite in satellites:
+
+                satellite_name = satellites[satellite].name
+                satellite_info = satellites[satellite_name]
+
+                current_satellite = Satellite(satellite_name, satellite_info)
+
+                satellites_dict[satellite_name] = current_satellite
+
+            satellites_list = []
+
+            for satellite in satellites_dict:
+                satellites_list.append(satellites_dict[satellite])
+
+            satellites_lists.append(satellites_list)
+
+        if type(satellite_list_url) is not list and type(satellite_list_url) is not tuple:
+            satellites_list = satellites_lists[0]
+        else:
+            satellites_list = merge_by_norad_id([[(satellite.info.model.satnum,
+                                                   satellite.info.model.jdsatepoch + satellite.info.model.jdsatepochF,
+                                                   satellite) for satellite in satellites_list]
+                                                 for satellites_list in satellites_lists])
+
+        self._satellites_cache[cache_key] = (time.time(), satellites_list)
+
+        return satellites_list
+
+    def get_satellite_catalog(self, satellite_list_url = "http://celestrak.com/NORAD/elements/visual.txt"):
+        """
+        Get the satellites of get_all_satellites as a SatelliteCatalog, read straight from the satellite list without
+        building a skyfield EarthSatellite for every satellite. Catalogs are kept in memory like satellite lists.
+
+        Arguments:
+            satellite_list_url -- URL to retrieve information from (defaults to Celestrak NORAD), or a list of URLs,
+                                  the same as get_all_satellites
+
+        Raises:
+            IllegalArgumentException -- if the provided URL is invalid, or isn't cached while offline
+
+        Returns:
+            a SatelliteCatalog of the satellites unique by name, in the same order as get_all_satellites
+        """
+
+        """ START Precondition Handling """
+        # the lists are kept in a dictionary, so a URL that can't be a key of one can't be a satellite list either
+        try:
+            cache_key = get_satellite_list_key(satellite_list_url)
+            hash(cache_key)
+        except TypeError:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        if cache_key in self._catalogs_cache:
+            loaded_at, catalog = self._catalogs_cache[cache_key]
+
+            if self.offline or time.time() - loaded_at < self.tle_max_age * 86400:
+                return catalog
+
+        """ START Precondition Handling """
+        try:
+            tle_paths = self.get_tle_paths(get_satellite_list_urls(satellite_list_url))
+
+            sources = []
+
+            for tle_path in tle_paths:
+                with self.stats.stage("parse"), open(tle_path, "rb") as tle_file:
+                    sources.append(list(read_tle_lines(tle_file)))
+        except Exception:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        satellites_lists = []
+
+        with self.stats.stage("parse"):
+            for tle_lines in sources:
+
+                # a name keeps the place it first appears at, with the last elements given for it
+                satellites_dict = {}
+
+                for name, line1, line2 in tle_lines:
+                    satellites_dict[name] = (line1, line2)
+
+                satellites_lists.append([(name, sgp4_api.Satrec.twoline2rv(line1, line2))
+                                         for name, (line1, line2) in satellites_dict.items()])
+
+            if type(satellite_list_url) is not list and type(satellite_list_url) is not tuple:
+                satellites_list = satellites_lists[0]
+            else:
+                satellites_list = merge_by_norad_id([[(satrec.satnum, satrec.jdsatepoch + satrec.jdsatepochF,
+                                                       (name, satrec)) for name, satrec in satellites_list]
+                                                     for satellites_list in satellites_lists])
+
+            catalog = SatelliteCatalog([name for name, _ in satellites_list],
+                                       [satrec for _, satrec in satellites_list])
+
+        self._catalogs_cache[cache_key] = (time.time(), catalog)
+
+        return catalog
+
+    def get_tle_paths(self, satellite_list_urls):
+        """
+        Get local copies of satellite lists, like get_tle_path, downloading the ones that need it at the same time.
+
+        Arguments:
+            satellite_list_urls -- list of URLs of satellite lists
+
+        Raises:
+            IllegalArgumentException -- if a satellite list isn't cached while offline, or can't be downloaded
+
+        Returns:
+            a list of the paths of the cached satellite lists, in the same order
+        """
+
+        if len(satellite_list_urls) < 2:
+            return [self.get_tle_path(satellite_list_url) for satellite_list_url in satellite_list_urls]
+
+        with futures.ThreadPoolExecutor(max_workers=min(len(satellite_list_urls), MAX_DOWNLOADS)) as executor:
+            return list(executor.map(self.get_tle_path, satellite_list_urls))
+
+    def get_tle_path(self, satellite_list_url):
+        """
+        Get a local copy of a satellite list, downloading it if the cached copy is missing or too old.
+
+        Lists served over HTTP are downloaded through keep-alive connections kept by this Scheduler, so downloading
+        lists from the same server again doesn't connect to it again.
+
+        Arguments:
+            satellite_list_url -- URL of the satellite list, a string that isn't a URL being taken as a local path
+                                  and returned as it is
+
+        Raises:
+            IllegalArgumentException -- if satellite_list_url isn't a string, or the satellite list isn't cached
+                                        while offline, or can't be downloaded
+
+        Returns:
+            the path of the cached satellite list
+        """
+
+        """ START Precondition Handling """
+        # anything else, such as an int taken by open as a file descriptor, isn't a satellite list
+        if type(satellite_list_url) is not str:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        if "://" not in satellite_list_url:
+            return satellite_list_url
+
+        # cached files are keyed by URL as different lists are often named the same
+        filename = "tle-{}.txt".format(hashlib.sha1(satellite_list_url.encode("utf-8")).hexdigest()[:16])
+
+        if self._skyload.exists(filename):
+            if self.offline or self._skyload.days_old(filename) < self.tle_max_age:
+                return self._skyload.path_to(filename)
+
+        if self.offline:
+            raise IllegalArgumentException
+
+        if urllib_parse.urlsplit(satellite_list_url).scheme not in ("http", "https"):
+            with self.stats.stage("download"):
+                return self._skyload.download(satellite_list_url, filename=filename)
+
+        with self.stats.stage("download"):
+            satellite_list = self._connections.get(satellite_list_url)
+
+        path = self._skyload.path_to(filename)
+
+        write_file_atomically(path, lambda tle_file: tle_file.write(satellite_list))
+
+        return path
+
+    def find_visible_satellites_instance(self, satellites_list, observer_location, time_of_measurement):
+        """
+        Get all visible satellites from a specified location and time.
+
+        Arguments:
+            satellites_list -- dictionary of possible satellites, or a SatelliteCatalog
+            observer_location -- location of observer
+            time_of_measurement -- time of observation
+
+        Raises:
+            IllegalArgumentException -- if observer_location is not of class skyfield.toposlib.Topos
+
+        Returns:
+            a list of all visible satellites from observer_location at time_of_measurement from satellites_list, or
+            an array of the indices of the visible satellites if satellites_list is a SatelliteCatalog
+        """
+
+        # a catalog's satellites were checked when it was created, and are all propagated together
+        if type(satellites_list) is SatelliteCatalog:
+            julian_dates = [numpy.atleast_1d(part) for part in get_julian_dates(time_of_measurement)]
+
+            positions = BatchPropagator(satellites_list, self.stats).get_positions_from_julian_dates(*julian_dates)
+
+            with self.stats.stage("altaz"):
+                return numpy.flatnonzero(get_topocentric_elevations(positions[:, 0], observer_location) > 0)
+
+        """ START Precondition Handling """
+        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
+        #     raise IllegalArgumentException
+        #
+        # if str(type(time_of_measurement)) != "<class 'skyfield.timelib.Time'>":
+        #     raise IllegalArgumentException
+
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        # if the satellites list is empty then we return an empty array
+        visible_satellites = []
+
+        for satellite in satellites_list:
+
+            with self.stats.stage("propagation"):
+                satellite_altitude = satellite.get_altitude(observer_location, time_of_measurement)
+
+            self.stats.count("propagations")
+            satellite_elevation = satellite_altitude.degrees
+
+            if satellite.is_visible(satellite_elevation):
+                visible_satellites.append(satellite)
+
+        return visible_satellites
+
+    def find_max_visible_satellites_interval_non_cumulative(self, satellites_list, observer_location, start_time,
+                                                            interval_duration, sub_interval_duration, adaptive = False):
+        """
+        Finds the maximum visible satellites in a sub interval.
+
+        Arguments:
+            satellites_list -- dictionary of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of observation
+            interval_duration -- duration of total interval
+            sub_interval_duration -- duration of sub-intervals
+            adaptive -- if True, use get_adaptive_visibility rather than checking every satellite at every sub-interval
+
+        Raises:
+            IllegalArgumentException -- if any satellite in satellites_list is not a Satellite object
+
+        Returns:
+            (start_time_of_max_sub_interval, visible_satellites_max_sub_interval) where
+                start_time_of_max_sub_interval -- the time of the sub interval within the interval where there is the
+                                                  highest amount of visible satellites
+                visible_satellites_max_sub_interval -- the satellites that are visible in the sub interval where there
+                                                       is the highest amount of visible satellites
+        """
+        if not satellites_list:
+            return None, []
+
+        """ START Precondition Handling """
+        # for satellite in satellites_list:
+        #     if type(satellite) is not Satellite:
+        #         raise IllegalArgumentException
+        #
+        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
+        #     raise IllegalArgumentException
+        #
+        # if str(type(start_time)) != "<class 'datetime.datetime'>":
+        #     raise IllegalArgumentException
+
+        if type(interval_duration) is not int and type(interval_duration) is not float:
+            raise IllegalArgumentException
+
+        if type(sub_interval_duration) is not int and type(sub_interval_duration) is not float:
+            raise IllegalArgumentException
+
+        if interval_duration <= 0:
+            raise IllegalArgumentException
+
+        if sub_interval_duration <= 0 or sub_interval_duration > interval_duration:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        if adaptive:
+            visible = self.get_adaptive_visibility(satellites_list, observer_location, start_time, interval_duration,
+                                                   sub_interval_duration)
+
+            number_of_visible_satellites = visible.sum(axis=0)
+
+            max_sub_interval = int(numpy.argmax(number_of_visible_satellites))
+
+            if number_of_visible_satellites[max_sub_interval] == 0:
+                return self.get_utc_time(start_time), []
+
+            return (self.get_utc_time(start_time + timedelta(minutes=max_sub_interval * sub_interval_duration)),
+                    [satellites_list[index] for index in numpy.flatnonzero(visible[:, max_sub_interval])])
+
+        max_number_of_visible_satellites_sub_interval = 0
+
+        start_time_of_max_sub_interval = self.get_utc_time(start_time)
+
+        number_of_sub_intervals = interval_duration // sub_interval_duration
+
+        visible_satellites_max_sub_interval = []
+
+        for sub_interval in range(number_of_sub_intervals):
+
+            time_of_measurement = self.get_utc_time(start_time +
+                                                    timedelta(minutes=sub_interval * sub_interval_duration))
+
+            visible_satellites_sub_interval = self.find_visible_satellites_instance(satellites_list, observer_location,
+                                                                                    time_of_measurement)
+
+            number_of_visible_satellites_sub_interval = len(visible_satellites_sub_interval)
+
+            if max_number_of_visible_satellites_sub_interval < number_of_visible_satellites_sub_interval:
+
+                max_number_of_visible_satellites_sub_interval = number_of_visible_satellites_sub_interval
+
+                start_time_of_max_sub_interval = time_of_measurement
+
+                visible_satellites_max_sub_interval = visible_satellites_sub_interval
+
+        return start_time_of_max_sub_interval, visible_satellites_max_sub_interval
+
+    def find_max_visible_satellites_interval_cumulative(self, satellites_list, observer_location, start_time,
+                                                        interval_duration, sub_interval_duration, adaptive = False):
+        """
+        Find the cumulative visible satellites from the start_time in a period of interval_duration minutes.
+
+        Arguments:
+            satellites_list -- dictionary of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of observation
+            interval_duration -- duration of total interval
+            sub_interval_duration -- duration of sub-intervals
+            adaptive -- if True, use get_adaptive_visibility rather than checking every satellite at every sub-interval
+
+        Raises:
+            IllegalArgumentException -- if any satellite in satellites_list is not a Satellite object
+
+        Returns:
+            (start_time_interval, visible_satellites_interval) where
+                start_time_interval -- the start time of the interval and is the start_time argument itself
+                visible_satellites_interval -- all the visible satellites in that interval
+        """
+
+        if not satellites_list:
+            return None, []
+
+        """ START Precondition Handling """
+        # for satellite in satellites_list:
+        #     if type(satellite) is not Satellite:
+        #         raise IllegalArgumentException
+        #
+        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
+        #     raise IllegalArgumentException
+        #
+        # if str(type(start_time)) != "<class 'datetime.datetime'>":
+        #     raise IllegalArgumentException
+
+        if type(interval_duration) is not int and type(interval_duration) is not float:
+            raise IllegalArgumentException
+
+        if type(sub_interval_duration) is not int and type(sub_interval_duration) is not float:
+            raise IllegalArgumentException
+
+        if interval_duration <= 0:
+            raise IllegalArgumentException
+
+        if sub_interval_duration <= 0 or sub_interval_duration > interval_duration:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        start_time_interval = self.get_utc_time(start_time)
+
+        if adaptive:
+            visible = self.get_adaptive_visibility(satellites_list, observer_location, start_time, interval_duration,
+                                                   sub_interval_duration)
+
+            return start_time_interval, [satellites_list[index] for index in numpy.flatnonzero(visible.any(axis=1))]
+
+        number_of_sub_intervals = interval_duration // sub_interval_duration
+
+        visible_satellites_interval = []
+
+        for sub_interval in range(number_of_sub_intervals):
+
+            time_of_measurement = self.get_utc_time(start_time +
+                                                    timedelta(minutes=sub_interval * sub_interval_duration))
+
+            visible_satellites_sub_interval = self.find_visible_satellites_instance(satellites_list, observer_location,
+                                                                                    time_of_measurement)
+
+            # union 2 lists of Satellite objects - this seems too work but not sure 100%
+            visible_satellites_interval = list(set().union(visible_satellites_interval, visible_satellites_sub_interval))
+
+        return start_time_interval, visible_satellites_interval
+
+    def get_adaptive_visibility(self, satellites_list, observer_location, start_time, interval_duration,
+                                sub_interval_duration):
+        """
+        Find which satellites are visible at each sub-interval, only working out the elevations near the horizon.
+
+        The elevation of a satellite can't change faster than a bound set by its orbit (see get_elevation_rate_bounds),
+        so after each elevation the sampler skips every sub-interval the satellite can't reach the horizon by, and only
+        goes sub-interval by sub-interval when the satellite is near the horizon. Skipped sub-intervals keep the
+        visibility of the last elevation worked out. The result matches checking every sub-interval, unless the orbit
+        moves the satellite more than ADAPTIVE_MARGIN degrees further than its bound allows.
+
+        Arguments:
+            satellites_list -- list of possible satellites
+            observer_location -- location of observer
+            start_time -- start time of observation
+            interval_duration -- duration of total interval
+            sub_interval_duration -- duration of sub-intervals
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+
+        Returns:
+            a boolean array of shape (number of satellites, number of sub-intervals) marking the visible satellites
+        """
+
+        """ START Precondition Handling """
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        sample_times = self.get_sample_times(start_time, 1, interval_duration, sub_interval_duration)
+
+        jd, fraction, ut1_fraction = get_julian_dates(sample_times)
+
+        theta, _ = sgp4lib.theta_GMST1982(jd, ut1_fraction)
+        cos_theta = numpy.cos(theta)
+        sin_theta = numpy.sin(theta)
+
+        observer = tuple(observer_location.itrs_xyz.km)
+
+        latitude = observer_location.latitude.radians
+        longitude = observer_location.longitude.radians
+        zenith = (math.cos(latitude) * math.cos(longitude), math.cos(latitude) * math.sin(longitude),
+                  math.sin(latitude))
+
+        number_of_sub_intervals = len(sample_times)
+
+        visible = numpy.zeros((len(satellites_list), number_of_sub_intervals), dtype=bool)
+
+        # the number of times a satellite is propagated
+        evaluated = 0
+
+        with self.stats.stage("propagation"):
+            for index, satellite in enumerate(satellites_list):
+
+                satrec = satellite.info.model
+
+                below_horizon_rate, above_horizon_rate = get_elevation_rate_bounds(satrec)
+
+                sub_interval = 0
+
+                while sub_interval < number_of_sub_intervals:
+
+                    elevation = get_elevation_at(satrec, jd[sub_interval], fraction[sub_interval],
+                                                 cos_theta[sub_interval], sin_theta[sub_interval], observer, zenith)
+                    evaluated += 1
+
+                    # sgp4 couldn't propagate the satellite, it isn't visible
+                    if math.isnan(elevation):
+                        sub_interval += 1
+                        continue
+
+                    is_visible = satellite.is_visible(elevation)
+
+                    rate = above_horizon_rate if is_visible else below_horizon_rate
+
+                    # the sub-intervals after this one that the satellite can't reach the horizon by
+                    skipped = max(int((abs(elevation) - ADAPTIVE_MARGIN) / (rate * sub_interval_duration)), 0)
+
+                    visible[index, sub_interval:sub_interval + skipped + 1] = is_visible
+
+                    sub_interval += skipped + 1
+
+        self.stats.count("propagations", evaluated)
+
+        return visible
+
+
+class Satellite:
+
+    __slots__ = ("name", "info")
+
+    def __init__(self, name, info):
+        """
+        Create an instance of a Satellite.
+
+        Arguments:
+            name -- name of satellite
+            info -- telemetry information of satellite
+        """
+
+        """ START Precondition Handling """
+        # if str(type(info)) != "<class 'skyfield.sgp4lib.EarthSatellite'>":
+        #     raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        self.name = name
+        self.info = info
+
+    def get_altitude(self, observer_location, time_of_measurement):
+        """
+        Get the altitude of a Satellite.
+
+        Arguments:
+            observer_location -- location of observation
+            time_of_measurement -- time of observation
+
+        Returns:
+             The altitude of the satellite relative to the observer's location at the time of measurement
+        """
+
+        """ START Precondition Handling """
+        # if str(type(observer_location)) != "<class 'skyfield.toposlib.Topos'>":
+        #     raise IllegalArgumentException
+        #
+        # if str(type(time_of_measurement)) != "<class 'skyfield.timelib.Time'>":
+        #     raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        location_difference = self.info - observer_location
+        location_difference = location_difference.at(time_of_measurement)
+
+        altitude, azimuth, distance = location_difference.altaz()
+
+        return altitude
+
+    def get_visibility_intervals(self, observer_location, start_time, end_time):
+        """
+        Get the intervals in which a Satellite is visible, from its rise and set times.
+
+        Arguments:
+            observer_location -- location of observation
+            start_time -- start of the search
+            end_time -- end of the search
+
+        Returns:
+            an array of shape (number of intervals, 2) of the (rise, set) TT Julian dates of each interval, where an
+            interval still going on at start_time or end_time is cut off there
+        """
+
+        event_times, events = self.info.find_events(observer_location, start_time, end_time, altitude_degrees=0.0)
+
+        intervals = []
+
+        # rise time of the interval we're in, if the satellite is currently visible
+        rise = None
+
+        if self.is_visible(self.get_altitude(observer_location, start_time).degrees):
+            rise = start_time.tt
+
+        for event_time, event in zip(event_times.tt, events):
+            if event == 0:
+                rise = event_time
+            elif event == 2 and rise is not None:
+                intervals.append((rise, event_time))
+                rise = None
+
+        if rise is not None:
+            intervals.append((rise, end_time.tt))
+
+        return numpy.array(intervals).reshape(-1, 2)
+
+    def is_visible(self, position_elevation):
+        """
+        Check if a satellite is visible.
+
+        Arguments:
+            position_elevation -- ?
+
+        Returns:
+             True if satellite is visible, False otherwise
+        """
+
+        """ START Precondition Handling """
+        try:
+            float(position_elevation)
+        except Exception:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        result = False
+
+        if position_elevation > 0:
+            result = True
+
+        return result
+
+
+class SatelliteCatalog:
+    """
+    A catalog of satellites kept as columns of NumPy arrays rather than as a list of Satellite objects. Only the sgp4
+    Satrec of each satellite is kept, without a skyfield EarthSatellite around it. Satellites are referred to by their
+    row, so sets of satellites are index arrays and names are only looked up when a result is handed back.
+    """
+
+    __slots__ = ("names", "norad_ids", "epochs", "inclinations", "eccentricities", "mean_motions", "satrecs",
+                 "_satrec_array", "_digest")
+
+    def __init__(self, names, satrecs):
+        """
+        Create a SatelliteCatalog. The satellites are checked here once, so nothing taking a catalog checks them again.
+
+        Arguments:
+            names -- list of the names of the satellites
+            satrecs -- list of the sgp4 Satrec of the satellites, in the same order
+
+        Raises:
+            IllegalArgumentException -- if names and satrecs don't have the same length
+        """
+
+        """ START Precondition Handling """
+        if len(names) != len(satrecs):
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        self.names = numpy.array(names, dtype=object)
+        self.satrecs = list(satrecs)
+
+        self.norad_ids = numpy.array([satrec.satnum for satrec in self.satrecs], dtype=numpy.int64)
+        self.epochs = numpy.array([satrec.jdsatepoch + satrec.jdsatepochF for satrec in self.satrecs], dtype=float)
+        self.inclinations = numpy.array([satrec.inclo for satrec in self.satrecs], dtype=float)
+        self.eccentricities = numpy.array([satrec.ecco for satrec in self.satrecs], dtype=float)
+        self.mean_motions = numpy.array([satrec.no_kozai for satrec in self.satrecs], dtype=float)
+
+        self._satrec_array = None
+        self._digest = None
+
+    @classmethod
+    def from_satellites(cls, satellites_list):
+        """
+        Create a SatelliteCatalog from a list of satellites.
+
+        Arguments:
+            satellites_list -- list of Satellite objects whose info is a skyfield EarthSatellite
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+
+        Returns:
+            a SatelliteCatalog of the satellites, in the same order
+        """
+
+        """ START Precondition Handling """
+        for satellite in satellites_list:
+            if type(satellite) is not Satellite:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        return cls([satellite.name for satellite in satellites_list],
+                   [satellite.info.model for satellite in satellites_list])
+
+    @classmethod
+    def from_tle_lines(cls, tle_lines):
+        """
+        Create a SatelliteCatalog from TLE lines.
+
+        Arguments:
+            tle_lines -- list of (name, line 1, line 2) of every satellite
+
+        Returns:
+            a SatelliteCatalog of the satellites, in the same order
+        """
+
+        return cls([name for name, _, _ in tle_lines],
+                   [sgp4_api.Satrec.twoline2rv(line1, line2) for _, line1, line2 in tle_lines])
+
+    def __len__(self):
+        return len(self.satrecs)
+
+    def get_names(self, indices):
+        """
+        Get the names of some satellites of the catalog.
+
+        Arguments:
+            indices -- array of the rows of the satellites
+
+        Returns:
+            a list of the satellites' names
+        """
+
+        return self.names[indices].tolist()
+
+    def select(self, indices):
+        """
+        Get a catalog of some satellites of this catalog.
+
+        Arguments:
+            indices -- array of the rows of the satellites
+
+        Returns:
+            a SatelliteCatalog of the satellites, in the order of indices
+        """
+
+        return SatelliteCatalog(self.names[indices].tolist(), [self.satrecs[index] for index in indices])
+
+    def get_tle_lines(self):
+        """
+        Get the TLE lines of every satellite of the catalog, as taken by from_tle_lines.
+
+        Returns:
+            list of (name, line 1, line 2) of every satellite
+        """
+
+        return [(name,) + tuple(sgp4_exporter.export_tle(satrec)) for name, satrec in zip(self.names, self.satrecs)]
+
+    def get_digest(self):
+        """
+        Get a digest of the names and elements of every satellite of the catalog, worked out the first time it is
+        needed and kept with the catalog.
+
+        Returns:
+            a hexadecimal SHA-1 digest, the same for any catalog of the same satellites in the same order
+        """
+
+        if self._digest is None:
+            digest = hashlib.sha1()
+
+            for tle_lines in self.get_tle_lines():
+                digest.update("{}\n{}\n{}\n".format(*tle_lines).encode("utf-8"))
+
+            self._digest = digest.hexdigest()
+
+        return self._digest
+
+    def get_satrec_array(self):
+        """
+        Get an sgp4 SatrecArray of the whole catalog, built the first time it is needed and kept with the catalog.
+
+        Returns:
+            a SatrecArray of the satellites, in the same order
+        """
+
+        if self._satrec_array is None:
+            self._satrec_array = sgp4_api.SatrecArray(self.satrecs)
+
+        return self._satrec_array
+
+
+class BatchPropagator:
+    """
+    Propagates a whole catalog of satellites together with sgp4's array propagator, then turns the positions into
+    elevations for an observer with plain NumPy instead of going through skyfield one satellite at a time.
+    """
+
+    def __init__(self, satellites_list, stats = NULL_STATS):
+        """
+        Create a BatchPropagator for a list of satellites.
+
+        Arguments:
+            satellites_list -- a SatelliteCatalog, or a list of Satellite objects whose info is an EarthSatellite
+            stats -- the SchedulerStats the propagations are timed and counted in (defaults to none)
+
+        Raises:
+            IllegalArgumentException -- if any of the items in satellites_list are not of type Satellite
+        """
+
+        self.satellites_list = satellites_list
+        self.stats = stats
+        self._satrec_array = to_satellite_catalog(satellites_list).get_satrec_array()
+
+    def get_positions(self, sample_times):
+        """
+        Get the Earth-fixed position of every satellite at every sample time.
+
+        Arguments:
+            sample_times -- a skyfield Time array
+
+        Returns:
+            an array of shape (number of satellites, number of sample times, 3) of ITRS positions in km, NaN where
+            sgp4 could not propagate a satellite
+        """
+
+        return self.get_positions_from_julian_dates(*get_julian_dates(sample_times))
+
+    def get_positions_from_julian_dates(self, jd, fraction, ut1_fraction):
+        """
+        Get the Earth-fixed position of every satellite at every time given as split Julian dates.
+
+        Arguments:
+            jd -- array of the whole part of the Julian dates
+            fraction -- array of the fractional part of the UTC Julian dates
+            ut1_fraction -- array of the fractional part of the UT1 Julian dates
+
+        Returns:
+            the same as get_positions
+        """
+
+        self.stats.count("propagations")
+
+        with self.stats.stage("propagation"):
+            errors, positions, _ = self._satrec_array.sgp4(jd, fraction)
+            positions[errors != 0] = numpy.nan
+
+            # rotate from the TEME frame of sgp4 to the Earth-fixed frame, ignoring polar motion like skyfield does
+            theta, _ = sgp4lib.theta_GMST1982(jd, ut1_fraction)
+            cos_theta = numpy.cos(theta)
+            sin_theta = numpy.sin(theta)
+
+            x = positions[:, :, 0]
+            y = positions[:, :, 1]
+
+            return numpy.stack((cos_theta * x + sin_theta * y, cos_theta * y - sin_theta * x, positions[:, :, 2]),
+                               axis=2)
+
+    def get_elevations(self, observer_location, sample_times):
+        """
+        Get the elevation of every satellite at every sample time.
+
+        Arguments:
+            observer_location -- location of observer
+            sample_times -- a skyfield Time array
+
+        Returns:
+            an array of shape (number of satellites, number of sample times) of elevations in degrees
+        """
+
+        positions = self.get_positions(sample_times)
+
+        with self.stats.stage("altaz"):
+            return get_topocentric_elevations(positions, observer_location)
+
+
+def touch_file(path):
+    """
+    Mark a saved file as just used, so evict_files deletes it last.
+
+    Arguments:
+        path -- the path of the file
+
+    Returns:
+        True if the file exists, False otherwise
+    """
+
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+
+    return True
+
+
+def evict_files(directory, prefix, max_bytes, keep):
+    """
+    Delete the least recently used files of a directory until those left take up at most max_bytes.
+
+    Arguments:
+        directory -- the directory of the files
+        prefix -- the start of the names of the files that count, the others being left alone
+        max_bytes -- the most bytes the files can take up
+        keep -- the path of a file never deleted, even if it alone takes up more than max_bytes
+    """
+
+    files = []
+
+    for name in os.listdir(directory):
+        if not name.startswith(prefix) or not name.endswith(".npy"):
+            continue
+
+        path = os.path.join(directory, name)
+
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            continue
+
+        files.append((status.st_mtime, status.st_size, path))
+
+    total_bytes = sum(size for _, size, _ in files)
+
+    for _, size, path in sorted(files):
+        if total_bytes <= max_bytes:
+            break
+
+        if path == keep:
+            continue
+
+        # another process may have deleted it already
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+        total_bytes -= size
+
+
+def write_file_atomically(path, write):
+    """
+    Write a file next to where it goes then rename it into place, so no reader ever sees it partly written.
+
+    Arguments:
+        path -- the path of the file
+        write -- a function writing the contents to the binary file object it is called with
+    """
+
+    # named after the process and thread, so writers of the same file never share a temporary file
+    temporary_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+
+    try:
+        with open(temporary_path, "wb") as output_file:
+            write(output_file)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+        raise
+
+
+def save_array_atomically(path, array, max_bytes = None):
+    """
+    Save an array to a .npy file with write_file_atomically, creating its directory if it doesn't exist.
+
+    Arguments:
+        path -- the path of the file
+        array -- the array to save
+        max_bytes -- if given, the most bytes the .npy files of the directory named with the same prefix as this one,
+                     up to its first "-", take up, past which the least recently used are deleted with evict_files
+    """
+
+    directory, filename = os.path.split(path)
+
+    os.makedirs(directory, exist_ok=True)
+
+    write_file_atomically(path, lambda array_file: numpy.save(array_file, array))
+
+    if max_bytes is not None:
+        evict_files(directory, filename.split("-")[0] + "-", max_bytes, path)
+
+
+class EphemerisStore:
+    """
+    Earth-fixed satellite positions for a grid of times, saved in memory-mapped files. Satellite positions don't
+    depend on the observer, so once a catalog is propagated over a grid any location can read the positions without
+    copying them and only has to work out its own elevations.
+
+    The positions are saved as 32-bit floats, to within a few metres, and the least recently used files are deleted
+    once they take up more than max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes = EPHEMERIS_STORE_BYTES):
+        """
+        Create an EphemerisStore.
+
+        Arguments:
+            directory -- directory the position files are saved in, created if it doesn't exist
+            max_bytes -- the most bytes the position files take up
+        """
+
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+
+    def get_path(self, satellites_list, start_time, step, count):
+        """
+        Get the file the positions of a catalog over a grid of times are saved in.
+
+        Arguments:
+            satellites_list -- a SatelliteCatalog or a list of Satellite objects
+            start_time -- the first time of the grid
+            step -- the interval (in minutes) between the times of the grid
+            count -- the number of times of the grid
+
+        Returns:
+            the path of the file, named after the satellites' elements and the grid
+        """
+
+        key = hashlib.sha1("{} {} {}".format(start_time.isoformat(), step, count).encode("utf-8"))
+
+        key.update(to_satellite_catalog(satellites_list).get_digest().encode("utf-8"))
+
+        return os.path.join(self.directory, "positions-{}.npy".format(key.hexdigest()[:16]))
+
+    def get_positions(self, satellites_list, scheduler, start_time, step, count):
+        """
+        Get the positions of a catalog over a grid of times, propagating and saving them first if they aren't saved.
+
+        Arguments:
+            satellites_list -- list of Satellite objects
+            scheduler -- the Scheduler whose timescale builds the grid of times
+            start_time -- the first time of the grid
+            step -- the interval (in minutes) between the times of the grid
+            count -- the number of times of the grid
+
+        Raises:
+            IllegalArgumentException -- if step or count is not positive
+
+        Returns:
+            a read-only memory-mapped array of shape (number of satellites, count, 3) of ITRS positions in km, as
+            32-bit floats
+        """
+
+        """ START Precondition Handling """
+        if step <= 0 or count <= 0:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        path = self.get_path(satellites_list, start_time, step, count)
+
+        if not touch_file(path):
+            sample_times = scheduler.get_sample_times(start_time, 1, step * count, step)
+
+            positions = BatchPropagator(satellites_list, scheduler.stats).get_positions(sample_times)
+
+            save_array_atomically(path, positions.astype(numpy.float32), self.max_bytes)
+
+        return numpy.load(path, mmap_mode="r")
+
+
+class VisibilityIndex:
+    """
+    For an observer, one bitset per satellite marking the times of a grid when the satellite is above the horizon,
+    saved in memory-mapped files. Once a catalog's index is built for an observer, the windows of any query on the
+    same grid are worked out from the bits alone, without propagating anything.
+
+    The least recently used files are deleted once they take up more than max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes = VISIBILITY_INDEX_BYTES):
+        """
+        Create a VisibilityIndex.
+
+        Arguments:
+            directory -- directory the index files are saved in, created if it doesn't exist
+            max_bytes -- the most bytes the index files take up
+        """
+
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+
+    def get_path(self, satellites_list, observer_location, start_time, step):
+        """
+        Get the file the index of a catalog for an observer and a grid of times is saved in.
+
+        The number of times isn't part of the name, so a longer grid replaces a shorter one with the same start.
+
+        Arguments:
+            satellites_list -- a SatelliteCatalog or a list of Satellite objects
+            observer_location -- location of observer
+            start_time -- the first time of the grid
+            step -- the interval (in minutes) between the times of the grid
+
+        Returns:
+            the path of the file, named after the satellites' elements, the observer and the grid
+        """
+
+        key = hashlib.sha1("{} {} {} {} {}".format(observer_location.latitude.degrees,
+                                                   observer_location.longitude.degrees,
+                                                   observer_location.elevation.m,
+                                                   start_time.isoformat(), step).encode("utf-8"))
+
+        key.update(to_satellite_catalog(satellites_list).get_digest().encode("utf-8"))
+
+        return os.path.join(self.directory, "visibility-{}.npy".format(key.hexdigest()[:16]))
+
+    def get_visibility(self, satellites_list, observer_location, scheduler, start_time, step, count):
+        """
+        Get the index of a catalog for an observer over a grid of times, building and saving it first if it isn't
+        saved for at least count times.
+
+        Arguments:
+            satellites_list -- a SatelliteCatalog or a list of Satellite objects
+            observer_location -- location of observer
+            scheduler -- the Scheduler whose timescale builds the grid of times
+            start_time -- the first time of the grid
+            step -- the interval (in minutes) between the times of the grid
+            count -- the number of times of the grid
+
+        Raises:
+            IllegalArgumentException -- if step or count is not positive
+
+        Returns:
+            a read-only memory-mapped array of shape (number of satellites, number of bytes) of the bits of every
+            satellite, packed 8 times to a byte with the first time in the highest bit, see unpack_visibility
+        """
+
+        """ START Precondition Handling """
+        if step <= 0 or count <= 0:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        path = self.get_path(satellites_list, observer_location, start_time, step)
+
+        if touch_file(path):
+            visibility = numpy.load(path, mmap_mode="r")
+
+            if visibility.shape[1] * 8 >= count:
+                return visibility
+
+        # whole bytes of times, so the number of bytes gives the number of times
+        count = -(-count // 8) * 8
+
+        sample_times = scheduler.get_sample_times(start_time, 1, step * count, step)
+
+        elevations = BatchPropagator(satellites_list, scheduler.stats).get_elevations(observer_location, sample_times)
+
+        save_array_atomically(path, numpy.packbits(elevations > 0, axis=1), self.max_bytes)
+
+        return numpy.load(path, mmap_mode="r")
+
+
+def unpack_visibility(visibility, sample_indices):
+    """
+    Get some times of a VisibilityIndex, unpacking only the bytes they are in.
+
+    Arguments:
+        visibility -- the packed bits of every satellite, as returned by VisibilityIndex.get_visibility
+        sample_indices -- array of the indices of the times in the grid
+
+    Returns:
+        a boolean array of shape (number of satellites, number of indices) marking the visible satellites
+    """
+
+    first_byte = sample_indices.min() // 8
+    last_byte = sample_indices.max() // 8
+
+    bits = numpy.unpackbits(visibility[:, first_byte:last_byte + 1], axis=1)
+
+    return bits[:, sample_indices - first_byte * 8].astype(bool)
+
+
+class SubSatelliteIndex:
+    """
+    The sub-satellite points of a catalog over some sample times, bucketed by latitude and by how far from them a
+    satellite can be above the horizon, so an observer can look up the satellites it could see without testing the
+    whole catalog.
+    """
+
+    def __init__(self, positions):
+        """
+        Create a SubSatelliteIndex.
+
+        Arguments:
+            positions -- array of shape (number of satellites, number of sample times, 3) of ITRS positions in km,
+                         NaN where sgp4 could not propagate a satellite
+        """
+
+        self.shape = positions.shape[:2]
+
+        positions = positions.reshape(-1, 3)
+        distances = numpy.sqrt(numpy.einsum("...i,...i", positions, positions))
+
+        with numpy.errstate(invalid="ignore"):
+            latitudes = numpy.degrees(numpy.arcsin(positions[:, 2] / distances))
+            longitudes = numpy.degrees(numpy.arctan2(positions[:, 1], positions[:, 0]))
+
+            horizon_angles = numpy.degrees(get_horizon_angles(distances))
+
+        # positions sgp4 couldn't propagate, or under the surface, can't be seen
+        kept = numpy.flatnonzero(~numpy.isnan(horizon_angles))
+
+        bands = numpy.ceil(horizon_angles[kept] / COVERAGE_BAND).astype(int)
+
+        # sorted by horizon band then latitude, so each band is a run of points in latitude order
+        order = numpy.lexsort((latitudes[kept], bands))
+
+        self.points = kept[order]
+        self.positions = positions[self.points]
+        self.latitudes = latitudes[self.points]
+        self.longitudes = longitudes[self.points]
+        self.horizon_angles = horizon_angles[self.points]
+
+        self.bands = bands[order]
+        self.band_starts = numpy.searchsorted(self.bands, numpy.arange(self.bands.max() + 2 if len(order) else 1))
+
+    def get_candidates(self, latitude):
+        """
+        Get the points whose satellite could be above the horizon somewhere along a latitude.
+
+        Arguments:
+            latitude -- the latitude in degrees
+
+        Returns:
+            an array of the positions of the points in this index
+        """
+
+        candidates = []
+
+        for band in range(len(self.band_starts) - 1):
+            start, end = self.band_starts[band], self.band_starts[band + 1]
+
+            if start == end:
+                continue
+
+            reach = band * COVERAGE_BAND
+
+            first = start + numpy.searchsorted(self.latitudes[start:end], latitude - reach, "left")
+            last = start + numpy.searchsorted(self.latitudes[start:end], latitude + reach, "right")
+
+            candidates.append(numpy.arange(first, last))
+
+        candidates = numpy.concatenate(candidates) if candidates else numpy.zeros(0, dtype=int)
+
+        # only the points that really reach the latitude, as the bands round the horizon angles up
+        return candidates[abs(self.latitudes[candidates] - latitude) <= self.horizon_angles[candidates]]
+
+    def count_visible(self, latitude, longitudes, observers, zeniths, cumulative):
+        """
+        Count the satellites visible by observers along a latitude, looking only at the satellites that could be
+        above their horizon and at the longitudes they could be seen from.
+
+        Arguments:
+            latitude -- the latitude of the observers in degrees
+            longitudes -- sorted array of the longitudes of the observers in degrees
+            observers -- array of shape (number of longitudes, 3) of the ITRS positions of the observers in km
+            zeniths -- array of shape (number of longitudes, 3) of the normals to the ellipsoid at the observers
+            cumulative -- whether to count every satellite visible at some sample time (if True), or the most
+                          satellites visible at the same sample time (if False)
+
+        Returns:
+            an integer array of the counts of every longitude
+        """
+
+        number_of_satellites, number_of_samples = self.shape
+        number_of_longitudes = len(longitudes)
+
+        candidates = self.get_candidates(latitude)
+
+        # how far in longitude from its sub-satellite point each satellite could be seen along the latitude
+        sin_latitude, cos_latitude = math.sin(math.radians(latitude)), math.cos(math.radians(latitude))
+        point_latitudes = numpy.radians(self.latitudes[candidates])
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            cos_reach = (numpy.cos(numpy.radians(self.horizon_angles[candidates])) - sin_latitude *
+                         numpy.sin(point_latitudes)) / (cos_latitude * numpy.cos(point_latitudes))
+
+        reach = numpy.degrees(numpy.arccos(numpy.clip(cos_reach, -1, 1)))
+
+        # a range of at most every longitude, found in the longitudes repeated either side to go round the globe
+        extended_longitudes = numpy.concatenate((longitudes - 360, longitudes, longitudes + 360))
+
+        first = numpy.searchsorted(extended_longitudes, self.longitudes[candidates] - reach, "left")
+        last = numpy.searchsorted(extended_longitudes, self.longitudes[candidates] + reach, "right")
+        lengths = numpy.minimum(last - first, number_of_longitudes)
+
+        # every (point, longitude) pair to test
+        pairs = numpy.repeat(numpy.arange(len(candidates)), lengths)
+        pair_longitudes = (numpy.repeat(first - numpy.cumsum(lengths) + lengths, lengths) +
+                           numpy.arange(lengths.sum())) % number_of_longitudes
+
+        # above the horizon where the satellite is on the zenith's side of the observer's horizon plane, the
+        # zenith's z being the same all along the latitude
+        positions = self.positions[candidates]
+        heights = observers[0].dot(zeniths[0]) - positions[:, 2] * zeniths[0, 2]
+
+        visible = positions[pairs, 0] * zeniths[pair_longitudes, 0] + positions[pairs, 1] * \
+            zeniths[pair_longitudes, 1] > heights[pairs]
+
+        satellites, samples = numpy.divmod(self.points[candidates[pairs[visible]]], number_of_samples)
+        pair_longitudes = pair_longitudes[visible]
+
+        if cumulative:
+            seen = numpy.unique(satellites * number_of_longitudes + pair_longitudes)
+
+            return numpy.bincount(seen % number_of_longitudes, minlength=number_of_longitudes)
+
+        counts = numpy.bincount(samples * number_of_longitudes + pair_longitudes,
+                                minlength=number_of_samples * number_of_longitudes)
+
+        return counts.reshape(number_of_samples, number_of_longitudes).max(axis=0)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections, kept by server once a request is done with them so that the next request to the same
+    server doesn't connect again. The pool can be shared by threads, each connection being used by one at a time.
+    """
+
+    # the most redirects followed for a request
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout = DOWNLOAD_TIMEOUT):
+        """
+        Create an empty ConnectionPool.
+
+        Arguments:
+            timeout -- how long (in seconds) a connection can stall before a request fails
+        """
+
+        self.timeout = timeout
+
+        # idle connections by (scheme, host and port)
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """
+        Download a file over HTTP or HTTPS, following redirects.
+
+        Arguments:
+            url -- URL of the file
+
+        Raises:
+            IllegalArgumentException -- if the server doesn't answer with the file
+
+        Returns:
+            the content of the file, as bytes
+        """
+
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urllib_parse.urlsplit(url)
+
+            if parts.scheme not in ("http", "https"):
+                raise IllegalArgumentException
+
+            path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+            status, location, content = self.request((parts.scheme, parts.netloc), path)
+
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urllib_parse.urljoin(url, location)
+                continue
+
+            if status != 200:
+                raise IllegalArgumentException
+
+            return content
+
+        raise IllegalArgumentException
+
+    def request(self, server, path):
+        """
+        Send a GET request over an idle connection to the server, or a new one.
+
+        A connection the server has closed while it was idle is only found out when it is used again, so the request
+        is then sent again over the next connection.
+
+        Arguments:
+            server -- the (scheme, host and port) of the server
+            path -- the path and query of the request
+
+        Returns:
+            (status, location, content) of the response, location being None if it has no Location header
+        """
+
+        while True:
+            connection, reused = self.acquire(server)
+
+            try:
+                connection.request("GET", path, headers={"Connection": "keep-alive"})
+                response = connection.getresponse()
+                content = response.read()
+            except (http_client.HTTPException, OSError):
+                connection.close()
+
+                if reused:
+                    continue
+
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self.release(server, connection)
+
+            return response.status, response.getheader("Location"), content
+
+    def acquire(self, server):
+        """
+        Take an idle connection to a server out of the pool, or open a new one.
+
+        Arguments:
+            server -- the (scheme, host and port) of the server
+
+        Returns:
+            (connection, reused) where reused is whether the connection was idle in the pool
+        """
+
+        with self._lock:
+            idle = self._idle.get(server)
+
+            if idle:
+                return idle.pop(), True
+
+        scheme, host = server
+
+        if scheme == "https":
+            return http_client.HTTPSConnection(host, timeout=self.timeout), False
+
+        return http_client.HTTPConnection(host, timeout=self.timeout), False
+
+    def release(self, server, connection):
+        """
+        Put a connection back in the pool once a request is done with it.
+
+        Arguments:
+            server -- the (scheme, host and port) of the server
+            connection -- the connection
+        """
+
+        with self._lock:
+            self._idle.setdefault(server, []).append(connection)
+
+    def close(self):
+        """ Close every idle connection. """
+
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+
+            self._idle = {}
+
+
+def get_satellite_list_urls(satellite_list_url):
+    """
+    Get the URLs of the satellite_list_url argument of Scheduler.get_all_satellites.
+
+    Arguments:
+        satellite_list_url -- a URL, or a list of URLs
+
+    Raises:
+        IllegalArgumentException -- if satellite_list_url is an empty list, or a list with an item that isn't a string
+
+    Returns:
+        a list of URLs
+    """
+
+    if type(satellite_list_url) is not list and type(satellite_list_url) is not tuple:
+        return [satellite_list_url]
+
+    """ START Precondition Handling """
+    if not satellite_list_url:
+        raise IllegalArgumentException
+
+    for url in satellite_list_url:
+        if type(url) is not str:
+            raise IllegalArgumentException
+    """ END Precondition Handling """
+
+    return list(satellite_list_url)
+
+
+def get_satellite_list_key(satellite_list_url):
+    """
+    Get the key the satellites of the satellite_list_url argument of Scheduler.get_all_satellites are kept by.
+
+    Arguments:
+        satellite_list_url -- a URL, or a list of URLs
+
+    Raises:
+        IllegalArgumentException -- if satellite_list_url is a list that get_satellite_list_urls rejects
+
+    Returns:
+        the URL, or a tuple of the URLs
+    """
+
+    if type(satellite_list_url) is list or type(satellite_list_url) is tuple:
+        return ("merged",) + tuple(get_satellite_list_urls(satellite_list_url))
+
+    return satellite_list_url
+
+
+def merge_by_norad_id(sources):
+    """
+    Merge the satellites of several satellite lists, keeping one satellite for every NORAD catalog number.
+
+    Arguments:
+        sources -- a list with a list of (NORAD catalog number, epoch, satellite) for every satellite list
+
+    Returns:
+        a list of the satellites, each in the place its number first appears, with the latest epoch given for it
+    """
+
+    merged = {}
+
+    for source in sources:
+        for norad_id, epoch, satellite in source:
+            if norad_id not in merged or epoch > merged[norad_id][0]:
+                merged[norad_id] = (epoch, satellite)
+
+    return [satellite for _, satellite in merged.values()]
+
+
+def to_satellite_catalog(satellites):
+    """
+    Get satellites as a SatelliteCatalog.
+
+    Arguments:
+        satellites -- a SatelliteCatalog, or a list of Satellite objects
+
+    Raises:
+        IllegalArgumentException -- if any of the items in satellites are not of type Satellite
+
+    Returns:
+        satellites if it is already a SatelliteCatalog, otherwise a new SatelliteCatalog of them
+    """
+
+    if type(satellites) is SatelliteCatalog:
+        return satellites
+
+    return SatelliteCatalog.from_satellites(satellites)
+
+
+def read_tle_lines(lines):
+    """
+    Read the satellites of a TLE file, the same way skyfield does.
+
+    Every two adjacent lines starting with "1 " and "2 " with at least 69 characters are a satellite, named after the
+    line before them if it isn't part of another satellite.
+
+    Arguments:
+        lines -- the lines of the file as bytes, such as a file opened in binary mode
+
+    Returns:
+        a generator of (name, line 1, line 2) of every satellite, name being None for an unnamed satellite
+    """
+
+    name_line = line1 = b""
+
+    for line2 in lines:
+        if line2.startswith(b"2 ") and len(line2) >= 69 and line1.startswith(b"1 ") and len(line1) >= 69:
+            name = None
+
+            if name_line:
+                name_line = name_line.rstrip(b" \n\r")
+
+                # the Spacetrack 3-line format starts names with "0 "
+                if name_line.startswith(b"0 "):
+                    name_line = name_line[2:]
+
+                name = name_line.decode("ascii")
+
+            yield name, line1.decode("ascii").rstrip("\n\r"), line2.decode("ascii").rstrip("\n\r")
+
+            name_line = line1 = b""
+        else:
+            name_line = line1
+            line1 = line2
+
+
+def get_sample_offsets(n_windows, duration, sample_interval):
+    """
+    Get the minutes from the start of the first observation window of every sample time, window by window, as
+    Scheduler.get_sample_times.
+
+    Arguments:
+        n_windows -- the number of observation windows
+        duration -- the size (in minutes) of an observation window
+        sample_interval -- the interval (in minutes) between samples within a window
+
+    Returns:
+        an integer array of n_windows * (duration // sample_interval) minutes
+    """
+
+    offsets = numpy.arange(n_windows)[:, numpy.newaxis] * duration + \
+        numpy.arange(duration // sample_interval) * sample_interval
+
+    return offsets.ravel()
+
+
+def get_julian_dates(sample_times):
+    """
+    Split times into the Julian dates sgp4 and the Earth's rotation are worked out from.
+
+    Arguments:
+        sample_times -- a skyfield Time array
+
+    Returns:
+        (jd, fraction, ut1_fraction) where
+            jd -- array of the whole part of the Julian dates
+            fraction -- array of the fractional part of the UTC Julian dates, which sgp4 takes
+            ut1_fraction -- array of the fractional part of the UT1 Julian dates
+    """
+
+    # split the same way skyfield's EarthSatellite does
+    return (sample_times.whole, sample_times.tai_fraction - sample_times._leap_seconds() / DAY_S,
+            sample_times.ut1_fraction)
+
+
+def get_apogee_distances(eccentricities, mean_motions):
+    """
+    Bound how far from the centre of the Earth satellites get, from their orbital elements. Pruning, culling and the
+    coverage map all bound visibility this way, so they keep the same room for perturbations.
+
+    Arguments:
+        eccentricities -- array of the eccentricities of the satellites
+        mean_motions -- array of the mean motions of the satellites in radians per minute
+
+    Returns:
+        an array of the apogee distances in km, with some room for the perturbations sgp4 adds to the mean elements
+    """
+
+    semi_major_axes = (EARTH_MU / (mean_motions / 60) ** 2) ** (1 / 3)
+
+    return 1.01 * semi_major_axes * (1 + eccentricities)
+
+
+def get_horizon_angles(distances):
+    """
+    Get how far from an observer, as seen from the centre of the Earth, a satellite can be and still be above the
+    horizon, about acos(R / r) where R is the observer's and r the satellite's distance from the centre.
+
+    Arguments:
+        distances -- array of the distances of the satellites from the centre of the Earth in km
+
+    Returns:
+        an array of the angles in radians, for a spherical Earth with a degree of room for the ellipsoid and geodetic
+        latitudes, NaN for a distance under the surface
+    """
+
+    return numpy.arccos(EARTH_POLAR_RADIUS / distances) + numpy.radians(1)
+
+
+def get_reachable_satellites(inclinations, eccentricities, mean_motions, latitude):
+    """
+    Find which satellites can ever be above the horizon at a latitude, from their orbital elements.
+
+    A satellite's ground track never goes further from the equator than its inclination, and a satellite is only
+    above the horizon within about acos(R / r) of the observer, as seen from the centre of the Earth, where R is the
+    Earth's and r the satellite's distance from it. A satellite never rises if the observer is further than both of
+    those from the equator, wherever it is along its orbit.
+
+    Arguments:
+        inclinations -- array of the inclinations of the satellites in radians
+        eccentricities -- array of the eccentricities of the satellites
+        mean_motions -- array of the mean motions of the satellites in radians per minute
+        latitude -- the latitude of the observer in degrees
+
+    Returns:
+        a boolean array, False only where the satellite is sure never to be above the horizon
+    """
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        # the highest latitude the ground track reaches, whichever way the satellite goes round
+        track_latitudes = numpy.minimum(inclinations, numpy.pi - inclinations)
+
+        apogees = get_apogee_distances(eccentricities, mean_motions)
+        horizon_angles = get_horizon_angles(apogees)
+
+        unreachable = numpy.radians(abs(latitude)) > track_latitudes + horizon_angles
+
+    # orbits the bound doesn't hold for are kept, the engines leave them out if they aren't visible
+    return ~(unreachable & (mean_motions > 0) & (eccentricities < 1) & (apogees > EARTH_POLAR_RADIUS))
+
+
+def get_observer_positions(latitudes, longitudes):
+    """
+    Get the positions of observers on a latitude and longitude grid, on the same ellipsoid as skyfield's Topos.
+
+    Arguments:
+        latitudes -- array of the latitudes of the rows in degrees
+        longitudes -- array of the longitudes of the columns in degrees
+
+    Returns:
+        (observers, zeniths) where
+            observers -- array of shape (number of latitudes, number of longitudes, 3) of ITRS positions in km
+            zeniths -- array of the same shape of the normals to the ellipsoid at the observers
+    """
+
+    latitudes = numpy.radians(latitudes)[:, numpy.newaxis]
+    longitudes = numpy.radians(longitudes)[numpy.newaxis, :]
+
+    eccentricity_squared = IERS2010_FLATTENING * (2 - IERS2010_FLATTENING)
+    radii = IERS2010_RADIUS / numpy.sqrt(1 - eccentricity_squared * numpy.sin(latitudes) ** 2)
+
+    zeniths = numpy.stack(numpy.broadcast_arrays(numpy.cos(latitudes) * numpy.cos(longitudes),
+                                                 numpy.cos(latitudes) * numpy.sin(longitudes),
+                                                 numpy.sin(latitudes)), axis=-1)
+
+    observers = zeniths * radii[..., numpy.newaxis]
+    observers[..., 2] *= 1 - eccentricity_squared
+
+    return observers, zeniths
+
+
+def get_sun_positions(jd, fraction, ut1_fraction):
+    """
+    Get the Earth-fixed position of the Sun at every time given as split Julian dates.
+
+    The Sun's position comes from the low precision formulae of the Astronomical Almanac, good to about a hundredth of
+    a degree, which is plenty to tell daylight from darkness and a lit satellite from one in the Earth's shadow, and
+    doesn't need a planetary ephemeris to be downloaded.
+
+    Arguments:
+        jd -- array of the whole part of the Julian dates
+        fraction -- array of the fractional part of the UTC Julian dates
+        ut1_fraction -- array of the fractional part of the UT1 Julian dates
+
+    Returns:
+        an array of shape (number of times, 3) of ITRS positions in km
+    """
+
+    days = jd - 2451545.0 + fraction
+
+    mean_longitude = numpy.radians(280.460 + 0.9856474 * days)
+    mean_anomaly = numpy.radians(357.528 + 0.9856003 * days)
+
+    longitude = mean_longitude + numpy.radians(1.915 * numpy.sin(mean_anomaly) + 0.020 * numpy.sin(2 * mean_anomaly))
+    obliquity = numpy.radians(23.439 - 0.0000004 * days)
+    distance = AU_KM * (1.00014 - 0.01671 * numpy.cos(mean_anomaly) - 0.00014 * numpy.cos(2 * mean_anomaly))
+
+    x = distance * numpy.cos(longitude)
+    y = distance * numpy.cos(obliquity) * numpy.sin(longitude)
+    z = distance * numpy.sin(obliquity) * numpy.sin(longitude)
+
+    # rotate to the Earth-fixed frame the same way as the satellites
+    theta, _ = sgp4lib.theta_GMST1982(jd, ut1_fraction)
+    cos_theta = numpy.cos(theta)
+    sin_theta = numpy.sin(theta)
+
+    return numpy.stack((cos_theta * x + sin_theta * y, cos_theta * y - sin_theta * x, z), axis=-1)
+
+
+def is_sunlit(positions, sun_positions):
+    """
+    Find which positions are lit by the Sun, taking the Earth's shadow as a cylinder of the Earth's equatorial
+    radius behind it.
+
+    Arguments:
+        positions -- array of shape (number of satellites, number of times, 3) of ITRS positions in km
+        sun_positions -- array of shape (number of times, 3) of ITRS positions of the Sun in km
+
+    Returns:
+        a boolean array of shape (number of satellites, number of times), False where a position is in shadow or
+        is NaN
+    """
+
+    sun_directions = sun_positions / numpy.linalg.norm(sun_positions, axis=-1)[:, numpy.newaxis]
+
+    # how far each position is towards the Sun, and its distance from the line through the Earth and the Sun
+    along = numpy.einsum("...i,...i", positions, sun_directions)
+    across = numpy.einsum("...i,...i", positions, positions) - along ** 2
+
+    return (along > 0) | (across > EARTH_EQUATORIAL_RADIUS ** 2)
+
+
+def get_elevation_rate_bounds(satrec):
+    """
+    Bound how fast the elevation of a satellite can change, from its orbital elements.
+
+    Seen by an observer, a satellite can't move across the sky faster than its speed relative to the observer over
+    its distance. Relative to the rotating Earth that speed is at most its speed at perigee plus the Earth's rotation
+    at its apogee. Below the horizon the satellite is at least as far as the horizon at its perigee altitude, and
+    above the horizon at least as far as its perigee altitude.
+
+    Arguments:
+        satrec -- the sgp4 Satrec of the satellite
+
+    Returns:
+        (below_horizon_rate, above_horizon_rate) in degrees per minute, infinite if the orbit gives no bound
+    """
+
+    mean_motion = satrec.no_kozai / 60
+    eccentricity = satrec.ecco
+
+    if mean_motion <= 0 or eccentricity >= 1:
+        return math.inf, math.inf
+
+    semi_major_axis = (EARTH_MU / mean_motion ** 2) ** (1 / 3)
+
+    # some room for the perturbations sgp4 adds to the mean elements
+    perigee = 0.99 * semi_major_axis * (1 - eccentricity)
+    apogee = 1.01 * semi_major_axis * (1 + eccentricity)
+    speed = 1.1 * math.sqrt(EARTH_MU * (1 + eccentricity) / perigee) + EARTH_ROTATION_RATE / 60 * apogee
+
+    if perigee <= EARTH_EQUATORIAL_RADIUS:
+        return math.inf, math.inf
+
+    below_horizon_distance = math.sqrt(perigee ** 2 - EARTH_EQUATORIAL_RADIUS ** 2)
+    above_horizon_distance = perigee - EARTH_EQUATORIAL_RADIUS
+
+    return (math.degrees(speed / below_horizon_distance) * 60, math.degrees(speed / above_horizon_distance) * 60)
+
+
+def get_elevation_at(satrec, jd, fraction, cos_theta, sin_theta, observer, zenith):
+    """
+    Get the elevation of one satellite at one time, without going through arrays.
+
+    Arguments:
+        satrec -- the sgp4 Satrec of the satellite
+        jd -- the whole part of the Julian date
+        fraction -- the fractional part of the UTC Julian date
+        cos_theta -- the cosine of the Greenwich sidereal angle at that time
+        sin_theta -- the sine of the Greenwich sidereal angle at that time
+        observer -- the (x, y, z) ITRS position of the observer in km
+        zenith -- the (x, y, z) normal to the ellipsoid at the observer
+
+    Returns:
+        the elevation in degrees, NaN if sgp4 could not propagate the satellite
+    """
+
+    error, position, _ = satrec.sgp4(jd, fraction)
+
+    if error:
+        return math.nan
+
+    x = cos_theta * position[0] + sin_theta * position[1] - observer[0]
+    y = cos_theta * position[1] - sin_theta * position[0] - observer[1]
+    z = position[2] - observer[2]
+
+    return math.degrees(math.asin((x * zenith[0] + y * zenith[1] + z * zenith[2]) / math.sqrt(x * x + y * y + z * z)))
+
+
+def get_topocentric_elevations(positions, observer_location):
+    """
+    Get the elevations seen by an observer of Earth-fixed positions.
+
+    Arguments:
+        positions -- array of ITRS positions in km, the last axis being x, y, z
+        observer_location -- location of observer
+
+    Returns:
+        an array of elevations in degrees, with the shape of positions without its last axis
+    """
+
+    latitude = observer_location.latitude.radians
+    longitude = observer_location.longitude.radians
+
+    # the normal to the ellipsoid at the observer, which is what altitudes are measured from
+    zenith = numpy.array([numpy.cos(latitude) * numpy.cos(longitude),
+                          numpy.cos(latitude) * numpy.sin(longitude),
+                          numpy.sin(latitude)])
+
+    differences = positions - observer_location.itrs_xyz.km
+
+    distances = numpy.sqrt(numpy.einsum("...i,...i", differences, differences))
+
+    return numpy.degrees(numpy.arcsin(differences.dot(zenith) / distances))
+
+
+# what a process of Scheduler.get_elevation_matrix_parallel works on, set once by start_elevation_worker
+elevation_worker = {}
+
+
+def start_elevation_worker(tle_lines, julian_dates, location, elevations_buffer, shape):
+    """
+    Set up a process of Scheduler.get_elevation_matrix_parallel.
+
+    Arguments:
+        tle_lines -- list of (name, line 1, line 2) of every satellite
+        julian_dates -- the (jd, fraction, ut1_fraction) of the sample times, see get_positions_from_julian_dates
+        location -- a tuple (lat, lon) of the observer
+        elevations_buffer -- the shared array the elevations are written to
+        shape -- the (number of satellites, number of sample times) of the elevations
+    """
+
+    elevation_worker["tle_lines"] = tle_lines
+    elevation_worker["julian_dates"] = julian_dates
+    elevation_worker["observer_location"] = skyfield_api.Topos(location[0], location[1])
+    elevation_worker["elevations"] = numpy.frombuffer(elevations_buffer).reshape(shape)
+
+
+def compute_elevation_chunk(chunk):
+    """
+    Propagate a chunk of satellites in a process of Scheduler.get_elevation_matrix_parallel.
+
+    Arguments:
+        chunk -- the (start, stop) indices of the satellites to propagate
+    """
+
+    start, stop = chunk
+
+    catalog = SatelliteCatalog.from_tle_lines(elevation_worker["tle_lines"][start:stop])
+
+    positions = BatchPropagator(catalog).get_positions_from_julian_dates(*elevation_worker["julian_dates"])
+
+    elevation_worker["elevations"][start:stop] = get_topocentric_elevations(positions,
+                                                                            elevation_worker["observer_location"])
+
+
+def is_above_horizon(positions, observer_location):
+    """
+    Check which Earth-fixed positions an observer sees above the horizon, the same as a positive elevation of
+    get_topocentric_elevations without working the elevations out.
+
+    Arguments:
+        positions -- array of ITRS positions in km, the last axis being x, y, z
+        observer_location -- location of observer
+
+    Returns:
+        a boolean array with the shape of positions without its last axis
+    """
+
+    latitude = observer_location.latitude.radians
+    longitude = observer_location.longitude.radians
+
+    zenith = numpy.array([numpy.cos(latitude) * numpy.cos(longitude),
+                          numpy.cos(latitude) * numpy.sin(longitude),
+                          numpy.sin(latitude)])
+
+    # above the horizon where a position is on the zenith's side of the observer's horizon plane
+    return positions.dot(zenith) > observer_location.itrs_xyz.km.dot(zenith)
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,302 @@
+"""
+Run many find_time queries together, propagating the satellites once for all the queries sharing a satellite list and
+overlapping in time rather than once per query.
+
+The queries are read as lines of JSON, each an object of the arguments of find_time as taken by the scheduler service
+(see schedulerService), with an optional "id" handed back with its result. Results are written as lines of JSON as
+soon as they are worked out, grouped rather than in the order of the queries:
+
+    python schedulerBatch.py queries.jsonl --output results.jsonl
+"""
+
+
+from scheduler import Scheduler, BatchPropagator, IllegalArgumentException, get_observer_positions, get_sample_offsets
+from schedulerService import parse_time, format_time
+from datetime import datetime, timedelta
+import argparse
+import json
+import numpy
+import pytz
+import sys
+
+
+# the arguments a query can give, the others of find_time taking their default
+QUERY_ARGUMENTS = ("id", "satlist_url", "start_time", "n_windows", "duration", "sample_interval", "cumulative",
+                   "location")
+
+# the defaults of find_time for the arguments a query leaves out, except start_time which every query must give
+QUERY_DEFAULTS = {"satlist_url": "http://celestrak.com/NORAD/elements/visual.txt", "n_windows": 24, "duration": 60,
+                  "sample_interval": 1, "cumulative": False, "location": (-37.910496, 145.134021)}
+
+# the time the sample times of the queries are counted in seconds from
+BATCH_EPOCH = pytz.timezone("UTC").localize(datetime(2000, 1, 1))
+
+# the bytes of a satellite's position at a sample time, and the most bytes of positions a group holds by default
+POSITION_BYTES = 3 * 8
+MEMORY_BUDGET = 512 * 2 ** 20
+
+
+class BatchQuery:
+    """ A checked find_time query of a batch, with the times of its samples. """
+
+    __slots__ = ("index", "id", "satlist_url", "start_time", "n_windows", "duration", "sample_interval",
+                 "cumulative", "location", "seconds")
+
+    def __init__(self, index, query, scheduler):
+        """
+        Check a query and work out the times of its samples.
+
+        Arguments:
+            index -- the position of the query in the batch
+            query -- the arguments of the query, as a dictionary decoded from JSON
+            scheduler -- the Scheduler checking the arguments
+
+        Raises:
+            IllegalArgumentException -- if the query has an unknown or invalid argument, no start_time or a
+                                        satlist_url that isn't a string or a list of them
+        """
+
+        """ START Precondition Handling """
+        if type(query) is not dict or "start_time" not in query:
+            raise IllegalArgumentException
+
+        for name in query:
+            if name not in QUERY_ARGUMENTS:
+                raise IllegalArgumentException
+
+        # anything else couldn't group the queries of a list, or would reach the Scheduler as a path
+        satlist_urls = query.get("satlist_url", "")
+
+        if type(satlist_urls) is not list:
+            satlist_urls = [satlist_urls]
+
+        for satlist_url in satlist_urls:
+            if type(satlist_url) is not str:
+                raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        arguments = dict(QUERY_DEFAULTS, **query)
+
+        self.index = index
+        self.id = arguments.get("id", index)
+        self.satlist_url = arguments["satlist_url"]
+        self.n_windows = arguments["n_windows"]
+        self.duration = arguments["duration"]
+        self.sample_interval = arguments["sample_interval"]
+        self.cumulative = arguments["cumulative"]
+        self.location = tuple(arguments["location"]) if type(arguments["location"]) is list else \
+            arguments["location"]
+
+        if type(self.satlist_url) is list:
+            self.satlist_url = tuple(self.satlist_url)
+
+        self.start_time = scheduler.check_find_time_arguments(parse_time(arguments["start_time"]), self.n_windows,
+                                                              self.duration, self.sample_interval, self.cumulative,
+                                                              self.location)
+
+        offsets = get_sample_offsets(self.n_windows, self.duration, self.sample_interval)
+
+        # rounded to the microsecond, so the same time of different queries is the same number
+        self.seconds = numpy.round((self.start_time - BATCH_EPOCH).total_seconds() + 60.0 * offsets, 6)
+
+    def get_end(self):
+        """ Get the seconds from BATCH_EPOCH of the last sample of the query. """
+        return self.seconds[-1]
+
+
+def group_queries(queries, max_samples):
+    """
+    Group queries of the same satellite list so that the queries of a group overlap in time, each group having at
+    most max_samples distinct sample times unless a single query has more.
+
+    Arguments:
+        queries -- list of BatchQuery objects of the same satellite list
+        max_samples -- the most distinct sample times of a group
+
+    Returns:
+        a list of (queries, seconds) for every group, where seconds is the sorted array of the distinct sample times
+        of its queries in seconds from BATCH_EPOCH
+    """
+
+    groups = []
+
+    group = []
+    seconds = None
+    end = None
+
+    for query in sorted(queries, key=lambda query: (query.seconds[0], query.index)):
+
+        if group and query.seconds[0] <= end:
+            merged_seconds = numpy.union1d(seconds, query.seconds)
+
+            if len(merged_seconds) <= max_samples:
+                group.append(query)
+                seconds = merged_seconds
+                end = max(end, query.get_end())
+                continue
+
+        if group:
+            groups.append((group, seconds))
+
+        group = [query]
+        seconds = numpy.unique(query.seconds)
+        end = query.get_end()
+
+    if group:
+        groups.append((group, seconds))
+
+    return groups
+
+
+def answer_group(scheduler, catalog, queries, seconds):
+    """
+    Answer a group of queries, propagating the catalog once over the sample times of all of them.
+
+    The answers are the same as find_time with the "batched" engine.
+
+    Arguments:
+        scheduler -- the Scheduler whose timescale builds the sample times
+        catalog -- the SatelliteCatalog of the queries' satellite list
+        queries -- list of BatchQuery objects
+        seconds -- the sorted array of the distinct sample times of the queries, as returned by group_queries
+
+    Returns:
+        a generator of (query, (interval_start_time, satellite_name_list)) for every query, as soon as it is answered
+    """
+
+    if not len(catalog):
+        for query in queries:
+            yield query, (None, [])
+        return
+
+    first_time = BATCH_EPOCH + timedelta(seconds = float(seconds[0]))
+
+    sample_times = scheduler.get_utc_time(first_time.year, first_time.month, first_time.day, first_time.hour,
+                                          first_time.minute, first_time.second + first_time.microsecond / 1e6 +
+                                          (seconds - seconds[0]))
+
+    positions = BatchPropagator(catalog, scheduler.stats).get_positions(sample_times)
+
+    # x, y and z each in a contiguous array, as every query reads its own sample times of them
+    x, y, z = (numpy.ascontiguousarray(positions[:, :, axis]) for axis in range(3))
+
+    del positions
+
+    for query in queries:
+        samples = numpy.searchsorted(seconds, query.seconds)
+
+        observers, zeniths = get_observer_positions(numpy.array([query.location[0]], dtype=float),
+                                                    numpy.array([query.location[1]], dtype=float))
+        observer, zenith = observers[0, 0], zeniths[0, 0]
+
+        # above the horizon where a satellite is on the zenith's side of the observer's horizon plane, the same as
+        # a positive elevation
+        visible = x[:, samples] * zenith[0] + y[:, samples] * zenith[1] + z[:, samples] * zenith[2] > \
+            observer.dot(zenith)
+
+        counts, visible_satellites = scheduler.find_max_visible_satellites_windows(visible, query.n_windows,
+                                                                                   query.cumulative)
+
+        yield query, scheduler.get_max_window(catalog, query.start_time, query.duration, counts, visible_satellites)
+
+
+def run_batch(queries, scheduler = None, memory_budget = MEMORY_BUDGET):
+    """
+    Answer a batch of find_time queries, propagating each satellite list once for every group of queries
+    overlapping in time, so the time taken grows with the number of distinct sample times rather than of queries.
+
+    Arguments:
+        queries -- an iterable of the queries, each a dictionary of the arguments of QUERY_ARGUMENTS
+        scheduler -- the Scheduler loading the satellite lists (defaults to a new one)
+        memory_budget -- the most bytes of positions a group holds, which bounds how many sample times it has
+
+    Returns:
+        a generator of a result for every query, as soon as it is answered, each a dictionary of the id of the query
+        and either its "start_time" and "satellites" as answered by find_time, or an "error"
+    """
+
+    scheduler = Scheduler() if scheduler is None else scheduler
+
+    # the valid queries by satellite list, in the order the lists first appear
+    queries_by_list = {}
+
+    for index, query in enumerate(queries):
+        try:
+            batch_query = BatchQuery(index, query, scheduler)
+        except (IllegalArgumentException, TypeError, ValueError):
+            yield {"id": query.get("id", index) if type(query) is dict else index, "error": "invalid query"}
+            continue
+
+        queries_by_list.setdefault(json.dumps(batch_query.satlist_url), []).append(batch_query)
+
+    for list_queries in queries_by_list.values():
+        try:
+            catalog = scheduler.get_satellite_catalog(list_queries[0].satlist_url)
+        except IllegalArgumentException:
+            for query in list_queries:
+                yield {"id": query.id, "error": "the satellite list can't be loaded"}
+            continue
+
+        max_samples = max(1, memory_budget // (POSITION_BYTES * max(1, len(catalog))))
+
+        for group, seconds in group_queries(list_queries, max_samples):
+            for query, (start_time, satellites) in answer_group(scheduler, catalog, group, seconds):
+                yield {"id": query.id, "start_time": format_time(start_time), "satellites": satellites}
+
+
+def read_queries(lines):
+    """
+    Read queries from lines of JSON, skipping blank lines.
+
+    Arguments:
+        lines -- an iterable of lines, such as a file
+
+    Returns:
+        a generator of the queries, a line that isn't JSON being handed over as None so it is answered as invalid
+    """
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def main(arguments = None):
+    """
+    Run a batch of queries from the command line, writing a line of JSON for every result as soon as it is ready.
+
+    Arguments:
+        arguments -- the command line arguments, defaults to sys.argv
+    """
+
+    parser = argparse.ArgumentParser(description = "Answer a batch of find_time queries given as lines of JSON.")
+    parser.add_argument("queries", help = "file of the queries, - for standard input")
+    parser.add_argument("--output", help = "file the results are written to, defaults to standard output")
+    parser.add_argument("--offline", action = "store_true", help = "only read satellite lists from the cache")
+    parser.add_argument("--memory-budget", type = int, default = MEMORY_BUDGET,
+                        help = "the most bytes of positions propagated at once")
+
+    options = parser.parse_args(arguments)
+
+    queries_file = sys.stdin if options.queries == "-" else open(options.queries)
+    output = open(options.output, "w") if options.output else sys.stdout
+
+    try:
+        for result in run_batch(read_queries(queries_file), Scheduler(offline = options.offline),
+                                options.memory_budget):
+            output.write(json.dumps(result, sort_keys = True) + "\n")
+            output.flush()
+    finally:
+        if queries_file is not sys.stdin:
+            queries_file.close()
+
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmarks for the scheduler on synthetic satellite lists, run offline.
+
+Every measurement is printed as one line of JSON, so runs of different versions can be kept and compared:
+
+    python schedulerBenchmark.py --sizes 10,1000,20000 --engines batched,index --output results.jsonl
+"""
+
+
+from scheduler import Scheduler
+from sgp4.api import Satrec, WGS72
+from sgp4.exporter import export_tle
+from skyfield.api import Loader, Topos
+from datetime import datetime
+import argparse
+import itertools
+import json
+import math
+import numpy
+import os
+import platform
+import pytz
+import sys
+import tempfile
+import time
+
+
+# the epoch of every synthetic satellite, and the start of every benchmarked query
+BENCHMARK_EPOCH = pytz.timezone("UTC").localize(datetime(2020, 11, 11))
+
+# days from the sgp4 epoch of 1949 December 31 00:00 UT to BENCHMARK_EPOCH
+SGP4_EPOCH_DAYS = 25883.0
+
+# the catalog sizes the synthetic satellite lists can have
+MIN_SATELLITES = 10
+MAX_SATELLITES = 20000
+
+
+def make_synthetic_tle(number_of_satellites, seed = 0):
+    """
+    Make a satellite list of made-up satellites, the same for the same arguments.
+
+    The satellites are mostly in low orbits, with some in medium, highly elliptical and geostationary orbits, roughly
+    like the lists published by Celestrak.
+
+    Arguments:
+        number_of_satellites -- how many satellites the list has, from MIN_SATELLITES to MAX_SATELLITES
+        seed -- the seed of the random elements
+
+    Raises:
+        ValueError -- if number_of_satellites is out of range
+
+    Returns:
+        the satellite list in the 3-line TLE format, as a string
+    """
+
+    if number_of_satellites < MIN_SATELLITES or number_of_satellites > MAX_SATELLITES:
+        raise ValueError("number_of_satellites must be from {} to {}".format(MIN_SATELLITES, MAX_SATELLITES))
+
+    random = numpy.random.RandomState(seed)
+
+    lines = []
+
+    for index in range(number_of_satellites):
+        orbit = random.uniform()
+
+        if orbit < 0.8:
+            mean_motion, eccentricity, inclination = random.uniform(11, 16), random.uniform(0, 0.02), \
+                random.uniform(0, 100)
+        elif orbit < 0.88:
+            mean_motion, eccentricity, inclination = random.uniform(1.8, 2.2), random.uniform(0, 0.02), \
+                random.uniform(50, 65)
+        elif orbit < 0.92:
+            mean_motion, eccentricity, inclination = random.uniform(2, 2.01), random.uniform(0.6, 0.75), \
+                random.uniform(60, 66)
+        else:
+            mean_motion, eccentricity, inclination = random.uniform(1.0026, 1.0028), random.uniform(0, 0.001), \
+                random.uniform(0, 5)
+
+        node, perigee, anomaly = random.uniform(0, 360, 3)
+
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, "i", 70000 + index, SGP4_EPOCH_DAYS, 0.0, 0.0, 0.0, eccentricity,
+                        math.radians(perigee), math.radians(inclination), math.radians(anomaly),
+                        mean_motion * 2 * math.pi / 1440, math.radians(node))
+
+        line1, line2 = export_tle(satrec)
+
+        lines.extend(["SYNTH-{:05d}".format(index), line1, line2])
+
+    return "\n".join(lines) + "\n"
+
+
+def time_call(function, repeat, setup = None):
+    """
+    Time a function.
+
+    Arguments:
+        function -- the function to time, called without arguments
+        repeat -- how many times to call it
+        setup -- a function called without arguments before every call, outside the timing
+
+    Returns:
+        a list of the seconds every call took, the first call being the one that fills any cache setup doesn't clear
+    """
+
+    seconds = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        started_at = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - started_at)
+
+    return seconds
+
+
+def make_record(benchmark, number_of_satellites, seconds, **parameters):
+    """
+    Make the record of a measurement.
+
+    Arguments:
+        benchmark -- the name of what was measured
+        number_of_satellites -- the size of the catalog
+        seconds -- the seconds every call took, as returned by time_call
+        parameters -- the other parameters of the measurement
+
+    Returns:
+        a dictionary that can be written as JSON
+    """
+
+    record = {"benchmark": benchmark, "satellites": number_of_satellites}
+    record.update(parameters)
+    record.update({"repeat": len(seconds), "first": seconds[0], "best": min(seconds),
+                   "mean": sum(seconds) / len(seconds), "python": platform.python_version(),
+                   "numpy": numpy.__version__})
+
+    return record
+
+
+def run_benchmarks(sizes = (10, 100, 1000), engines = ("vectorized", "batched"), n_windows_list = (24,),
+                   durations = (60,), sample_intervals = (1,), cumulatives = (False, True), repeat = 3, seed = 0,
+                   location = (-37.910496, 145.134021)):
+    """
+    Benchmark loading satellite lists, finding the visible satellites at one time, and find_time over a sweep of
+    its arguments.
+
+    Each size gets its own Scheduler and temporary directory, so nothing is downloaded and nothing is shared between
+    sizes. Loading is timed without the Scheduler's cache of satellite lists, and find_time with the satellite list
+    already loaded, so it times the windows alone.
+
+    Arguments:
+        sizes -- the numbers of satellites of the synthetic satellite lists
+        engines -- the engines find_time is timed with, see scheduler.ENGINES
+        n_windows_list -- the n_windows find_time is timed with
+        durations -- the durations find_time is timed with
+        sample_intervals -- the sample_intervals find_time is timed with, larger than a duration are skipped
+        cumulatives -- the cumulative find_time is timed with
+        repeat -- how many times every measurement is repeated
+        seed -- the seed of the synthetic satellite lists
+        location -- the (lat, lon) of the observer
+
+    Returns:
+        a generator of the record of every measurement, see make_record
+    """
+
+    for number_of_satellites in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            scheduler = Scheduler(offline = True)
+            scheduler._skyload = Loader(directory, verbose = False)
+
+            tle_path = os.path.join(directory, "synthetic.txt")
+
+            with open(tle_path, "w") as tle_file:
+                tle_file.write(make_synthetic_tle(number_of_satellites, seed))
+
+            def clear_caches():
+                scheduler._satellites_cache.clear()
+                scheduler._catalogs_cache.clear()
+                scheduler._sliding_grid = None
+
+            seconds = time_call(lambda: scheduler.get_all_satellites(tle_path), repeat, clear_caches)
+            yield make_record("get_all_satellites", number_of_satellites, seconds)
+
+            seconds = time_call(lambda: scheduler.get_satellite_catalog(tle_path), repeat, clear_caches)
+            yield make_record("get_satellite_catalog", number_of_satellites, seconds)
+
+            satellites_list = scheduler.get_all_satellites(tle_path)
+            catalog = scheduler.get_satellite_catalog(tle_path)
+
+            observer_location = Topos(location[0], location[1])
+            time_of_measurement = scheduler.ts.utc(BENCHMARK_EPOCH)
+
+            for satellites, kind in [(satellites_list, "list"), (catalog, "catalog")]:
+                seconds = time_call(lambda: scheduler.find_visible_satellites_instance(satellites, observer_location,
+                                                                                       time_of_measurement), repeat)
+                yield make_record("find_visible_satellites_instance", number_of_satellites, seconds, satellites_as=kind)
+
+            for engine, n_windows, duration, sample_interval, cumulative in itertools.product(
+                    engines, n_windows_list, durations, sample_intervals, cumulatives):
+
+                if sample_interval > duration:
+                    continue
+
+                seconds = time_call(lambda: scheduler.find_time(tle_path, BENCHMARK_EPOCH, n_windows, duration,
+                                                                sample_interval, cumulative, location, engine),
+                                    repeat, lambda: setattr(scheduler, "_sliding_grid", None))
+
+                yield make_record("find_time", number_of_satellites, seconds, engine = engine, n_windows = n_windows,
+                                  duration = duration, sample_interval = sample_interval, cumulative = cumulative,
+                                  samples = n_windows * (duration // sample_interval))
+
+
+def parse_list(text, item_type):
+    """ Parse a comma separated list of command line values. """
+    return [item_type(item) for item in text.split(",") if item]
+
+
+def parse_bool(text):
+    """ Parse a command line boolean. """
+    if text.lower() not in ("true", "false"):
+        raise ValueError(text)
+
+    return text.lower() == "true"
+
+
+def main(arguments = None):
+    """
+    Run the benchmarks from the command line, writing a line of JSON for every measurement.
+
+    Arguments:
+        arguments -- the command line arguments, defaults to sys.argv
+    """
+
+    parser = argparse.ArgumentParser(description = "Benchmark the scheduler on synthetic satellite lists.")
+    parser.add_argument("--sizes", type = lambda text: parse_list(text, int), default = [10, 100, 1000],
+                        help = "comma separated numbers of satellites, from {} to {}".format(MIN_SATELLITES,
+                                                                                             MAX_SATELLITES))
+    parser.add_argument("--engines", type = lambda text: parse_list(text, str), default = ["vectorized", "batched"])
+    parser.add_argument("--n-windows", type = lambda text: parse_list(text, int), default = [24])
+    parser.add_argument("--durations", type = lambda text: parse_list(text, int), default = [60])
+    parser.add_argument("--sample-intervals", type = lambda text: parse_list(text, int), default = [1])
+    parser.add_argument("--cumulative", type = lambda text: parse_list(text, parse_bool), default = [False, True])
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", help = "file the results are appended to, defaults to standard output")
+
+    options = parser.parse_args(arguments)
+
+    output = open(options.output, "a") if options.output else sys.stdout
+
+    try:
+        for record in run_benchmarks(options.sizes, options.engines, options.n_windows, options.durations,
+                                     options.sample_intervals, options.cumulative, options.repeat, options.seed):
+            output.write(json.dumps(record, sort_keys = True) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
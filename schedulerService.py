@@ -0,0 +1,536 @@
+"""
+A long-running scheduler service answering JSON over HTTP, so satellite lists, catalogs and the timescale stay loaded
+between queries instead of being loaded again by every process.
+
+    python schedulerService.py serve --port 8080 --warm http://celestrak.com/NORAD/elements/visual.txt
+    python schedulerService.py load --url http://127.0.0.1:8080/find_time --body '{"n_windows": 24}'
+
+A query is a POST of the keyword arguments of a Scheduler method as a JSON object to /<method>, for instance
+/find_time, with start_time as an ISO 8601 UTC time and location as [lat, lon]. Identical queries arriving while one
+is being worked out share its result rather than being worked out again.
+"""
+
+
+from scheduler import Scheduler, IllegalArgumentException
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import argparse
+import http.client
+import json
+import math
+import pytz
+import sys
+import threading
+import time
+import urllib.parse
+
+
+# the arguments a query can give to every Scheduler method the service answers
+METHODS = {
+    "find_time": ("satlist_url", "start_time", "n_windows", "duration", "sample_interval", "cumulative", "location",
+                  "engine", "workers", "prune", "adaptive", "visibility", "cull", "memory_budget"),
+    "find_top_windows": ("satlist_url", "start_time", "n_windows", "duration", "sample_interval", "cumulative",
+                         "location", "engine", "adaptive", "top_k"),
+}
+
+# the most processes a query can ask find_time for with workers, and the most bytes it can ask for with memory_budget,
+# unless the service is given others
+MAX_WORKERS = 0
+MAX_MEMORY_BUDGET = 2 * 2 ** 30
+
+# the fewest bytes a query can ask for with memory_budget, as smaller budgets split the catalog into so many chunks that
+# one query would hold the Scheduler for a long time
+MIN_MEMORY_BUDGET = 2 ** 20
+
+# the formats start_time can be given in, always in UTC
+TIME_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+
+
+def parse_time(text):
+    """
+    Parse an ISO 8601 UTC time, naive or ending with Z or +00:00.
+
+    Arguments:
+        text -- the time
+
+    Raises:
+        IllegalArgumentException -- if text isn't a UTC time in one of TIME_FORMATS
+
+    Returns:
+        a UTC datetime
+    """
+
+    """ START Precondition Handling """
+    if type(text) is not str:
+        raise IllegalArgumentException
+    """ END Precondition Handling """
+
+    for suffix in ("Z", "+00:00"):
+        if text.endswith(suffix):
+            text = text[:-len(suffix)]
+
+    for time_format in TIME_FORMATS:
+        try:
+            return pytz.timezone("UTC").localize(datetime.strptime(text, time_format))
+        except ValueError:
+            pass
+
+    raise IllegalArgumentException
+
+
+def format_time(time_of_measurement):
+    """ Format a datetime of a result as an ISO 8601 time, None staying None. """
+    return None if time_of_measurement is None else time_of_measurement.isoformat()
+
+
+class InFlightQuery:
+    """ A query being worked out, which identical queries wait for. """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer:
+    """
+    Merges identical calls made at the same time: the first call for a key works the result out and every call for
+    the same key arriving before it is done waits for it and gets the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def run(self, key, function):
+        """
+        Call a function, or wait for the call already going on for the same key.
+
+        Arguments:
+            key -- a hashable key, the same for calls that have the same result
+            function -- the function to call, without arguments
+
+        Returns:
+            (result, coalesced) where result is what function returned and coalesced is whether it was the result of
+            another call
+        """
+
+        with self._lock:
+            query = self._in_flight.get(key)
+            coalesced = query is not None
+
+            if not coalesced:
+                query = self._in_flight[key] = InFlightQuery()
+
+        if coalesced:
+            query.done.wait()
+        else:
+            try:
+                query.result = function()
+            except Exception as error:
+                query.error = error
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+
+                query.done.set()
+
+        if query.error is not None:
+            raise query.error
+
+        return query.result, coalesced
+
+
+class SchedulerService:
+    """
+    Answers queries with one Scheduler kept for as long as the service runs, so its caches stay warm.
+
+    A Scheduler isn't meant to be used by several threads at once, so different queries are worked out one at a
+    time, while identical queries are merged by a RequestCoalescer.
+    """
+
+    def __init__(self, scheduler = None, max_workers = MAX_WORKERS, max_memory_budget = MAX_MEMORY_BUDGET):
+        """
+        Create a SchedulerService.
+
+        Arguments:
+            scheduler -- the Scheduler to answer queries with (defaults to a new one)
+            max_workers -- the most processes a query can ask find_time for with workers, 0 for none
+            max_memory_budget -- the most bytes a query can ask find_time for with memory_budget
+        """
+
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.max_workers = max_workers
+        self.max_memory_budget = max_memory_budget
+
+        self._coalescer = RequestCoalescer()
+        self._scheduler_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+
+        # how many queries were answered, and how many of them were worked out or shared another one's result
+        self.counters = {"queries": 0, "computations": 0, "coalesced": 0}
+
+    def warm(self, satlist_urls = ()):
+        """
+        Load the timescale and satellite lists before the first query needs them.
+
+        Arguments:
+            satlist_urls -- the satellite lists to load, both as lists of satellites and as catalogs
+        """
+
+        with self._scheduler_lock:
+            # the timescale is made the first time it is used
+            self.scheduler.ts
+
+            for satlist_url in satlist_urls:
+                self.scheduler.get_all_satellites(satlist_url)
+                self.scheduler.get_satellite_catalog(satlist_url)
+
+    def get_arguments(self, method, query):
+        """
+        Check the arguments of a query and turn them into the keyword arguments of the Scheduler method.
+
+        A query without start_time starts at the current minute, so identical queries made in the same minute are
+        still identical.
+
+        Arguments:
+            method -- the name of a method of METHODS
+            query -- the arguments of the query, as a dictionary decoded from JSON
+
+        Raises:
+            IllegalArgumentException -- if the method isn't one of METHODS, or the query has an unknown argument, an
+                                        invalid start_time, a satlist_url that isn't a string or a list of them, more
+                                        workers than max_workers or a memory_budget out of range
+
+        Returns:
+            a dictionary of keyword arguments
+        """
+
+        """ START Precondition Handling """
+        if method not in METHODS or type(query) is not dict:
+            raise IllegalArgumentException
+
+        for name in query:
+            if name not in METHODS[method]:
+                raise IllegalArgumentException
+
+        # anything else would reach the Scheduler as a path, an int as the file descriptor of one of the server's
+        # sockets
+        satlist_urls = query.get("satlist_url", "")
+
+        if type(satlist_urls) is not list and type(satlist_urls) is not tuple:
+            satlist_urls = [satlist_urls]
+
+        for satlist_url in satlist_urls:
+            if type(satlist_url) is not str:
+                raise IllegalArgumentException
+
+        # the other types are left for the Scheduler to reject
+        workers = query.get("workers")
+
+        if type(workers) is int and workers > self.max_workers:
+            raise IllegalArgumentException
+
+        memory_budget = query.get("memory_budget")
+
+        if type(memory_budget) is int and not MIN_MEMORY_BUDGET <= memory_budget <= self.max_memory_budget:
+            raise IllegalArgumentException
+        """ END Precondition Handling """
+
+        arguments = dict(query)
+
+        if "start_time" in arguments:
+            arguments["start_time"] = parse_time(arguments["start_time"])
+        else:
+            arguments["start_time"] = datetime.now(pytz.timezone("UTC")).replace(second=0, microsecond=0)
+
+        if type(arguments.get("location")) is list:
+            arguments["location"] = tuple(arguments["location"])
+
+        if type(arguments.get("satlist_url")) is list:
+            arguments["satlist_url"] = tuple(arguments["satlist_url"])
+
+        return arguments
+
+    def answer(self, method, query):
+        """
+        Answer a query, sharing the result of an identical query being worked out.
+
+        Arguments:
+            method -- the name of a method of METHODS
+            query -- the arguments of the query, as a dictionary decoded from JSON
+
+        Raises:
+            IllegalArgumentException -- if the query is invalid
+
+        Returns:
+            the result as a dictionary that can be written as JSON, for find_time
+                {"start_time": the start of the best window, "satellites": the names of its satellites}
+            and for find_top_windows
+                {"windows": [{"start_time": ..., "count": ..., "satellites": ...} for every window]}
+        """
+
+        arguments = self.get_arguments(method, query)
+
+        key = (method, json.dumps(query, sort_keys=True), arguments["start_time"])
+
+        result, coalesced = self._coalescer.run(key, lambda: self.compute(method, arguments))
+
+        with self._counters_lock:
+            self.counters["queries"] += 1
+            self.counters["coalesced" if coalesced else "computations"] += 1
+
+        return result
+
+    def compute(self, method, arguments):
+        """ Work a query out with the Scheduler, see answer. """
+
+        with self._scheduler_lock:
+            result = getattr(self.scheduler, method)(**arguments)
+
+        if method == "find_top_windows":
+            return {"windows": [{"start_time": format_time(start_time), "count": count, "satellites": satellites}
+                                for start_time, count, satellites in result]}
+
+        return {"start_time": format_time(result[0]), "satellites": result[1]}
+
+
+class SchedulerServer(ThreadingMixIn, HTTPServer):
+    """ An HTTP server answering every connection in its own thread with a SchedulerService. """
+
+    daemon_threads = True
+
+    def __init__(self, service, address = ("127.0.0.1", 8080)):
+        """
+        Create a SchedulerServer, listening straight away.
+
+        Arguments:
+            service -- the SchedulerService answering the queries
+            address -- the (host, port) to listen on, port 0 picking a free port
+        """
+
+        super().__init__(address, SchedulerRequestHandler)
+        self.service = service
+
+    def get_url(self, path = "/"):
+        """ Get the URL of a path of this server. """
+        return "http://{}:{}{}".format(self.server_address[0], self.server_address[1], path)
+
+    def start(self):
+        """
+        Serve in a background thread.
+
+        Returns:
+            the thread
+        """
+
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+
+        return thread
+
+    def stop(self):
+        """ Stop serving and close the listening socket. """
+
+        self.shutdown()
+        self.server_close()
+
+
+class SchedulerRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST /<method> with the result of a query, GET /health and GET /stats with the counters of the service,
+    over keep-alive connections.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self.send_json(200, dict(self.server.service.counters))
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        try:
+            query = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError:
+            self.send_json(400, {"error": "the body isn't a JSON object"})
+            return
+
+        try:
+            result = self.server.service.answer(self.path.lstrip("/"), query)
+        except IllegalArgumentException:
+            self.send_json(400, {"error": "invalid query"})
+            return
+        except Exception as error:
+            self.send_json(500, {"error": str(error)})
+            return
+
+        self.send_json(200, result)
+
+    def send_json(self, status, content):
+        body = json.dumps(content).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *arguments):
+        pass
+
+
+def get_percentile(values, percentile):
+    """
+    Get a percentile of some values, the smallest value at least that share of the values are at most.
+
+    Arguments:
+        values -- a non-empty list of numbers
+        percentile -- the percentile, from 0 to 100
+
+    Returns:
+        the percentile
+    """
+
+    values = sorted(values)
+
+    return values[max(0, int(math.ceil(percentile / 100 * len(values))) - 1)]
+
+
+def run_load(url, bodies, concurrency = 8, total = 100, timeout = 60):
+    """
+    Send queries to a service from several clients at once, each over its own keep-alive connection, and measure
+    the throughput and latencies.
+
+    Arguments:
+        url -- the URL queries are posted to, for instance http://127.0.0.1:8080/find_time
+        bodies -- list of the queries to send, as dictionaries, sent in turn
+        concurrency -- how many clients send queries at the same time
+        total -- how many queries are sent in all
+        timeout -- how long (in seconds) a query can take
+
+    Returns:
+        a dictionary of the number of queries, errors, seconds, queries per second and the p50, p99 and slowest
+        latencies in seconds
+    """
+
+    parts = urllib.parse.urlsplit(url)
+    encoded_bodies = [json.dumps(body).encode("utf-8") for body in bodies]
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    next_query = [0]
+
+    def client():
+        connection = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+
+        try:
+            while True:
+                with lock:
+                    query = next_query[0]
+                    next_query[0] += 1
+
+                if query >= total:
+                    return
+
+                started_at = time.perf_counter()
+
+                try:
+                    connection.request("POST", parts.path, body=encoded_bodies[query % len(encoded_bodies)],
+                                       headers={"Content-Type": "application/json"})
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status != 200
+                except (http.client.HTTPException, OSError):
+                    connection.close()
+                    failed = True
+
+                with lock:
+                    latencies.append(time.perf_counter() - started_at)
+
+                    if failed:
+                        errors.append(query)
+        finally:
+            connection.close()
+
+    started_at = time.perf_counter()
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+
+    for thread in clients:
+        thread.start()
+
+    for thread in clients:
+        thread.join()
+
+    seconds = time.perf_counter() - started_at
+
+    return {"queries": len(latencies), "errors": len(errors), "seconds": seconds,
+            "throughput": len(latencies) / seconds, "p50": get_percentile(latencies, 50),
+            "p99": get_percentile(latencies, 99), "max": max(latencies)}
+
+
+def main(arguments = None):
+    """
+    Run the service, or the load generator against it, from the command line.
+
+    Arguments:
+        arguments -- the command line arguments, defaults to sys.argv
+    """
+
+    parser = argparse.ArgumentParser(description = "Serve scheduler queries as JSON over HTTP.")
+    commands = parser.add_subparsers(dest = "command")
+
+    serve_parser = commands.add_parser("serve", help = "run the service")
+    serve_parser.add_argument("--host", default = "127.0.0.1")
+    serve_parser.add_argument("--port", type = int, default = 8080)
+    serve_parser.add_argument("--offline", action = "store_true", help = "only read satellite lists from the cache")
+    serve_parser.add_argument("--warm", action = "append", default = [],
+                              help = "a satellite list to load before serving, can be repeated")
+    serve_parser.add_argument("--max-workers", type = int, default = MAX_WORKERS,
+                              help = "the most processes a query can ask for with workers, 0 for none")
+    serve_parser.add_argument("--max-memory-budget", type = int, default = MAX_MEMORY_BUDGET,
+                              help = "the most bytes a query can ask for with memory_budget")
+
+    load_parser = commands.add_parser("load", help = "measure the throughput and latencies of a running service")
+    load_parser.add_argument("--url", default = "http://127.0.0.1:8080/find_time")
+    load_parser.add_argument("--body", action = "append", default = [],
+                             help = "a query as a JSON object, can be repeated, defaults to {}")
+    load_parser.add_argument("--concurrency", type = int, default = 8)
+    load_parser.add_argument("--requests", type = int, default = 100)
+
+    options = parser.parse_args(arguments)
+
+    if options.command == "serve":
+        service = SchedulerService(Scheduler(offline = options.offline), options.max_workers,
+                                   options.max_memory_budget)
+        service.warm(options.warm)
+
+        server = SchedulerServer(service, (options.host, options.port))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif options.command == "load":
+        bodies = [json.loads(body) for body in options.body] or [{}]
+
+        sys.stdout.write(json.dumps(run_load(options.url, bodies, options.concurrency, options.requests),
+                                    sort_keys = True) + "\n")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
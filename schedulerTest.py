@@ -2,15 +2,93 @@ import unittest
 from scheduler import Scheduler
 from scheduler import Satellite
 from scheduler import IllegalArgumentException
+from scheduler import BatchPropagator
+from scheduler import EphemerisStore
+from scheduler import SatelliteCatalog
+from scheduler import VisibilityIndex
+from scheduler import SchedulerStats, NULL_STATS
+from scheduler import LazyModule
+from scheduler import get_topocentric_elevations, is_above_horizon
+from scheduler import get_elevation_at, get_elevation_rate_bounds
+from scheduler import read_tle_lines, unpack_visibility, save_array_atomically
+from scheduler import ConnectionPool, merge_by_norad_id
+from scheduler import get_julian_dates, get_sun_positions, is_sunlit, get_reachable_satellites
+from scheduler import SubSatelliteIndex, get_observer_positions, get_sample_offsets
+from scheduler import CHUNK_CELL_BYTES, CHUNK_SAMPLE_BYTES
+from schedulerBenchmark import make_synthetic_tle, run_benchmarks
+from schedulerService import SchedulerService, SchedulerServer, RequestCoalescer, parse_time, run_load
+from schedulerBatch import BatchQuery, group_queries, run_batch, read_queries, main as batch_main
 from datetime import datetime, timedelta
-from unittest.mock import patch, Mock, MagicMock
+from unittest.mock import patch, Mock
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import http.client as http_client
+from socketserver import ThreadingMixIn
+from skyfield.api import EarthSatellite, Loader, Topos, load
+import numpy
+import os
 import pytz
+import subprocess
+import sys
+import json
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
 
 
 naive_testing_time = datetime.now()
 timezone = pytz.timezone("UTC")
 non_naive_testing_time = timezone.localize(naive_testing_time)
 
+# offline satellites with an epoch of 2020-11-11 00:00 UTC, SAT-6 is geostationary above the default location
+testing_epoch = timezone.localize(datetime(2020, 11, 11))
+testing_tle = """SAT-1
+1 25001U          20316.00000000  .00000000  00000-0  00000+0 0    02
+2 25001  51.6000  10.0000 0002000   0.0000   0.0000 15.50000000    06
+SAT-2
+1 25002U          20316.00000000  .00000000  00000-0  00000+0 0    03
+2 25002  97.5000 120.0000 0010000   0.0000  90.0000 14.80000000    08
+SAT-3
+1 25003U          20316.00000000  .00000000  00000-0  00000+0 0    04
+2 25003  53.0000 200.0000 0001000   0.0000 180.0000 15.10000000    09
+SAT-4
+1 25004U          20316.00000000  .00000000  00000-0  00000+0 0    05
+2 25004  65.0000 300.0000 0100000   0.0000  45.0000 13.90000000    00
+SAT-5
+1 25005U          20316.00000000  .00000000  00000-0  00000+0 0    06
+2 25005  28.5000  40.0000 0005000   0.0000 270.0000 15.00000000    03
+SAT-6
+1 25006U          20316.00000000  .00000000  00000-0  00000+0 0    07
+2 25006   0.0500 150.0000 0001000   0.0000  46.0000  1.00270000    07
+SAT-7
+1 25007U          20316.00000000  .00000000  00000-0  00000+0 0    08
+2 25007  82.0000 170.0000 0020000   0.0000  10.0000 14.20000000    04
+SAT-8
+1 25008U          20316.00000000  .00000000  00000-0  00000+0 0    09
+2 25008  43.0000  80.0000 0003000   0.0000 300.0000 15.20000000    06
+"""
+
+
+def build_testing_satellites(scheduler):
+    """ Build the Satellite objects of testing_tle without going through the network. """
+    lines = testing_tle.splitlines()
+    satellites_list = []
+    for index in range(0, len(lines), 3):
+        satellite_info = EarthSatellite(lines[index + 1], lines[index + 2], lines[index], scheduler.ts)
+        satellites_list.append(Satellite(lines[index], satellite_info))
+    return satellites_list
+
+
+def patch_testing_satellites(satellites_list):
+    """ Make the scheduler load satellites_list, both as a list of Satellite objects and as a SatelliteCatalog. """
+    stack = ExitStack()
+    stack.enter_context(patch.object(Scheduler, "get_all_satellites", return_value=satellites_list))
+    stack.enter_context(patch.object(Scheduler, "get_satellite_catalog",
+                                     return_value=SatelliteCatalog.from_satellites(satellites_list)))
+    return stack
+
 
 class SatelliteTest(unittest.TestCase):
     """ Tests for the Satellite class. """
@@ -138,7 +216,7 @@ class SchedulerTest(unittest.TestCase):
                                                   'sat_4': TestingSatellite('sat_2')})
     def test_get_all_satellites(self, mock_skyfield_load_tle):
 
-        satellites_url = MagicMock()
+        satellites_url = "satellites.txt"
 
         satellites_list = self.scheduler.get_all_satellites(satellites_url)
 
@@ -359,5 +437,1860 @@ class SchedulerTest(unittest.TestCase):
         self.assertTrue(visible_satellites == ['sat_1', 'sat_2', 'sat_3', 'sat_4'])
 
 
+class VectorizedSchedulerTest(unittest.TestCase):
+    """ Tests for the vectorized engine of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+    def test_find_time_engine_invalid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="fast")
+
+    def test_get_sample_times(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 3, 60, 25)
+
+        self.assertTrue(len(sample_times) == 6)
+        self.assertTrue(self.check_minutes(sample_times, [0, 25, 60, 85, 120, 145]))
+
+    def test_get_sample_offsets(self):
+        self.assertTrue(get_sample_offsets(3, 60, 25).tolist() == [0, 25, 60, 85, 120, 145])
+        self.assertTrue(get_sample_offsets(1, 30, 30).tolist() == [0])
+
+    def test_get_sample_times_sample_interval_out_of_range(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_sample_times(testing_epoch, 3, 60, 70)
+
+    def check_minutes(self, sample_times, minutes):
+        offsets = (sample_times.tt - self.scheduler.ts.utc(testing_epoch).tt) * 24 * 60
+        return all(abs(offset - minute) < 1e-6 for offset, minute in zip(offsets, minutes))
+
+    def test_get_elevation_matrix_non_satellite(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_elevation_matrix([None], None, None)
+
+    def test_get_elevation_matrix(self):
+        observer_location = Topos(-37.910496, 145.134021)
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 2, 30, 10)
+
+        elevations = self.scheduler.get_elevation_matrix(self.satellites_list, observer_location, sample_times)
+
+        self.assertTrue(elevations.shape == (8, 6))
+        for index in range(len(sample_times)):
+            altitude = self.satellites_list[0].get_altitude(observer_location, sample_times[index])
+            self.assertAlmostEqual(elevations[0, index], altitude.degrees, places=6)
+
+    def test_find_max_visible_satellites_windows_non_cumulative(self):
+        elevations = numpy.array([[10, -1, -1, 5],
+                                  [-1, 10, 10, 5],
+                                  [-1, 10, -1, -1]])
+
+        counts, visible_satellites = self.scheduler.find_max_visible_satellites_windows(elevations, 2, False)
+
+        self.assertTrue(list(counts) == [2, 2])
+        self.assertTrue(visible_satellites.tolist() == [[False, True, True], [True, True, False]])
+
+    def test_find_max_visible_satellites_windows_cumulative(self):
+        elevations = numpy.array([[10, -1, -1, 5],
+                                  [-1, 10, 10, 5],
+                                  [-1, 10, -1, -1]])
+
+        counts, visible_satellites = self.scheduler.find_max_visible_satellites_windows(elevations, 2, True)
+
+        self.assertTrue(list(counts) == [3, 2])
+        self.assertTrue(visible_satellites.tolist() == [[True, True, True], [True, True, False]])
+
+    def test_find_max_visible_satellites_windows_uneven(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_max_visible_satellites_windows(numpy.zeros((3, 5)), 2, False)
+
+    def test_find_time_vectorized_empty_satellites(self):
+        self.assertTrue(self.scheduler.find_time_vectorized([], None, testing_epoch, 4, 60, 5, False) == (None, []))
+
+    def test_find_time_vectorized_matches_loop(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                    sample_interval=10, cumulative=cumulative)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                  sample_interval=10, cumulative=cumulative, engine="vectorized")
+
+            self.assertTrue(len(expected[1]) > 0)
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+
+class BatchPropagatorTest(unittest.TestCase):
+    """ Tests for the BatchPropagator class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+    def test_non_satellite(self):
+        with self.assertRaises(IllegalArgumentException):
+            BatchPropagator([self.satellites_list[0], 'a'])
+
+    def test_get_elevations_matches_skyfield(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 12, 60, 5)
+
+        expected = self.scheduler.get_elevation_matrix(self.satellites_list, self.observer_location, sample_times)
+        actual = BatchPropagator(self.satellites_list).get_elevations(self.observer_location, sample_times)
+
+        self.assertTrue(actual.shape == expected.shape)
+        self.assertTrue(numpy.allclose(actual, expected, atol=1e-6))
+
+    def test_find_time_batched_matches_loop(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                    sample_interval=10, cumulative=cumulative)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                  sample_interval=10, cumulative=cumulative, engine="batched")
+
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+
+class SatelliteCatalogTest(unittest.TestCase):
+    """ Tests for the SatelliteCatalog class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.catalog = SatelliteCatalog.from_satellites(self.satellites_list)
+
+        # SAT-1 is given twice, the last elements given for it are kept in its first place
+        tle_path = os.path.join(self.directory.name, "testing.txt")
+        with open(tle_path, "w") as tle_file:
+            tle_file.write(testing_tle + "\n".join(testing_tle.splitlines()[:3]) + "\n")
+        self.satellites_url = "file://" + tle_path
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_from_satellites_non_satellite(self):
+        with self.assertRaises(IllegalArgumentException):
+            SatelliteCatalog.from_satellites([self.satellites_list[0], 'a'])
+
+    def test_columns(self):
+        self.assertTrue(len(self.catalog) == 8)
+        self.assertTrue(self.catalog.norad_ids.tolist() == list(range(25001, 25009)))
+        self.assertTrue(self.catalog.get_names(numpy.array([5, 0])) == ['SAT-6', 'SAT-1'])
+        self.assertTrue(numpy.allclose(numpy.degrees(self.catalog.inclinations[:2]), [51.6, 97.5]))
+        self.assertTrue(numpy.allclose(self.catalog.epochs, 2459164.5))
+
+    def test_get_tle_lines(self):
+        catalog = SatelliteCatalog.from_tle_lines(self.catalog.get_tle_lines())
+
+        self.assertTrue(catalog.names.tolist() == self.catalog.names.tolist())
+        self.assertTrue(numpy.array_equal(catalog.mean_motions, self.catalog.mean_motions))
+
+    def test_get_satellite_catalog(self):
+        with patch("scheduler.read_tle_lines", wraps=read_tle_lines) as mock_read_tle_lines:
+            catalog = self.scheduler.get_satellite_catalog(self.satellites_url)
+            cached_catalog = self.scheduler.get_satellite_catalog(self.satellites_url)
+
+        satellites_list = self.scheduler.get_all_satellites(self.satellites_url)
+
+        self.assertTrue(cached_catalog is catalog)
+        self.assertTrue(mock_read_tle_lines.call_count == 1)
+        self.assertTrue(catalog.names.tolist() == self.scheduler.satellites_list_to_satellites_name_list(
+            satellites_list))
+        self.assertTrue(catalog.norad_ids.tolist() == [satellite.info.model.satnum for satellite in satellites_list])
+
+    def test_get_satellite_catalog_invalid_url(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_satellite_catalog("invalid_url")
+
+    def test_satellites_list_to_satellites_name_list(self):
+        self.assertTrue(self.scheduler.satellites_list_to_satellites_name_list(self.catalog) ==
+                        ['SAT-{}'.format(number) for number in range(1, 9)])
+
+    def test_find_visible_satellites_instance(self):
+        observer_location = Topos(-37.910496, 145.134021)
+
+        for minutes in [0, 55, 300]:
+            time_of_measurement = self.scheduler.ts.utc(testing_epoch + timedelta(minutes=minutes))
+
+            expected = self.scheduler.find_visible_satellites_instance(self.satellites_list, observer_location,
+                                                                       time_of_measurement)
+            actual = self.scheduler.find_visible_satellites_instance(self.catalog, observer_location,
+                                                                     time_of_measurement)
+
+            self.assertTrue(self.catalog.get_names(actual) ==
+                            self.scheduler.satellites_list_to_satellites_name_list(expected))
+
+
+class SatellitesCacheTest(unittest.TestCase):
+    """ Tests for the caching of satellite lists by the scheduler class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+
+        tle_path = os.path.join(self.directory.name, "testing.txt")
+        with open(tle_path, "w") as tle_file:
+            tle_file.write(testing_tle)
+        self.satellites_url = "file://" + tle_path
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_all_satellites_parsed_once(self):
+        with patch("skyfield.api.load.tle", wraps=load.tle) as mock_skyfield_load_tle:
+            satellites_list = self.scheduler.get_all_satellites(self.satellites_url)
+            cached_satellites_list = self.scheduler.get_all_satellites(self.satellites_url)
+
+        self.assertTrue(len(satellites_list) == 8)
+        self.assertTrue(cached_satellites_list is satellites_list)
+        self.assertTrue(mock_skyfield_load_tle.call_count == 1)
+
+    def test_get_satellites_unhashable_url(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_all_satellites({})
+
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_satellite_catalog({})
+
+        for engine in ["loop", "batched"]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.find_time({}, testing_epoch, engine=engine)
+
+    def test_get_tle_path_downloaded_once(self):
+        with patch.object(Loader, "download", wraps=self.scheduler._skyload.download) as mock_download:
+            path = self.scheduler.get_tle_path(self.satellites_url)
+            cached_path = self.scheduler.get_tle_path(self.satellites_url)
+
+        self.assertTrue(path == cached_path)
+        self.assertTrue(path.startswith(self.directory.name))
+        self.assertTrue(mock_download.call_count == 1)
+
+    def test_get_tle_path_expired(self):
+        self.scheduler.tle_max_age = 0
+
+        with patch.object(Loader, "download", wraps=self.scheduler._skyload.download) as mock_download:
+            self.scheduler.get_tle_path(self.satellites_url)
+            self.scheduler.get_tle_path(self.satellites_url)
+
+        self.assertTrue(mock_download.call_count == 2)
+
+    def test_get_tle_path_offline_expired(self):
+        path = self.scheduler.get_tle_path(self.satellites_url)
+
+        self.scheduler.tle_max_age = 0
+        self.scheduler.offline = True
+
+        self.assertTrue(self.scheduler.get_tle_path(self.satellites_url) == path)
+
+    def test_get_tle_path_offline_not_cached(self):
+        self.scheduler.offline = True
+
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_tle_path(self.satellites_url)
+
+    def test_get_tle_path_not_url(self):
+        self.assertTrue(self.scheduler.get_tle_path("visual.txt") == "visual.txt")
+
+    def test_get_tle_path_not_string(self):
+        for satellite_list_url in [3, b"visual.txt", None]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.get_tle_path(satellite_list_url)
+
+    def test_get_satellite_catalog_file_descriptor(self):
+        read_end, write_end = os.pipe()
+
+        try:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.get_satellite_catalog(read_end)
+
+            # the descriptor is left open
+            os.fstat(read_end)
+        finally:
+            os.close(read_end)
+            os.close(write_end)
+
+
+class TestingServer(ThreadingMixIn, HTTPServer):
+    """ A local stand-in for the servers satellite lists are downloaded from. """
+
+    daemon_threads = True
+
+    def __init__(self, files, delay = 0.0):
+        super().__init__(("127.0.0.1", 0), TestingRequestHandler)
+        self.files = files
+        self.delay = delay
+        self.connections = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def get_url(self, path):
+        return "http://127.0.0.1:{}{}".format(self.server_address[1], path)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TestingRequestHandler(BaseHTTPRequestHandler):
+    """ Serves the files of a TestingServer over keep-alive connections, "/moved" redirecting to the first one. """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+
+        if self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", sorted(self.server.files)[0])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path in self.server.files:
+            content = self.server.files[self.path].encode("ascii")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *arguments):
+        pass
+
+
+class SatelliteSourcesTest(unittest.TestCase):
+    """ Tests for downloading and merging satellite lists from several sources. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+
+        lines = testing_tle.splitlines()
+
+        # the second source repeats SAT-3 with a later epoch, under another name, and adds SAT-9
+        newer_lines = [lines[6].replace("SAT-3", "SAT-3 NEWER"),
+                       lines[7].replace("20316.00000000", "20317.00000000"), lines[8]]
+        extra_lines = ["SAT-9", lines[1].replace("25001", "25009"), lines[2].replace("25001", "25009")]
+
+        self.server = TestingServer({"/first.txt": testing_tle,
+                                     "/second.txt": "\n".join(newer_lines + extra_lines) + "\n"})
+
+    def tearDown(self):
+        self.scheduler._connections.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_get_tle_path_http(self):
+        path = self.scheduler.get_tle_path(self.server.get_url("/first.txt"))
+
+        self.assertTrue(path.startswith(self.directory.name))
+        with open(path) as tle_file:
+            self.assertTrue(tle_file.read() == testing_tle)
+
+    def test_connection_reused(self):
+        self.scheduler.get_tle_path(self.server.get_url("/first.txt"))
+        self.scheduler.get_tle_path(self.server.get_url("/second.txt"))
+
+        self.assertTrue(self.server.connections == 1)
+
+    def test_downloaded_concurrently(self):
+        self.server.delay = 0.3
+
+        started_at = time.perf_counter()
+        paths = self.scheduler.get_tle_paths([self.server.get_url("/first.txt"), self.server.get_url("/second.txt")])
+        seconds = time.perf_counter() - started_at
+
+        self.assertTrue(len(set(paths)) == 2)
+        self.assertTrue(seconds < 0.55)
+
+    def test_redirect_followed(self):
+        self.assertTrue(ConnectionPool().get(self.server.get_url("/moved")) == testing_tle.encode("ascii"))
+
+    def test_not_found(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_tle_path(self.server.get_url("/missing.txt"))
+
+    def test_get_all_satellites_merged(self):
+        satellites_list = self.scheduler.get_all_satellites([self.server.get_url("/first.txt"),
+                                                             self.server.get_url("/second.txt")])
+        names = [satellite.name for satellite in satellites_list]
+
+        self.assertTrue(names == ["SAT-1", "SAT-2", "SAT-3 NEWER", "SAT-4", "SAT-5", "SAT-6", "SAT-7", "SAT-8",
+                                  "SAT-9"])
+        self.assertTrue(satellites_list[2].info.model.satnum == 25003)
+
+    def test_get_satellite_catalog_merged(self):
+        urls = [self.server.get_url("/first.txt"), self.server.get_url("/second.txt")]
+        catalog = self.scheduler.get_satellite_catalog(urls)
+        satellites_list = self.scheduler.get_all_satellites(urls)
+
+        self.assertTrue(catalog.names.tolist() == [satellite.name for satellite in satellites_list])
+        self.assertTrue(catalog.norad_ids.tolist()[-1] == 25009)
+
+    def test_single_source_list(self):
+        satellites_list = self.scheduler.get_all_satellites([self.server.get_url("/first.txt")])
+
+        self.assertTrue(len(satellites_list) == 8)
+
+    def test_no_sources(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_all_satellites([])
+
+    def test_source_not_string(self):
+        for satellite_list_url in [["a", ["b"]], ("a", 3), [{}]]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.get_all_satellites(satellite_list_url)
+
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.get_satellite_catalog(satellite_list_url)
+
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(["a", ["b"]], testing_epoch)
+
+    def test_merge_by_norad_id(self):
+        merged = merge_by_norad_id([[(1, 10.0, "a"), (2, 10.0, "b")], [(2, 11.0, "c"), (1, 9.0, "d"), (3, 1.0, "e")]])
+
+        self.assertTrue(merged == ["a", "c", "e"])
+
+
+class EphemerisStoreTest(unittest.TestCase):
+    """ Tests for the EphemerisStore class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.store = self.scheduler.get_ephemeris_store()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_positions_invalid_grid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.store.get_positions(self.satellites_list, self.scheduler, testing_epoch, 0, 10)
+
+    def test_get_positions_saved_once(self):
+        with patch.object(BatchPropagator, "get_positions", side_effect=BatchPropagator.get_positions,
+                          autospec=True) as mock_get_positions:
+            positions = self.store.get_positions(self.satellites_list, self.scheduler, testing_epoch, 5, 12)
+            saved_positions = self.store.get_positions(self.satellites_list, self.scheduler, testing_epoch, 5, 12)
+
+        self.assertTrue(mock_get_positions.call_count == 1)
+        self.assertTrue(positions.shape == (8, 12, 3))
+        self.assertTrue(positions.dtype == numpy.float32)
+        self.assertTrue(isinstance(saved_positions, numpy.memmap))
+        self.assertTrue(numpy.array_equal(positions, saved_positions))
+
+    def test_get_positions_evicts_least_recently_used(self):
+        store = EphemerisStore(self.store.directory)
+        paths = [store.get_path(self.satellites_list, testing_epoch + timedelta(hours=hours), 5, 12)
+                 for hours in range(3)]
+
+        for hours in [0, 1]:
+            store.get_positions(self.satellites_list, self.scheduler, testing_epoch + timedelta(hours=hours), 5, 12)
+            os.utime(paths[hours], (hours, hours))
+
+        # room for two grids
+        store.max_bytes = 2 * os.path.getsize(paths[0])
+
+        # reading the first grid again makes the second the least recently used
+        store.get_positions(self.satellites_list, self.scheduler, testing_epoch, 5, 12)
+        store.get_positions(self.satellites_list, self.scheduler, testing_epoch + timedelta(hours=2), 5, 12)
+
+        self.assertTrue([os.path.exists(path) for path in paths] == [True, False, True])
+
+    def test_save_array_atomically(self):
+        path = os.path.join(self.directory.name, "arrays", "positions-a.npy")
+
+        save_array_atomically(path, numpy.arange(4))
+
+        # a failed write leaves the saved file and no temporary file behind
+        with patch("numpy.save", side_effect=OSError):
+            with self.assertRaises(OSError):
+                save_array_atomically(path, numpy.arange(8))
+
+        self.assertTrue(numpy.array_equal(numpy.load(path), numpy.arange(4)))
+        self.assertTrue(os.listdir(os.path.dirname(path)) == ["positions-a.npy"])
+
+    def test_get_path_depends_on_grid(self):
+        path = self.store.get_path(self.satellites_list, testing_epoch, 5, 12)
+
+        self.assertTrue(path == self.store.get_path(self.satellites_list, testing_epoch, 5, 12))
+        self.assertTrue(path != self.store.get_path(self.satellites_list, testing_epoch, 5, 13))
+        self.assertTrue(path != self.store.get_path(self.satellites_list[1:], testing_epoch, 5, 12))
+
+    def test_get_elevation_matrix_from_ephemeris_matches_batched(self):
+        for location in [(-37.910496, 145.134021), (51.5, -0.1)]:
+            observer_location = Topos(location[0], location[1])
+            sample_times = self.scheduler.get_sample_times(testing_epoch, 4, 60, 25)
+
+            expected = self.scheduler.get_elevation_matrix(self.satellites_list, observer_location, sample_times,
+                                                           "batched")
+            actual = self.scheduler.get_elevation_matrix_from_ephemeris(self.satellites_list, observer_location,
+                                                                        testing_epoch, 4, 60, 25)
+
+            self.assertTrue(numpy.allclose(actual, expected, atol=1e-6, equal_nan=True))
+
+    def test_find_time_ephemeris_matches_loop(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                    sample_interval=10, cumulative=cumulative)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                  sample_interval=10, cumulative=cumulative, engine="ephemeris")
+
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+
+class VisibilityIndexTest(unittest.TestCase):
+    """ Tests for the VisibilityIndex class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.catalog = SatelliteCatalog.from_satellites(self.satellites_list)
+        self.observer_location = Topos(-37.910496, 145.134021)
+        self.index = self.scheduler.get_visibility_index()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_visibility_invalid_grid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.index.get_visibility(self.catalog, self.observer_location, self.scheduler, testing_epoch, 5, 0)
+
+    def test_get_visibility_saved_once(self):
+        with patch.object(BatchPropagator, "get_elevations", side_effect=BatchPropagator.get_elevations,
+                          autospec=True) as mock_get_elevations:
+            visibility = self.index.get_visibility(self.catalog, self.observer_location, self.scheduler,
+                                                   testing_epoch, 5, 50)
+            self.index.get_visibility(self.catalog, self.observer_location, self.scheduler, testing_epoch, 5, 20)
+            self.assertTrue(mock_get_elevations.call_count == 1)
+
+            # a longer grid replaces the saved one
+            longer_visibility = self.index.get_visibility(self.catalog, self.observer_location, self.scheduler,
+                                                          testing_epoch, 5, 100)
+            self.assertTrue(mock_get_elevations.call_count == 2)
+
+        self.assertTrue(isinstance(visibility, numpy.memmap))
+        self.assertTrue(visibility.shape == (8, 7))
+        self.assertTrue(longer_visibility.shape == (8, 13))
+
+    def test_get_visibility_evicts_least_recently_used(self):
+        index = VisibilityIndex(self.index.directory, max_bytes=1)
+
+        first_path = index.get_path(self.catalog, self.observer_location, testing_epoch, 5)
+        second_path = index.get_path(self.catalog, Topos(51.5, -0.1), testing_epoch, 5)
+
+        index.get_visibility(self.catalog, self.observer_location, self.scheduler, testing_epoch, 5, 20)
+        index.get_visibility(self.catalog, Topos(51.5, -0.1), self.scheduler, testing_epoch, 5, 20)
+
+        # the file just saved is kept even though it alone is over max_bytes
+        self.assertFalse(os.path.exists(first_path))
+        self.assertTrue(os.path.exists(second_path))
+
+    def test_get_path_depends_on_location(self):
+        path = self.index.get_path(self.catalog, self.observer_location, testing_epoch, 5)
+
+        self.assertTrue(path == self.index.get_path(self.satellites_list, self.observer_location, testing_epoch, 5))
+        self.assertTrue(path != self.index.get_path(self.catalog, Topos(51.5, -0.1), testing_epoch, 5))
+        self.assertTrue(path != self.index.get_path(self.catalog, self.observer_location, testing_epoch, 10))
+
+    def test_unpack_visibility(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 1, 5 * 40, 5)
+        expected = BatchPropagator(self.catalog).get_elevations(self.observer_location, sample_times) > 0
+
+        visibility = self.index.get_visibility(self.catalog, self.observer_location, self.scheduler, testing_epoch,
+                                               5, 40)
+
+        for sample_indices in [numpy.arange(40), numpy.array([3, 9, 17, 38]), numpy.array([12])]:
+            self.assertTrue(numpy.array_equal(unpack_visibility(visibility, sample_indices),
+                                              expected[:, sample_indices]))
+
+    def test_find_time_index_matches_batched(self):
+        # the longest query first, so the others are read from its index
+        queries = [(n_windows, duration, cumulative) for n_windows, duration in [(12, 60), (6, 60), (8, 90), (24, 30)]
+                   for cumulative in [False, True]]
+
+        with patch_testing_satellites(self.satellites_list):
+            expected = [self.scheduler.find_time(start_time=testing_epoch, n_windows=n_windows, duration=duration,
+                                                 sample_interval=10, cumulative=cumulative, engine="batched")
+                        for n_windows, duration, cumulative in queries]
+
+            with patch.object(BatchPropagator, "get_elevations", side_effect=BatchPropagator.get_elevations,
+                              autospec=True) as mock_get_elevations:
+                actual = [self.scheduler.find_time(start_time=testing_epoch, n_windows=n_windows, duration=duration,
+                                                   sample_interval=10, cumulative=cumulative, engine="index")
+                          for n_windows, duration, cumulative in queries]
+
+        self.assertTrue(actual == expected)
+        self.assertTrue(mock_get_elevations.call_count == 1)
+
+
+class SlidingHorizonTest(unittest.TestCase):
+    """ Tests for reusing the last grid of samples of the batched engine of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.catalog = SatelliteCatalog.from_satellites(self.satellites_list)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+    def get_visibility_matrix(self, start_time, n_windows, duration, sample_interval):
+        sample_times = self.scheduler.get_sample_times(start_time, n_windows, duration, sample_interval)
+        return BatchPropagator(self.catalog).get_elevations(self.observer_location, sample_times) > 0
+
+    def test_rolling_queries_propagate_tail(self):
+        start_times = [testing_epoch + timedelta(minutes=minutes) for minutes in range(0, 50, 10)]
+
+        with patch.object(BatchPropagator, "get_elevations", side_effect=BatchPropagator.get_elevations,
+                          autospec=True) as mock_get_elevations:
+            actual = [self.scheduler.get_visibility_matrix_sliding(self.catalog, self.observer_location, start_time,
+                                                                   6, 60, 5)
+                      for start_time in start_times]
+
+        for start_time, visibility in zip(start_times, actual):
+            self.assertTrue(numpy.array_equal(visibility, self.get_visibility_matrix(start_time, 6, 60, 5)))
+
+        # the first query propagates all 72 samples, the others only the 2 samples past the last one
+        self.assertTrue([len(call[0][2]) for call in mock_get_elevations.call_args_list] == [72, 2, 2, 2, 2])
+
+        # the samples before the last start are dropped
+        _, grid_start, grid_visibility = self.scheduler._sliding_grid
+        self.assertTrue(grid_start == testing_epoch + timedelta(minutes=40))
+        self.assertTrue(grid_visibility.shape == (8, 72))
+
+    def test_query_inside_last_grid(self):
+        self.scheduler.get_visibility_matrix_sliding(self.catalog, self.observer_location, testing_epoch, 12, 60, 10)
+
+        with patch.object(BatchPropagator, "get_elevations") as mock_get_elevations:
+            actual = self.scheduler.get_visibility_matrix_sliding(self.catalog, self.observer_location,
+                                                                  testing_epoch + timedelta(hours=1), 4, 90, 10)
+
+        self.assertTrue(mock_get_elevations.call_count == 0)
+        self.assertTrue(numpy.array_equal(actual, self.get_visibility_matrix(testing_epoch + timedelta(hours=1),
+                                                                             4, 90, 10)))
+
+    def test_grid_not_reused(self):
+        self.scheduler.get_visibility_matrix_sliding(self.catalog, self.observer_location, testing_epoch, 6, 60, 10)
+
+        # off the grid's step, before its start, for another observer, and past its end
+        for start_time, observer_location in [(testing_epoch + timedelta(minutes=3), self.observer_location),
+                                              (testing_epoch - timedelta(minutes=10), self.observer_location),
+                                              (testing_epoch, Topos(51.5, -0.1)),
+                                              (testing_epoch + timedelta(hours=7), Topos(51.5, -0.1))]:
+            with patch.object(BatchPropagator, "get_elevations", side_effect=BatchPropagator.get_elevations,
+                              autospec=True) as mock_get_elevations:
+                self.scheduler.get_visibility_matrix_sliding(self.catalog, observer_location, start_time, 6, 60, 10)
+
+            self.assertTrue(len(mock_get_elevations.call_args[0][2]) == 36)
+
+    def test_find_time_batched_rolling(self):
+        with patch_testing_satellites(self.satellites_list):
+            for minutes in range(0, 120, 20):
+                start_time = testing_epoch + timedelta(minutes=minutes)
+
+                actual = self.scheduler.find_time(start_time=start_time, n_windows=6, duration=60, sample_interval=5,
+                                                  engine="batched")
+                expected = self.scheduler.find_time(start_time=start_time, n_windows=6, duration=60,
+                                                    sample_interval=5, engine="vectorized")
+
+                self.assertTrue(actual[0] == expected[0])
+                self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+
+class OpticalVisibilityTest(unittest.TestCase):
+    """ Tests for the optical visibility model of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+        # the night of the testing epoch at the default location, from 10:00 to 16:00 UTC
+        self.night_start = testing_epoch + timedelta(hours=10)
+
+    def test_sun_altitude(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 1, 24 * 60, 60)
+
+        altitudes = get_topocentric_elevations(get_sun_positions(*get_julian_dates(sample_times)),
+                                               self.observer_location)
+
+        # close to local solar noon and midnight, with a declination of about -17.5 degrees
+        self.assertTrue(abs(altitudes[2] - 69.6) < 0.5)
+        self.assertTrue(abs(altitudes[14] + 34.4) < 0.5)
+
+    def test_is_sunlit(self):
+        sun_positions = numpy.array([[1.5e8, 0, 0]] * 4)
+        positions = numpy.array([[[-7000, 0, 0], [-7000, 7000, 0], [7000, 0, 0], [numpy.nan] * 3]])
+
+        self.assertTrue(is_sunlit(positions, sun_positions).tolist() == [[False, True, True, False]])
+
+    def test_daylight_not_propagated(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 6, 60, 10)
+
+        with patch.object(BatchPropagator, "get_positions_from_julian_dates") as mock_get_positions:
+            visibility = self.scheduler.get_optical_visibility_matrix(self.satellites_list, self.observer_location,
+                                                                      sample_times)
+
+        self.assertTrue(visibility.shape == (8, 36))
+        self.assertFalse(visibility.any())
+        mock_get_positions.assert_not_called()
+
+    def test_only_dark_samples_propagated(self):
+        self.scheduler.instrument = True
+
+        with patch_testing_satellites(self.satellites_list):
+            self.scheduler.find_time(start_time=testing_epoch, n_windows=24, duration=60,
+                                     sample_interval=10, engine="batched", visibility="optical")
+
+        counters = self.scheduler.last_stats.counters
+        self.assertTrue(0 < counters["dark_samples"] < counters["samples"])
+
+    def test_optical_matrix(self):
+        sample_times = self.scheduler.get_sample_times(self.night_start, 6, 60, 5)
+
+        visibility = self.scheduler.get_optical_visibility_matrix(self.satellites_list, self.observer_location,
+                                                                  sample_times)
+
+        positions = BatchPropagator(self.satellites_list).get_positions(sample_times)
+        sun_positions = get_sun_positions(*get_julian_dates(sample_times))
+
+        above_horizon = get_topocentric_elevations(positions, self.observer_location) > 0
+        dark = get_topocentric_elevations(sun_positions, self.observer_location) < -6
+
+        self.assertTrue(visibility.tolist() == (above_horizon & is_sunlit(positions, sun_positions) & dark).tolist())
+        self.assertTrue(0 < visibility.sum() < above_horizon.sum())
+
+    def test_find_time_optical_engines_agree(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=self.night_start, n_windows=6, duration=60,
+                                                    sample_interval=5, cumulative=cumulative, engine="vectorized",
+                                                    visibility="optical")
+                actual = self.scheduler.find_time(start_time=self.night_start, n_windows=6, duration=60,
+                                                  sample_interval=5, cumulative=cumulative, engine="batched",
+                                                  visibility="optical")
+
+            self.assertTrue(actual == expected)
+
+    def test_visibility_invalid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="batched", visibility="radar")
+
+    def test_optical_engine_invalid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="loop", visibility="optical")
+
+
+class CullingTest(unittest.TestCase):
+    """ Tests for leaving out the satellites that can never rise at the observer. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+        # far enough north that only the high inclination and geostationary satellites can rise
+        self.location = (75.0, 20.0)
+
+    def test_get_reachable_satellites(self):
+        # about 550 km high, prograde and retrograde at 10 degrees, then geostationary
+        inclinations = numpy.radians([10.0, 170.0, 0.05])
+        eccentricities = numpy.array([0.001, 0.001, 0.0001])
+        mean_motions = numpy.array([15.1, 15.1, 1.0027]) * 2 * numpy.pi / 1440
+
+        self.assertTrue(get_reachable_satellites(inclinations, eccentricities, mean_motions, 60).tolist() ==
+                        [False, False, True])
+        self.assertTrue(get_reachable_satellites(inclinations, eccentricities, mean_motions, -20).tolist() ==
+                        [True, True, True])
+
+    def test_get_reachable_satellites_invalid_orbit(self):
+        reachable = get_reachable_satellites(numpy.array([0.0]), numpy.array([0.0]), numpy.array([0.0]), 89)
+
+        self.assertTrue(reachable.tolist() == [True])
+
+    def test_culled_satellites_never_rise(self):
+        culled_list = self.scheduler.cull_unreachable_satellites(self.satellites_list, self.location)
+        culled_names = set(satellite.name for satellite in self.satellites_list) - \
+            set(satellite.name for satellite in culled_list)
+
+        self.assertTrue(len(culled_names) >= 2)
+
+        culled = [satellite for satellite in self.satellites_list if satellite.name in culled_names]
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 1, 24 * 60, 5)
+        elevations = BatchPropagator(culled).get_elevations(Topos(*self.location), sample_times)
+
+        self.assertTrue((elevations < 0).all())
+
+    def test_cull_catalog_matches_list(self):
+        catalog = SatelliteCatalog.from_satellites(self.satellites_list)
+
+        culled_catalog = self.scheduler.cull_unreachable_satellites(catalog, self.location)
+        culled_list = self.scheduler.cull_unreachable_satellites(self.satellites_list, self.location)
+
+        self.assertTrue(culled_catalog.names.tolist() == [satellite.name for satellite in culled_list])
+        self.assertTrue(self.scheduler.cull_unreachable_satellites(catalog, self.location) is culled_catalog)
+
+    def test_find_time_cull_same_result(self):
+        self.scheduler.instrument = True
+
+        for engine in ["loop", "vectorized", "batched"]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                    sample_interval=10, cumulative=True, location=self.location,
+                                                    engine=engine)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                  sample_interval=10, cumulative=True, location=self.location,
+                                                  engine=engine, cull=True)
+
+            self.assertTrue(actual == expected)
+            self.assertTrue(self.scheduler.last_stats.counters["culled"] >= 2)
+
+    def test_cull_invalid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(cull="yes")
+
+
+class CoverageMapTest(unittest.TestCase):
+    """ Tests for the coverage map of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+        # unsorted longitudes either side of the antimeridian, and latitudes close to the poles
+        self.latitudes = [-89.5, -60, -37.910496, 0, 45, 89]
+        self.longitudes = [170.0, -180, -150.5, 0, 145.134021, 179.9]
+
+    def test_get_observer_positions(self):
+        observers, zeniths = get_observer_positions(numpy.array([-37.9, 60.0]), numpy.array([145.1, -20.0]))
+
+        self.assertTrue(observers.shape == (2, 2, 3))
+        self.assertTrue(numpy.allclose(observers[0, 0], Topos(-37.9, 145.1).itrs_xyz.km, rtol=0, atol=1e-6))
+        self.assertTrue(numpy.allclose(observers[1, 1], Topos(60.0, -20.0).itrs_xyz.km, rtol=0, atol=1e-6))
+        self.assertTrue(numpy.allclose(numpy.linalg.norm(zeniths, axis=2), 1))
+
+    def test_get_candidates(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 1, 60, 10)
+        positions = BatchPropagator(self.satellites_list).get_positions(sample_times)
+        observer_location = Topos(75.0, 20.0)
+
+        index = SubSatelliteIndex(positions)
+        candidates = set(index.points[index.get_candidates(75.0)].tolist())
+
+        # every visible satellite is a candidate, and some satellites aren't
+        visible = numpy.flatnonzero(get_topocentric_elevations(positions, observer_location).ravel() > 0)
+        self.assertTrue(set(visible.tolist()) <= candidates)
+        self.assertTrue(len(candidates) < positions.shape[0] * positions.shape[1])
+
+    def test_find_coverage_map_matches_find_time(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                window_starts, counts = self.scheduler.find_coverage_map(
+                    start_time=testing_epoch, n_windows=4, duration=60, sample_interval=10, cumulative=cumulative,
+                    latitudes=self.latitudes, longitudes=self.longitudes)
+
+                for row, latitude in enumerate(self.latitudes):
+                    for column, longitude in enumerate(self.longitudes):
+                        expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=4, duration=60,
+                                                            sample_interval=10, cumulative=cumulative,
+                                                            location=(float(latitude), float(longitude)),
+                                                            engine="vectorized")
+
+                        self.assertTrue(window_starts[row][column] == expected[0])
+                        self.assertTrue(counts[row, column] == len(expected[1]))
+
+            self.assertTrue(counts.shape == (6, 6))
+            self.assertTrue(counts.sum() > 0)
+
+    def test_find_coverage_map_empty_satellites(self):
+        with patch.object(Scheduler, "get_satellite_catalog", return_value=SatelliteCatalog([], [])):
+            window_starts, counts = self.scheduler.find_coverage_map(start_time=testing_epoch, latitudes=[0, 10],
+                                                                     longitudes=[0])
+
+        self.assertTrue(window_starts == [[None], [None]])
+        self.assertTrue(counts.tolist() == [[0], [0]])
+
+    def test_find_coverage_map_latitude_out_of_range(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_coverage_map(latitudes=[0, 91], longitudes=[0])
+
+    def test_find_coverage_map_repeated_longitudes(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_coverage_map(latitudes=[0], longitudes=[10, 10])
+
+    def test_find_coverage_map_no_latitudes(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_coverage_map(latitudes=[], longitudes=[0])
+
+
+class ChunkedSchedulerTest(unittest.TestCase):
+    """ Tests for evaluating the windows of the scheduler class within a memory budget. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+    def find_time(self, **arguments):
+        with patch_testing_satellites(self.satellites_list):
+            return self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60, sample_interval=10,
+                                            **arguments)
+
+    def get_memory_budget(self, satellites, samples):
+        """ The memory budget of chunks of satellites by samples of the testing satellites, 6 windows of 6 samples. """
+        return 6 * 8 + 8 * 36 + satellites * samples * CHUNK_CELL_BYTES + samples * CHUNK_SAMPLE_BYTES
+
+    def test_find_time_chunked_matches_batched(self):
+        # the whole grid at once, whole windows of every satellite, parts of windows of every satellite, and single
+        # samples of some satellites
+        for satellites, samples in [(8, 36), (8, 12), (8, 4), (2, 1)]:
+            for cumulative in [False, True]:
+                expected = self.find_time(cumulative=cumulative, engine="batched")
+                actual = self.find_time(cumulative=cumulative, engine="vectorized",
+                                        memory_budget=self.get_memory_budget(satellites, samples))
+
+                self.assertTrue(len(expected[1]) > 0)
+                self.assertTrue(actual == expected)
+
+    def test_find_time_chunked_counts_chunks(self):
+        self.scheduler.instrument = True
+
+        self.find_time(engine="batched", cumulative=True, memory_budget=self.get_memory_budget(8, 12))
+        self.assertTrue(self.scheduler.last_stats.counters["chunks"] == 3)
+
+        # the best samples of the windows are propagated again without cumulative
+        self.find_time(engine="batched", cumulative=False, memory_budget=self.get_memory_budget(8, 12))
+        self.assertTrue(self.scheduler.last_stats.counters["chunks"] == 4)
+
+    def test_find_time_chunked_peak_memory(self):
+        catalog = SatelliteCatalog.from_satellites(self.satellites_list)
+        observer_location = Topos(-37.910496, 145.134021)
+        memory_budget = 256 * 1024
+
+        # the timescale is made before measuring, as it is kept by the Scheduler
+        self.scheduler.get_sample_times(testing_epoch, 1, 60, 1)
+
+        tracemalloc.start()
+        try:
+            self.scheduler.find_time_chunked(catalog, observer_location, testing_epoch, 24 * 7, 60, 1, False,
+                                             memory_budget)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertTrue(peak < memory_budget)
+
+    def test_find_time_chunked_empty_satellites(self):
+        self.assertTrue(self.scheduler.find_time_chunked(SatelliteCatalog([], []), None, testing_epoch, 4, 60, 5,
+                                                         False, 1000) == (None, []))
+
+    def test_memory_budget_too_small(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.find_time(engine="batched", memory_budget=CHUNK_CELL_BYTES)
+
+    def test_memory_budget_invalid(self):
+        for memory_budget in [0, -1, 1.5e6, "1M"]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.find_time(engine="batched", memory_budget=memory_budget)
+
+    def test_memory_budget_engine_invalid(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="loop", memory_budget=10 ** 6)
+
+
+class SchedulerServiceTest(unittest.TestCase):
+    """ Tests for the scheduler service. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+        self.patches = patch_testing_satellites(self.satellites_list)
+        self.patches.__enter__()
+
+        self.service = SchedulerService(self.scheduler)
+        self.server = SchedulerServer(self.service, ("127.0.0.1", 0))
+        self.server.start()
+
+        self.query = {"start_time": "2020-11-11T00:00:00Z", "n_windows": 6, "duration": 60, "sample_interval": 10,
+                      "engine": "batched"}
+
+    def tearDown(self):
+        self.server.stop()
+        self.patches.__exit__(None, None, None)
+
+    def post(self, path, body):
+        connection = http_client.HTTPConnection(self.server.server_address[0], self.server.server_address[1])
+
+        try:
+            connection.request("POST", path, body=body if type(body) is bytes else json.dumps(body).encode("utf-8"))
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode("utf-8"))
+        finally:
+            connection.close()
+
+    def test_find_time(self):
+        status, result = self.post("/find_time", self.query)
+
+        expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60, sample_interval=10,
+                                            engine="batched")
+
+        self.assertTrue(status == 200)
+        self.assertTrue(result == {"start_time": expected[0].isoformat(), "satellites": expected[1]})
+
+    def test_find_top_windows(self):
+        query = dict(self.query, top_k=2)
+
+        status, result = self.post("/find_top_windows", query)
+
+        self.assertTrue(status == 200)
+        self.assertTrue(len(result["windows"]) == 2)
+        self.assertTrue(result["windows"][0]["count"] >= result["windows"][1]["count"])
+
+    def test_identical_queries_coalesced(self):
+        def slow_find_time(*arguments, **keyword_arguments):
+            time.sleep(0.3)
+            return testing_epoch, ["SAT-1"]
+
+        with patch.object(Scheduler, "find_time", side_effect=slow_find_time) as mock_find_time:
+            load = run_load(self.server.get_url("/find_time"), [self.query], concurrency=5, total=5)
+
+        self.assertTrue(load["queries"] == 5 and load["errors"] == 0)
+        self.assertTrue(mock_find_time.call_count == 1)
+        self.assertTrue(self.service.counters == {"queries": 5, "computations": 1, "coalesced": 4})
+
+    def test_different_queries_not_coalesced(self):
+        with patch.object(Scheduler, "find_time", return_value=(None, [])) as mock_find_time:
+            run_load(self.server.get_url("/find_time"), [self.query, dict(self.query, cumulative=True)],
+                     concurrency=1, total=2)
+
+        self.assertTrue(mock_find_time.call_count == 2)
+
+    def test_run_load(self):
+        load = run_load(self.server.get_url("/find_time"), [self.query], concurrency=4, total=20)
+
+        self.assertTrue(load["queries"] == 20 and load["errors"] == 0)
+        self.assertTrue(0 < load["p50"] <= load["p99"] <= load["max"])
+        self.assertTrue(load["throughput"] > 0)
+
+    def test_invalid_queries(self):
+        self.assertTrue(self.post("/find_time", dict(self.query, n_windows=0))[0] == 400)
+        self.assertTrue(self.post("/find_time", dict(self.query, colour="red"))[0] == 400)
+        self.assertTrue(self.post("/find_time", dict(self.query, start_time="2020-11-11T00:00:00+10:00"))[0] == 400)
+        self.assertTrue(self.post("/get_tle_path", {})[0] == 400)
+        self.assertTrue(self.post("/find_time", b"{")[0] == 400)
+
+    def test_workers_capped(self):
+        with patch.object(Scheduler, "find_time", return_value=(None, [])) as mock_find_time:
+            self.assertTrue(self.post("/find_time", dict(self.query, workers=1))[0] == 400)
+
+            self.service.max_workers = 2
+
+            self.assertTrue(self.post("/find_time", dict(self.query, workers=5000))[0] == 400)
+            self.assertTrue(self.post("/find_time", dict(self.query, workers=2))[0] == 200)
+
+        self.assertTrue(mock_find_time.call_count == 1)
+        self.assertTrue(mock_find_time.call_args[1]["workers"] == 2)
+
+    def test_memory_budget_capped(self):
+        self.service.max_memory_budget = 2 ** 24
+
+        with patch.object(Scheduler, "find_time", return_value=(None, [])) as mock_find_time:
+            for memory_budget in [2 ** 24 + 1, 10 ** 12, 1000]:
+                self.assertTrue(self.post("/find_time", dict(self.query, memory_budget=memory_budget))[0] == 400)
+
+            self.assertTrue(self.post("/find_time", dict(self.query, memory_budget=2 ** 24))[0] == 200)
+
+        self.assertTrue(mock_find_time.call_count == 1)
+
+    def test_satlist_url_not_string(self):
+        with patch.object(SchedulerService, "compute") as mock_compute:
+            for satlist_url in [self.server.fileno(), 3.5, None, {"url": "visual.txt"}, ["visual.txt", 3]]:
+                self.assertTrue(self.post("/find_time", dict(self.query, satlist_url=satlist_url))[0] == 400)
+
+        self.assertTrue(mock_compute.call_count == 0)
+
+        # the server is still listening
+        self.assertTrue(self.post("/find_time", self.query)[0] == 200)
+
+    def test_health(self):
+        connection = http_client.HTTPConnection(self.server.server_address[0], self.server.server_address[1])
+        connection.request("GET", "/health")
+
+        self.assertTrue(json.loads(connection.getresponse().read().decode("utf-8")) == {"status": "ok"})
+        connection.close()
+
+    def test_parse_time(self):
+        for text in ["2020-11-11T00:00:00", "2020-11-11T00:00:00Z", "2020-11-11T00:00:00.000+00:00", "2020-11-11"]:
+            self.assertTrue(parse_time(text) == testing_epoch)
+
+    def test_coalesced_error(self):
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.2)
+            raise IllegalArgumentException
+
+        def run():
+            try:
+                coalescer.run("key", failing)
+            except IllegalArgumentException:
+                errors.append(True)
+
+        first = threading.Thread(target=run)
+        first.start()
+        started.wait()
+        run()
+        first.join()
+
+        self.assertTrue(errors == [True, True])
+
+
+class BatchRunnerTest(unittest.TestCase):
+    """ Tests for running batches of queries. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+        self.patches = patch_testing_satellites(self.satellites_list)
+        self.patches.__enter__()
+
+        # two queries overlapping in time with different sample times, and one a day later
+        self.queries = [
+            {"id": "a", "start_time": "2020-11-11T00:00:00Z", "n_windows": 4, "duration": 60, "sample_interval": 10},
+            {"id": "b", "start_time": "2020-11-11T01:05:00Z", "n_windows": 3, "duration": 30, "sample_interval": 15,
+             "cumulative": True, "location": [51.5, -0.1]},
+            {"id": "c", "start_time": "2020-11-12T00:00:00", "n_windows": 2, "duration": 60, "sample_interval": 5,
+             "location": [10.0, 100.0]}]
+
+    def tearDown(self):
+        self.patches.__exit__(None, None, None)
+
+    def get_expected(self, query):
+        return self.scheduler.find_time(start_time=parse_time(query["start_time"]), n_windows=query["n_windows"],
+                                        duration=query["duration"], sample_interval=query["sample_interval"],
+                                        cumulative=query.get("cumulative", False),
+                                        location=tuple(query.get("location", (-37.910496, 145.134021))),
+                                        engine="batched")
+
+    def test_run_batch_matches_find_time(self):
+        expected = {query["id"]: self.get_expected(query) for query in self.queries}
+
+        results = list(run_batch(self.queries, self.scheduler))
+
+        self.assertTrue(sorted(result["id"] for result in results) == ["a", "b", "c"])
+
+        for result in results:
+            start_time, satellites = expected[result["id"]]
+
+            self.assertTrue(result["start_time"] == (None if start_time is None else start_time.isoformat()))
+            self.assertTrue(result["satellites"] == satellites)
+
+    def test_run_batch_propagates_once_per_group(self):
+        with patch.object(BatchPropagator, "get_positions_from_julian_dates", autospec=True,
+                          side_effect=BatchPropagator.get_positions_from_julian_dates) as mock_get_positions:
+            list(run_batch(self.queries * 20, self.scheduler))
+
+        self.assertTrue(mock_get_positions.call_count == 2)
+
+    def test_group_queries(self):
+        queries = [BatchQuery(index, query, self.scheduler) for index, query in enumerate(self.queries)]
+
+        groups = group_queries(queries, 1000)
+
+        self.assertTrue([[query.id for query in group] for group, _ in groups] == [["a", "b"], ["c"]])
+        # 80, 110 and 140 minutes are sample times of both
+        self.assertTrue(len(groups[0][1]) == 24 + 6 - 3)
+
+        # too few sample times for the overlapping queries to share a group
+        self.assertTrue(len(group_queries(queries, 24)) == 3)
+
+    def test_run_batch_invalid_queries(self):
+        queries = [{"id": "bad", "start_time": "2020-11-11", "n_windows": 0}, {"colour": "red"}, None,
+                   self.queries[0]]
+
+        results = list(run_batch(queries, self.scheduler))
+
+        self.assertTrue(results[:3] == [{"id": "bad", "error": "invalid query"}, {"id": 1, "error": "invalid query"},
+                                        {"id": 2, "error": "invalid query"}])
+        self.assertTrue(results[3]["id"] == "a" and "satellites" in results[3])
+
+    def test_run_batch_satlist_url_not_string(self):
+        queries = [{"start_time": "2020-11-11T00:00:00", "satlist_url": {"x": 1}},
+                   {"start_time": "2020-11-11T00:00:00", "satlist_url": ["x", 3]},
+                   {"start_time": "2020-11-11T00:00:00", "satlist_url": 3}, self.queries[0]]
+
+        results = list(run_batch(queries, self.scheduler))
+
+        self.assertTrue(results[:3] == [{"id": index, "error": "invalid query"} for index in range(3)])
+        self.assertTrue(results[3]["id"] == "a" and "satellites" in results[3])
+
+    def test_run_batch_empty_satellites(self):
+        with patch.object(Scheduler, "get_satellite_catalog", return_value=SatelliteCatalog([], [])):
+            results = list(run_batch(self.queries[:1], self.scheduler))
+
+        self.assertTrue(results == [{"id": "a", "start_time": None, "satellites": []}])
+
+    def test_read_queries(self):
+        self.assertTrue(list(read_queries(['{"n_windows": 2}\n', "\n", "{\n"])) == [{"n_windows": 2}, None])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queries_path = os.path.join(directory, "queries.jsonl")
+            results_path = os.path.join(directory, "results.jsonl")
+
+            with open(queries_path, "w") as queries_file:
+                queries_file.write("".join(json.dumps(query) + "\n" for query in self.queries))
+
+            batch_main([queries_path, "--output", results_path])
+
+            with open(results_path) as results_file:
+                results = [json.loads(line) for line in results_file]
+
+        self.assertTrue(sorted(result["id"] for result in results) == ["a", "b", "c"])
+
+
+class EventsSchedulerTest(unittest.TestCase):
+    """ Tests for the events engine of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+    def test_get_visibility_intervals_non_satellite(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_visibility_intervals([None], self.observer_location, testing_epoch, 60)
+
+    def test_get_visibility_intervals(self):
+        intervals = self.scheduler.get_visibility_intervals(self.satellites_list, self.observer_location,
+                                                            testing_epoch, 720)
+
+        self.assertTrue(len(intervals) == 8)
+        self.assertTrue(intervals[2].shape == (0, 2))
+        self.assertTrue(numpy.allclose(intervals[5], [[0, 720]]))
+
+        for rise_time, set_time in intervals[0]:
+            times = self.scheduler.ts.utc(2020, 11, 11, 0, [rise_time, (rise_time + set_time) / 2, set_time])
+            elevations = self.satellites_list[0].get_altitude(self.observer_location, times).degrees
+
+            self.assertTrue(abs(elevations[0]) < 0.01)
+            self.assertTrue(elevations[1] > 0)
+            self.assertTrue(abs(elevations[2]) < 0.01)
+
+    def test_get_visibility_intervals_visible_at_start(self):
+        intervals = self.scheduler.get_visibility_intervals(self.satellites_list[:1], self.observer_location,
+                                                            testing_epoch + timedelta(minutes=55), 10)
+
+        self.assertTrue(intervals[0][0][0] == 0)
+        self.assertTrue(0 < intervals[0][0][1] < 10)
+
+    def test_find_max_concurrent_satellites_windows(self):
+        intervals = [numpy.array([[10, 50]]), numpy.array([[20, 70]]), numpy.array([[55, 60], [100, 120]])]
+
+        counts, visible_satellites = self.scheduler.find_max_concurrent_satellites_windows(intervals, 2, 60)
+
+        self.assertTrue(list(counts) == [2, 1])
+        self.assertTrue(visible_satellites.tolist() == [[True, True, False], [False, True, False]])
+
+    def test_find_max_concurrent_satellites_windows_set_at_window_end(self):
+        intervals = [numpy.array([[0, 60]]), numpy.array([[60, 90]]), numpy.zeros((0, 2))]
+
+        counts, visible_satellites = self.scheduler.find_max_concurrent_satellites_windows(intervals, 3, 60)
+
+        self.assertTrue(list(counts) == [1, 1, 0])
+        self.assertTrue(visible_satellites.tolist() == [[True, False, False], [False, True, False],
+                                                        [False, False, False]])
+
+    def test_find_max_concurrent_satellites_windows_empty_interval(self):
+        intervals = [numpy.array([[5, 5]]), numpy.array([[70, 80]]), numpy.array([[60, 60], [100, 110]])]
+
+        counts, visible_satellites = self.scheduler.find_max_concurrent_satellites_windows(intervals, 2, 60)
+
+        self.assertTrue(list(counts) == [0, 1])
+        self.assertTrue(visible_satellites.tolist() == [[False, False, False], [False, True, False]])
+
+    def test_get_visibility_intervals_drops_empty_intervals(self):
+        satellite_intervals = numpy.array([[0.0, 0.0], [0.0, 0.5 / 24 / 60]]) + self.scheduler.ts.utc(testing_epoch).tt
+
+        with patch.object(Satellite, "get_visibility_intervals", return_value=satellite_intervals):
+            intervals = self.scheduler.get_visibility_intervals(self.satellites_list[:1], self.observer_location,
+                                                                testing_epoch, 60)
+
+        self.assertTrue(intervals[0].shape == (1, 2))
+        self.assertTrue(numpy.allclose(intervals[0], [[0, 0.5]]))
+
+    def test_find_time_events_empty_satellites(self):
+        self.assertTrue(self.scheduler.find_time_events([], None, testing_epoch, 4, 60, 5, False) == (None, []))
+
+    def test_find_time_events_matches_vectorized(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                    sample_interval=1, cumulative=cumulative, engine="vectorized")
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                  sample_interval=1, cumulative=cumulative, engine="events")
+
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+    def test_find_time_events_cumulative_between_samples(self):
+        # SAT-1 is only visible between minutes 52 and 62, which sampling every 45 minutes misses
+        with patch.object(Scheduler, "get_all_satellites", return_value=self.satellites_list[:1]):
+            sampled = self.scheduler.find_time(start_time=testing_epoch, n_windows=1, duration=90,
+                                               sample_interval=45, cumulative=True, engine="vectorized")
+            actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=1, duration=90,
+                                              sample_interval=45, cumulative=True, engine="events")
+
+        self.assertTrue(sampled == (None, []))
+        self.assertTrue(actual[1] == ['SAT-1'])
+
+
+class ManyObserversSchedulerTest(unittest.TestCase):
+    """ Tests for running the scheduler for many observers at once. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.locations = [(-37.910496, 145.134021), (-33.86, 151.21), (35.68, 139.69), (51.5, -0.1)]
+
+    def test_find_time_many_locations_wrong_type(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time_many(locations='a')
+
+    def test_find_time_many_location_out_of_range(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time_many(locations=[(0, 0), (-100, 0)])
+
+    def test_find_time_many_no_locations(self):
+        self.assertTrue(self.scheduler.find_time_many(locations=[]) == [])
+
+    def test_find_time_many_no_locations_invalid_arguments(self):
+        for arguments in [{"start_time": "garbage"}, {"n_windows": -5}, {"duration": 0}, {"cumulative": 1}]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.find_time_many(locations=[], **arguments)
+
+    def test_is_above_horizon(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 4, 60, 15)
+        positions = BatchPropagator(self.satellites_list).get_positions(sample_times)
+
+        for location in self.locations:
+            observer_location = Topos(location[0], location[1])
+            visible = is_above_horizon(positions, observer_location)
+
+            self.assertTrue(visible.shape == (8, 16))
+            self.assertTrue(numpy.array_equal(visible, get_topocentric_elevations(positions, observer_location) > 0))
+
+    def test_find_time_many_peak_memory(self):
+        catalog = SatelliteCatalog.from_tle_lines(list(read_tle_lines(make_synthetic_tle(200).encode("utf-8")
+                                                                      .splitlines())))
+
+        def get_peak(locations):
+            with patch.object(Scheduler, "get_satellite_catalog", return_value=catalog):
+                tracemalloc.start()
+                try:
+                    self.scheduler.find_time_many(start_time=testing_epoch, n_windows=24, duration=60,
+                                                  sample_interval=1, locations=locations)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+
+            return peak
+
+        # the timescale is made before measuring, as it is kept by the Scheduler
+        get_peak(self.locations[:1])
+
+        # no more memory for 36 observers than for one, past their windows
+        self.assertTrue(get_peak(self.locations * 9) < 1.1 * get_peak(self.locations[:1]))
+
+    def test_find_time_many_matches_find_time(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                results = self.scheduler.find_time_many(start_time=testing_epoch, n_windows=12, duration=60,
+                                                        sample_interval=5, cumulative=cumulative,
+                                                        locations=self.locations)
+
+                for location, result in zip(self.locations, results):
+                    expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                        sample_interval=5, cumulative=cumulative, location=location,
+                                                        engine="batched")
+
+                    self.assertTrue(result[0] == expected[0])
+                    self.assertTrue(result[1] == expected[1])
+
+
+class ParallelSchedulerTest(unittest.TestCase):
+    """ Tests for running the batched engine of the scheduler class in a pool of processes. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+    def test_find_time_workers_wrong_type(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="batched", workers='a')
+
+    def test_find_time_workers_non_positive(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="batched", workers=0)
+
+    def test_find_time_workers_not_batched(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(engine="vectorized", workers=2)
+
+    def test_get_elevation_matrix_parallel_matches_batched(self):
+        location = (-37.910496, 145.134021)
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 12, 60, 5)
+
+        expected = self.scheduler.get_elevation_matrix(self.satellites_list, Topos(location[0], location[1]),
+                                                       sample_times, "batched")
+        actual = self.scheduler.get_elevation_matrix_parallel(self.satellites_list, location, sample_times, 3)
+
+        self.assertTrue(numpy.array_equal(actual, expected))
+
+    def test_find_time_parallel_matches_batched(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                    sample_interval=5, cumulative=cumulative, engine="batched")
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                  sample_interval=5, cumulative=cumulative, engine="batched",
+                                                  workers=2)
+
+            self.assertTrue(actual == expected)
+
+
+class IterWindowsSchedulerTest(unittest.TestCase):
+    """ Tests for evaluating the windows of the scheduler class one at a time. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheduler = Scheduler()
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_iter_windows_invalid_argument(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.iter_windows(n_windows=0)
+
+    @patch.object(Scheduler, "find_max_visible_satellites_interval_non_cumulative")
+    def test_iter_windows_loop(self, mock_find_max_visible_satellites_interval_non_cumulative):
+
+        mock_find_max_visible_satellites_interval_non_cumulative.side_effect = [
+            [None, [Satellite('sat_1', None)]],
+            [None, []],
+            [None, [Satellite('sat_2', None), Satellite('sat_3', None)]]]
+
+        with patch_testing_satellites(self.satellites_list):
+            windows = self.scheduler.iter_windows(start_time=testing_epoch, n_windows=3)
+
+        self.assertTrue(isinstance(windows, types.GeneratorType))
+        self.assertTrue(list(windows) == [(testing_epoch, 1, ['sat_1']),
+                                          (testing_epoch + timedelta(hours=1), 0, []),
+                                          (testing_epoch + timedelta(hours=2), 2, ['sat_2', 'sat_3'])])
+
+    def test_iter_windows_empty_satellites(self):
+        with patch.object(Scheduler, "get_satellite_catalog", return_value=SatelliteCatalog([], [])):
+            windows = list(self.scheduler.iter_windows(start_time=testing_epoch, n_windows=2, engine="batched"))
+
+        self.assertTrue(windows == [(testing_epoch, 0, []), (testing_epoch + timedelta(hours=1), 0, [])])
+
+    def test_iter_windows_matches_find_time(self):
+        for engine in ["loop", "vectorized", "batched", "ephemeris", "events", "index"]:
+            for cumulative in [False, True]:
+                with patch_testing_satellites(self.satellites_list):
+                    windows = list(self.scheduler.iter_windows(start_time=testing_epoch, n_windows=6, duration=60,
+                                                               sample_interval=10, cumulative=cumulative,
+                                                               engine=engine))
+                    expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                        sample_interval=10, cumulative=cumulative, engine=engine)
+
+                self.assertTrue(len(windows) == 6)
+                self.assertTrue([window[0] for window in windows] ==
+                                [testing_epoch + timedelta(hours=hour) for hour in range(6)])
+
+                max_window = max(windows, key=lambda window: window[1])
+
+                self.assertTrue(max_window[0] == expected[0])
+                self.assertTrue(sorted(max_window[2]) == sorted(expected[1]))
+
+    def test_iter_windows_catalog_engines(self):
+        for engine in ["batched", "ephemeris", "index"]:
+            with patch_testing_satellites(self.satellites_list), \
+                    patch.object(SatelliteCatalog, "from_satellites") as mock_from_satellites:
+                windows = list(self.scheduler.iter_windows(start_time=testing_epoch, n_windows=6, duration=60,
+                                                           sample_interval=10, engine=engine))
+
+                self.assertTrue(Scheduler.get_all_satellites.call_count == 0)
+                self.assertTrue(Scheduler.get_satellite_catalog.call_count == 1)
+
+            # the catalog isn't built again for every window
+            self.assertTrue(mock_from_satellites.call_count == 0)
+            self.assertTrue(len(windows) == 6)
+
+    @patch.object(Scheduler, "find_max_visible_satellites_interval_non_cumulative")
+    def test_find_top_windows_ranked(self, mock_find_max_visible_satellites_interval_non_cumulative):
+
+        mock_find_max_visible_satellites_interval_non_cumulative.side_effect = [
+            [None, [Satellite('sat_1', None)]],
+            [None, []],
+            [None, [Satellite('sat_2', None), Satellite('sat_3', None)]],
+            [None, [Satellite('sat_4', None)]],
+            [None, [Satellite('sat_5', None), Satellite('sat_6', None)]],
+            [None, [Satellite('sat_7', None)]]]
+
+        with patch_testing_satellites(self.satellites_list):
+            top_windows = self.scheduler.find_top_windows(start_time=testing_epoch, n_windows=6, top_k=4)
+
+        # equal counts ranked from the earliest window, the latest window with a single satellite left out
+        self.assertTrue(top_windows == [(testing_epoch + timedelta(hours=2), 2, ['sat_2', 'sat_3']),
+                                        (testing_epoch + timedelta(hours=4), 2, ['sat_5', 'sat_6']),
+                                        (testing_epoch, 1, ['sat_1']),
+                                        (testing_epoch + timedelta(hours=3), 1, ['sat_4'])])
+
+    def test_find_top_windows_matches_iter_windows(self):
+        for engine in ["loop", "batched", "events"]:
+            for cumulative in [False, True]:
+                with patch_testing_satellites(self.satellites_list):
+                    windows = list(self.scheduler.iter_windows(start_time=testing_epoch, n_windows=8, duration=60,
+                                                               sample_interval=10, cumulative=cumulative,
+                                                               engine=engine))
+                    top_windows = self.scheduler.find_top_windows(start_time=testing_epoch, n_windows=8, duration=60,
+                                                                  sample_interval=10, cumulative=cumulative,
+                                                                  engine=engine, top_k=3)
+                    expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=8, duration=60,
+                                                        sample_interval=10, cumulative=cumulative, engine=engine)
+
+                ranked = sorted((window for window in windows if window[1]), key=lambda window: -window[1])
+
+                self.assertTrue(top_windows == ranked[:3])
+                self.assertTrue(top_windows[0][0] == expected[0])
+
+    def test_find_top_windows_empty_satellites(self):
+        with patch.object(Scheduler, "get_satellite_catalog", return_value=SatelliteCatalog([], [])):
+            self.assertTrue(self.scheduler.find_top_windows(start_time=testing_epoch, engine="batched") == [])
+
+    def test_find_top_windows_catalog_engines(self):
+        for engine in ["batched", "ephemeris", "index"]:
+            with patch_testing_satellites(self.satellites_list), \
+                    patch.object(SatelliteCatalog, "from_satellites") as mock_from_satellites:
+                top_windows = self.scheduler.find_top_windows(start_time=testing_epoch, n_windows=6, duration=60,
+                                                              sample_interval=10, engine=engine, top_k=2)
+
+                self.assertTrue(Scheduler.get_all_satellites.call_count == 0)
+                self.assertTrue(Scheduler.get_satellite_catalog.call_count == 1)
+
+            # the catalog isn't built again for every window
+            self.assertTrue(mock_from_satellites.call_count == 0)
+            self.assertTrue(len(top_windows) == 2)
+
+    def test_find_top_windows_top_k_invalid(self):
+        for top_k in [0, -1, 2.0, None]:
+            with self.assertRaises(IllegalArgumentException):
+                self.scheduler.find_top_windows(top_k=top_k)
+
+
+class PrunedSchedulerTest(unittest.TestCase):
+    """ Tests for skipping the windows that can't beat the best one in the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+    def test_find_time_prune_wrong_type(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(prune=1)
+
+    def test_find_time_prune_not_loop(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(prune=True, engine="batched")
+
+    def test_find_time_pruned_empty_satellites(self):
+        self.assertTrue(self.scheduler.find_time_pruned([], None, testing_epoch, 4, 60, 5, False) == (None, []))
+
+    def test_get_possibly_visible_windows_bounds_visible(self):
+        possibly_visible = self.scheduler.get_possibly_visible_windows(self.satellites_list, self.observer_location,
+                                                                       testing_epoch, 12, 60)
+
+        elevations = self.scheduler.get_elevation_matrix(self.satellites_list, self.observer_location,
+                                                         self.scheduler.get_sample_times(testing_epoch, 12, 60, 1))
+        visible = (elevations > 0).reshape(8, 12, 60).any(axis=2).T
+
+        self.assertTrue(possibly_visible.shape == (12, 8))
+        self.assertFalse((visible & ~possibly_visible).any())
+        self.assertTrue(possibly_visible.sum() < possibly_visible.size)
+
+    def test_find_time_pruned_matches_loop(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                    sample_interval=5, cumulative=cumulative)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=12, duration=60,
+                                                  sample_interval=5, cumulative=cumulative, prune=True)
+
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+    @patch.object(Scheduler, "find_max_visible_satellites_interval_cumulative")
+    def test_find_time_pruned_skips_windows(self, mock_find_max_visible_satellites_interval_cumulative):
+
+        # the windows are evaluated from the highest bound down, the first one found can't be beaten
+        mock_find_max_visible_satellites_interval_cumulative.side_effect = lambda candidates, *arguments: (
+            None, candidates)
+
+        possibly_visible = numpy.array([[True, False, False],
+                                        [True, True, True],
+                                        [True, True, False],
+                                        [True, True, True]])
+
+        with patch.object(Scheduler, "get_possibly_visible_windows", return_value=possibly_visible):
+            max_interval_start, max_satellites = self.scheduler.find_time_pruned(
+                self.satellites_list[:3], self.observer_location, testing_epoch, 4, 60, 5, True)
+
+        self.assertTrue(mock_find_max_visible_satellites_interval_cumulative.call_count == 1)
+        self.assertTrue(max_interval_start == testing_epoch + timedelta(hours=1))
+        self.assertTrue(max_satellites == ['SAT-1', 'SAT-2', 'SAT-3'])
+
+
+class AdaptiveSchedulerTest(unittest.TestCase):
+    """ Tests for the adaptive sampling of the scheduler class. """
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.satellites_list = build_testing_satellites(self.scheduler)
+        self.observer_location = Topos(-37.910496, 145.134021)
+
+    def test_find_time_adaptive_wrong_type(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(adaptive='a')
+
+    def test_find_time_adaptive_not_loop(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(adaptive=True, engine="vectorized")
+
+    def test_get_adaptive_visibility_non_satellite(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.get_adaptive_visibility([None], self.observer_location, testing_epoch, 60, 1)
+
+    def test_get_elevation_rate_bounds(self):
+        below_horizon_rate, above_horizon_rate = get_elevation_rate_bounds(self.satellites_list[0].info.model)
+
+        self.assertTrue(0 < below_horizon_rate < above_horizon_rate)
+
+        # the geostationary satellite moves much slower across the sky
+        self.assertTrue(get_elevation_rate_bounds(self.satellites_list[5].info.model)[0] < below_horizon_rate / 10)
+
+    def test_get_adaptive_visibility_matches_fixed_step(self):
+        sample_times = self.scheduler.get_sample_times(testing_epoch, 1, 720, 1)
+        elevations = self.scheduler.get_elevation_matrix(self.satellites_list, self.observer_location, sample_times)
+
+        with patch("scheduler.get_elevation_at", wraps=get_elevation_at) as mock_get_elevation_at:
+            visible = self.scheduler.get_adaptive_visibility(self.satellites_list, self.observer_location,
+                                                             testing_epoch, 720, 1)
+
+        self.assertTrue(numpy.array_equal(visible, elevations > 0))
+        self.assertTrue(mock_get_elevation_at.call_count < elevations.size / 2)
+
+    @patch.object(Scheduler, "get_adaptive_visibility")
+    def test_find_max_visible_satellites_interval_non_cumulative_adaptive(self, mock_get_adaptive_visibility):
+        mock_get_adaptive_visibility.return_value = numpy.array([[True, True, False, False],
+                                                                 [False, True, True, False],
+                                                                 [False, False, True, True]])
+
+        interval_start_time, visible_satellites = self.scheduler.find_max_visible_satellites_interval_non_cumulative(
+            self.satellites_list[:3], None, testing_epoch, 120, 30, adaptive=True)
+
+        self.assertTrue(interval_start_time.utc_datetime() == testing_epoch + timedelta(minutes=30))
+        self.assertTrue(visible_satellites == self.satellites_list[:2])
+
+    @patch.object(Scheduler, "get_adaptive_visibility")
+    def test_find_max_visible_satellites_interval_cumulative_adaptive(self, mock_get_adaptive_visibility):
+        mock_get_adaptive_visibility.return_value = numpy.array([[True, True, False, False],
+                                                                 [False, False, False, False],
+                                                                 [False, False, True, True]])
+
+        interval_start_time, visible_satellites = self.scheduler.find_max_visible_satellites_interval_cumulative(
+            self.satellites_list[:3], None, testing_epoch, 120, 30, adaptive=True)
+
+        self.assertTrue(interval_start_time.utc_datetime() == testing_epoch)
+        self.assertTrue(visible_satellites == [self.satellites_list[0], self.satellites_list[2]])
+
+    def test_find_time_adaptive_matches_loop(self):
+        for cumulative in [False, True]:
+            with patch_testing_satellites(self.satellites_list):
+                expected = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                    sample_interval=5, cumulative=cumulative)
+                actual = self.scheduler.find_time(start_time=testing_epoch, n_windows=6, duration=60,
+                                                  sample_interval=5, cumulative=cumulative, adaptive=True)
+
+            self.assertTrue(actual[0] == expected[0])
+            self.assertTrue(sorted(actual[1]) == sorted(expected[1]))
+
+
+class InstrumentationTest(unittest.TestCase):
+    """ Tests for the timings and counters of an instrumented scheduler. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.callback = Mock()
+        self.scheduler = Scheduler(stats_callback=self.callback)
+        self.scheduler._skyload = Loader(self.directory.name, verbose=False)
+        self.satellites_list = build_testing_satellites(self.scheduler)
+
+        tle_path = os.path.join(self.directory.name, "testing.txt")
+        with open(tle_path, "w") as tle_file:
+            tle_file.write(testing_tle)
+        self.satellites_url = "file://" + tle_path
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_not_instrumented(self):
+        scheduler = Scheduler()
+
+        with patch_testing_satellites(self.satellites_list):
+            scheduler.find_time(start_time=testing_epoch, n_windows=2, duration=60, sample_interval=10,
+                                engine="batched")
+
+        self.assertTrue(scheduler.instrument is False)
+        self.assertTrue(scheduler.last_stats is None)
+        self.assertTrue(scheduler.stats is NULL_STATS)
+
+    def test_find_time_batched(self):
+        self.scheduler.find_time(satlist_url=self.satellites_url, start_time=testing_epoch, n_windows=6, duration=60,
+                                 sample_interval=10, engine="batched")
+
+        stats = self.scheduler.last_stats
+
+        self.assertTrue(isinstance(stats, SchedulerStats))
+        self.assertTrue(self.scheduler.stats is NULL_STATS)
+        self.callback.assert_called_once_with(stats)
+
+        self.assertTrue(stats.call == "find_time")
+        self.assertTrue(stats.counters == {"satellites": 8, "samples": 36, "propagations": 1, "utc_calls": 1})
+        self.assertTrue(set(stats.timings) == {"total", "download", "parse", "timescale", "propagation", "altaz",
+                                               "aggregation"})
+        self.assertTrue(stats.timings["total"] >= stats.timings["propagation"] + stats.timings["altaz"])
+        self.assertTrue(stats.as_dict()["counters"] == stats.counters)
+
+    def test_find_time_loop(self):
+        with patch_testing_satellites(self.satellites_list):
+            self.scheduler.find_time(start_time=testing_epoch, n_windows=2, duration=60, sample_interval=20)
+
+        stats = self.scheduler.last_stats
+
+        # every satellite at each of the 3 sub-intervals of both windows
+        self.assertTrue(stats.counters["propagations"] == 8 * 6)
+        self.assertTrue(stats.counters["samples"] == 6)
+        self.assertTrue("propagation" in stats.timings)
+
+    def test_find_time_many(self):
+        with patch_testing_satellites(self.satellites_list):
+            self.scheduler.find_time_many(start_time=testing_epoch, n_windows=2, duration=60, sample_interval=10,
+                                          locations=[(-37.910496, 145.134021), (51.5, -0.1)])
+
+        self.assertTrue(self.scheduler.last_stats.call == "find_time_many")
+        self.assertTrue(self.scheduler.last_stats.counters["propagations"] == 1)
+
+    def test_failed_call_not_reported(self):
+        with self.assertRaises(IllegalArgumentException):
+            self.scheduler.find_time(satlist_url="invalid_url", start_time=testing_epoch, engine="batched")
+
+        self.assertTrue(self.scheduler.last_stats is None)
+        self.assertTrue(self.scheduler.stats is NULL_STATS)
+        self.callback.assert_not_called()
+
+
+class StartupTest(unittest.TestCase):
+    """ Tests for starting the scheduler class without loading anything. """
+
+    def test_import_and_create(self):
+        code = "import sys, scheduler; scheduler.Scheduler(); " \
+               "print(sorted({'numpy', 'skyfield', 'sgp4', 'multiprocessing'} & set(sys.modules)))"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        self.assertTrue(output.decode().strip() == "[]")
+
+    def test_timescale_made_once(self):
+        with patch.object(Loader, "timescale", return_value="timescale") as mock_timescale:
+            scheduler = Scheduler()
+            self.assertTrue(mock_timescale.call_count == 0)
+
+            self.assertTrue(scheduler.ts == "timescale")
+            self.assertTrue(scheduler.ts == "timescale")
+
+        mock_timescale.assert_called_once_with(builtin=True)
+
+    def test_timescale_not_builtin(self):
+        with patch.object(Loader, "timescale", return_value="timescale") as mock_timescale:
+            Scheduler(builtin_timescale=False).ts
+
+        mock_timescale.assert_called_once_with(builtin=False)
+
+    def test_lazy_module(self):
+        import scheduler
+
+        lazy_module = LazyModule("json", "lazy_json")
+        scheduler.lazy_json = lazy_module
+
+        try:
+            self.assertTrue(lazy_module.dumps([1]) == "[1]")
+            self.assertTrue(scheduler.lazy_json is sys.modules["json"])
+        finally:
+            del scheduler.lazy_json
+
+
+class BenchmarkTest(unittest.TestCase):
+    """ Tests for the scheduler benchmarks. """
+
+    def test_make_synthetic_tle_out_of_range(self):
+        with self.assertRaises(ValueError):
+            make_synthetic_tle(5)
+
+    def test_make_synthetic_tle(self):
+        tle = make_synthetic_tle(50, seed=1)
+
+        self.assertTrue(tle == make_synthetic_tle(50, seed=1))
+        self.assertTrue(tle != make_synthetic_tle(50, seed=2))
+
+        tle_lines = list(read_tle_lines(tle.encode("ascii").splitlines(True)))
+
+        self.assertTrue(len(tle_lines) == 50)
+        self.assertTrue(tle_lines[0][0] == "SYNTH-00000")
+
+    def test_run_benchmarks(self):
+        records = list(run_benchmarks(sizes=[10], engines=["batched"], n_windows_list=[2], durations=[30, 60],
+                                      sample_intervals=[10, 45], cumulatives=[False], repeat=2))
+
+        self.assertTrue([record["benchmark"] for record in records] ==
+                        ["get_all_satellites", "get_satellite_catalog", "find_visible_satellites_instance",
+                         "find_visible_satellites_instance", "find_time", "find_time", "find_time"])
+        self.assertTrue([record.get("samples") for record in records[4:]] == [6, 12, 2])
+        self.assertTrue(all(record["repeat"] == 2 and record["best"] <= record["mean"] for record in records))
+        self.assertTrue(all(record["satellites"] == 10 for record in records))
+
+
 if __name__ == "__main__":
     unittest.main()